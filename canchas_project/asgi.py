@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'canchas_project.settings')
 
 application = get_asgi_application()
+
+# Temporizadores en proceso (solo en los servidores, no en los comandos de manage.py)
+from reservas.vencimiento import iniciar_vencimiento_periodico  # noqa: E402
+
+iniciar_vencimiento_periodico()
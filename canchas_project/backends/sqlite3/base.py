@@ -0,0 +1,33 @@
+"""
+Backend SQLite de Django con dos opciones extra en DATABASES['OPTIONS']:
+
+- 'pragmas': dict de PRAGMAs que se ejecutan en cada conexión nueva
+  (journal_mode, synchronous, cache_size, mmap_size, ...).
+- 'transaction_mode': modo del BEGIN de los bloques atomic ('IMMEDIATE' toma
+  el lock de escritura al empezar la transacción, así una transacción que lee
+  y después escribe no falla con "database is locked" sin esperar el timeout).
+
+Django 5.1 trae 'transaction_mode' e 'init_command' de serie; al actualizar se
+puede volver a 'django.db.backends.sqlite3'.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = kwargs.pop('pragmas', {})
+        self.transaction_mode = kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, valor in self.pragmas.items():
+            conn.execute(f'PRAGMA {pragma} = {valor}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
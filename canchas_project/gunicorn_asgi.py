@@ -0,0 +1,26 @@
+"""
+Configuración de gunicorn para servir el proyecto con ASGI (workers de uvicorn).
+
+    pip install -r requirements.txt
+    DJANGO_ENV=prod gunicorn -c canchas_project/gunicorn_asgi.py
+
+Las vistas async (reportes, reportes_pdf y el pago con MercadoPago) esperan
+la base y los servicios externos sin ocupar un hilo; las vistas sync corren
+en un hilo propio por request. Por eso con ASGI no se usan conexiones
+persistentes: cada request abre la suya (DB_CONN_MAX_AGE=0, salvo que se
+defina otro valor).
+"""
+import multiprocessing
+import os
+
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+wsgi_app = 'canchas_project.asgi:application'
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# El PDF de reportes de un mes grande tarda varios segundos
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
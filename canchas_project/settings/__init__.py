@@ -0,0 +1,13 @@
+"""
+Settings por entorno.
+
+DJANGO_ENV=dev (default) carga dev.py y DJANGO_ENV=prod carga prod.py, ambos
+sobre base.py. También se puede apuntar DJANGO_SETTINGS_MODULE directamente a
+canchas_project.settings.dev o canchas_project.settings.prod.
+"""
+import os
+
+if os.environ.get('DJANGO_ENV', 'dev') == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
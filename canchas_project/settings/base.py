@@ -0,0 +1,212 @@
+"""
+Django settings for canchas_project project.
+
+Generated by 'django-admin startproject' using Django 5.2.7.
+
+Settings comunes a todos los entornos. Los valores propios de desarrollo y
+producción están en dev.py y prod.py (ver settings/__init__.py).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.2/ref/settings/
+"""
+
+from pathlib import Path
+import os
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+# Se lee del entorno; dev.py define una clave de desarrollo y prod.py la exige.
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', '')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = []
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'reservas',
+]
+
+MIDDLEWARE = [
+    'reservas.middleware.MetricasMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'canchas_project.urls'
+
+TEMPLATES = [
+    {
+        # DjangoTemplates que además mide el tiempo de render por request
+        'BACKEND': 'reservas.metricas.DjangoTemplatesMedido',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'canchas_project.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+
+# Se elige por variables de entorno: DB_ENGINE=sqlite (default) o postgresql.
+# Las conexiones son persistentes (DB_CONN_MAX_AGE segundos) y se verifican
+# antes de reutilizarse.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'canchas'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            # Detrás de PgBouncer en modo transacción (pool de conexiones) no se
+            # pueden usar cursores del lado del servidor
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_PGBOUNCER', '') == '1',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            # Backend SQLite con PRAGMAs por conexión y BEGIN IMMEDIATE (ver canchas_project/backends)
+            'ENGINE': 'canchas_project.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Segundos que una conexión espera un lock antes de fallar con "database is locked"
+                'timeout': int(os.environ.get('DB_TIMEOUT', 20)),
+                'transaction_mode': 'IMMEDIATE',
+                'pragmas': {
+                    'journal_mode': 'WAL',      # Los lectores no bloquean al escritor ni viceversa
+                    'synchronous': 'NORMAL',    # Seguro con WAL; solo sincroniza en los checkpoints
+                    'cache_size': -64000,       # 64 MB de caché de páginas (negativo = KiB)
+                    'mmap_size': 268435456,     # 256 MB de lectura por mmap
+                    'temp_store': 'MEMORY',
+                },
+            },
+        }
+    }
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'es-ar'
+
+TIME_ZONE = 'America/Argentina/Buenos_Aires'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.2/howto/static-files/
+
+STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Configuración de MercadoPago
+MERCADOPAGO_ACCESS_TOKEN = ''
+MERCADOPAGO_PUBLIC_KEY = ''
+MERCADOPAGO_TIMEOUT_SEGUNDOS = 10  # Espera máxima al crear la preferencia de pago
+# 'httpx' (cliente async, requirements.txt) o 'sdk': modo degradado que ocupa un hilo por pago
+MERCADOPAGO_CLIENTE = os.environ.get('MERCADOPAGO_CLIENTE', 'httpx')
+
+# Métricas de rendimiento (/metrics/)
+METRICAS_HABILITADAS = True
+METRICAS_TOKEN = ''  # Si se define, permite leer /metrics/ con "Authorization: Bearer <token>"
+METRICAS_UMBRAL_N_MAS_UNO = 10  # Repeticiones de la misma consulta para marcar un posible N+1
+
+# Segundos que se cachea la ocupación de cada día en la agenda (además se
+# invalida al cambiar cualquier reserva)
+OCUPACION_CACHE_SEGUNDOS = 300
+
+# Segundos que se cachea el resumen de torneo_detalle (ingresos y conteos de
+# partidos); se invalida al cambiar reservas, pagos o partidos
+TORNEO_RESUMEN_CACHE_SEGUNDOS = 300
+
+# Tareas en segundo plano (promoción de la lista de espera): corren en hilos
+# del mismo proceso después del commit. En False corren en el request.
+TAREAS_EN_SEGUNDO_PLANO = True
+TAREAS_HILOS = 2
+
+# Las reservas que siguen pendientes de pago este tiempo después de creadas se
+# cancelan (python manage.py vencer_reservas, o el temporizador en proceso si
+# VENCIMIENTO_INTERVALO_SEGUNDOS > 0)
+RESERVA_PENDIENTE_TTL_MINUTOS = 24 * 60
+VENCIMIENTO_INTERVALO_SEGUNDOS = 0
+
+# Ocupación en vivo (reservas/eventos/, server-sent events). El broker local
+# reparte los eventos dentro de cada proceso: con varios workers hace falta un
+# backend compartido. Cada conexión manda un ping cada EVENTOS_KEEPALIVE_SEGUNDOS
+# y se corta a los EVENTOS_DURACION_MAXIMA_SEGUNDOS (el navegador se reconecta).
+# Los flujos largos requieren ASGI (canchas_project/gunicorn_asgi.py): con WSGI
+# cada conexión abierta ocupa un hilo del worker, así que se corta a los
+# EVENTOS_DURACION_MAXIMA_WSGI_SEGUNDOS y el navegador queda consultando cada
+# ese tiempo en lugar de tener el hilo tomado.
+EVENTOS_BACKEND = 'reservas.eventos.BrokerLocal'
+EVENTOS_KEEPALIVE_SEGUNDOS = 15
+EVENTOS_DURACION_MAXIMA_SEGUNDOS = 300
+EVENTOS_DURACION_MAXIMA_WSGI_SEGUNDOS = 20
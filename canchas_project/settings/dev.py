@@ -0,0 +1,14 @@
+"""Settings de desarrollo: DEBUG activo y caché en memoria del proceso."""
+from .base import *  # noqa: F401,F403
+import os
+
+DEBUG = True
+
+# Clave insegura solo para desarrollo (prod.py exige DJANGO_SECRET_KEY)
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY') or 'django-insecure-kx#ho)9e)!ox5=2jbh!^yqxh-b*k=yiuc*7a$=1=-(h$2v&z)_'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
@@ -0,0 +1,104 @@
+"""
+Settings de producción.
+
+Sin DEBUG (Django no guarda cada consulta SQL en memoria), templates
+compilados una sola vez por proceso, conexiones persistentes, caché
+compartida entre procesos y archivos estáticos comprimidos con hash en
+el nombre (requiere `python manage.py collectstatic`).
+
+Los diccionarios y listas que vienen de base se copian antes de cambiarlos:
+así base y dev no ven los valores de producción si se importan en el mismo
+proceso.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASES, MIDDLEWARE, TEMPLATES
+import copy
+import os
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Definí DJANGO_SECRET_KEY para correr con DJANGO_ENV=prod.')
+
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host.strip()]
+CSRF_TRUSTED_ORIGINS = [
+    origen.strip() for origen in os.environ.get('DJANGO_CSRF_TRUSTED_ORIGINS', '').split(',') if origen.strip()
+]
+
+if os.environ.get('DJANGO_HTTPS') == '1':
+    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+    SESSION_COOKIE_SECURE = True
+    CSRF_COOKIE_SECURE = True
+
+
+# Templates: loader cacheado explícito (APP_DIRS no se puede combinar con 'loaders')
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+
+# Conexiones persistentes más largas que en desarrollo
+DATABASES = copy.deepcopy(DATABASES)
+DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+
+# Caché compartida entre procesos: Redis si está configurado, si no en archivos
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / '.cache'),
+        }
+    }
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+# Archivos estáticos comprimidos (gzip/brotli) y con hash en el nombre
+# (cacheables sin límite), servidos por whitenoise (requirements.txt)
+MIDDLEWARE = list(MIDDLEWARE)
+MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                  'whitenoise.middleware.WhiteNoiseMiddleware')
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+
+# Secretos desde el entorno
+MERCADOPAGO_ACCESS_TOKEN = os.environ.get('MERCADOPAGO_ACCESS_TOKEN', '')
+MERCADOPAGO_PUBLIC_KEY = os.environ.get('MERCADOPAGO_PUBLIC_KEY', '')
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')
+
+
+# Vencimiento de reservas pendientes: 0 desactiva el temporizador en proceso
+# (por ejemplo, si se corre "manage.py vencer_reservas" desde cron)
+RESERVA_PENDIENTE_TTL_MINUTOS = int(os.environ.get('RESERVA_PENDIENTE_TTL_MINUTOS', 24 * 60))
+VENCIMIENTO_INTERVALO_SEGUNDOS = int(os.environ.get('VENCIMIENTO_INTERVALO_SEGUNDOS', 0))
+
+
+# Los avisos de rendimiento (posibles N+1) van a la consola del servidor
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'reservas': {'handlers': ['console'], 'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO')},
+    },
+}
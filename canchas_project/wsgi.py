@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'canchas_project.settings')
 
 application = get_wsgi_application()
+
+# Temporizadores en proceso (solo en los servidores, no en los comandos de manage.py)
+from reservas.vencimiento import iniciar_vencimiento_periodico  # noqa: E402
+
+iniciar_vencimiento_periodico()
@@ -1,6 +1,81 @@
 from django.contrib import admin
+from django.db.models import Count, F
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import TipoCancha, Cliente, Cancha, Servicio, Torneo, Reserva, Pago, Equipo, Partido
+from datetime import datetime, time, timedelta
+from .models import TipoCancha, Cliente, Cancha, Servicio, Torneo, Reserva, Pago, Equipo, Partido, EsperaReserva, ReglaPrecio
+
+# ========== FILTROS ==========
+# Los filtros por defecto no escalan con la tabla de reservas: date_hierarchy
+# arma sus enlaces con consultas DISTINCT sobre las fechas y los filtros de FK
+# listan cada fila relacionada. Estos solo filtran por rangos (índice
+# reserva_inicio_idx) y ofrecen opciones que salen de tablas chicas.
+
+class RangoFechaFilter(admin.SimpleListFilter):
+    """Rangos fijos en hora local sobre un campo de fecha y hora"""
+    title = 'fecha'
+    parameter_name = 'rango'
+    campo = 'fecha_hora_inicio'
+
+    def lookups(self, request, model_admin):
+        return [
+            ('hoy', 'Hoy'),
+            ('manana', 'Mañana'),
+            ('7_dias', 'Próximos 7 días'),
+            ('mes', 'Este mes'),
+            ('30_dias_atras', 'Últimos 30 días'),
+        ]
+
+    def rango(self, valor):
+        hoy = timezone.localdate()
+        rangos = {
+            'hoy': (hoy, hoy + timedelta(days=1)),
+            'manana': (hoy + timedelta(days=1), hoy + timedelta(days=2)),
+            '7_dias': (hoy, hoy + timedelta(days=7)),
+            'mes': (hoy.replace(day=1), (hoy.replace(day=28) + timedelta(days=4)).replace(day=1)),
+            '30_dias_atras': (hoy - timedelta(days=30), hoy + timedelta(days=1)),
+        }
+        if valor not in rangos:
+            return None
+        return tuple(timezone.make_aware(datetime.combine(dia, time.min)) for dia in rangos[valor])
+
+    def queryset(self, request, queryset):
+        rango = self.rango(self.value())
+        if rango is None:
+            return queryset
+        desde, hasta = rango
+        return queryset.filter(**{f'{self.campo}__gte': desde, f'{self.campo}__lt': hasta})
+
+
+class CanchaActivaFilter(admin.SimpleListFilter):
+    """Canchas activas, leídas con una sola consulta de (id, nombre)"""
+    title = 'cancha'
+    parameter_name = 'cancha'
+
+    def lookups(self, request, model_admin):
+        return Cancha.objects.filter(activa=True).order_by('nombre').values_list('pk', 'nombre')
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(cancha_id=self.value())
+        return queryset
+
+
+class TorneoVigenteFilter(admin.SimpleListFilter):
+    """Torneos no finalizados; los viejos se buscan por nombre"""
+    title = 'torneo'
+    parameter_name = 'torneo'
+
+    def lookups(self, request, model_admin):
+        torneos = Torneo.objects.exclude(estado='FINALIZADO').order_by('nombre').values_list('pk', 'nombre')
+        return [('ninguno', 'Sin torneo'), *torneos]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'ninguno':
+            return queryset.filter(torneo__isnull=True)
+        if self.value() and self.value().isdigit():
+            return queryset.filter(torneo_id=self.value())
+        return queryset
 
 # ========== CONFIGURACIÓN MEJORADA DEL ADMIN ==========
 
@@ -15,11 +90,13 @@ class ClienteAdmin(admin.ModelAdmin):
     list_filter = ['activo', 'fecha_registro']
     search_fields = ['nombre', 'apellido', 'dni', 'email']
     ordering = ['apellido', 'nombre']
+    show_full_result_count = False
 
 @admin.register(Cancha)
 class CanchaAdmin(admin.ModelAdmin):
     list_display = ['nombre', 'tipo_cancha', 'precio_por_hora', 'capacidad_personas', 'activa']
     list_filter = ['tipo_cancha', 'activa']
+    list_select_related = ['tipo_cancha']
     search_fields = ['nombre']
     ordering = ['nombre']
 
@@ -30,17 +107,31 @@ class ServicioAdmin(admin.ModelAdmin):
     search_fields = ['nombre']
     ordering = ['nombre']
 
+@admin.register(ReglaPrecio)
+class ReglaPrecioAdmin(admin.ModelAdmin):
+    list_display = ['nombre', 'porcentaje', 'hora_desde', 'hora_hasta', 'dias_semana', 'tipo_cancha',
+                    'reservas_pagadas_minimas', 'solo_torneos', 'prioridad', 'acumulable', 'activa']
+    list_filter = ['activa', 'acumulable', 'tipo_cancha']
+    list_select_related = ['tipo_cancha']
+    list_editable = ['porcentaje', 'prioridad', 'acumulable', 'activa']
+    search_fields = ['nombre']
+
 @admin.register(Torneo)
 class TorneoAdmin(admin.ModelAdmin):
     list_display = ['nombre', 'fecha_inicio', 'fecha_fin', 'estado', 'costo_inscripcion', 'equipos_count', 'activo']
     list_filter = ['estado', 'activo', 'fecha_inicio']
     search_fields = ['nombre']
-    filter_horizontal = ['equipos']
+    autocomplete_fields = ['equipos']
+    readonly_fields = ['total_rondas']
     ordering = ['-fecha_inicio']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(total_equipos=Count('equipos'))
+    
     def equipos_count(self, obj):
-        return obj.equipos.count()
+        return obj.total_equipos
     equipos_count.short_description = 'Equipos'
+    equipos_count.admin_order_field = 'total_equipos'
 
 class PagoInline(admin.StackedInline):
     model = Pago
@@ -51,21 +142,25 @@ class PagoInline(admin.StackedInline):
 @admin.register(Reserva)
 class ReservaAdmin(admin.ModelAdmin):
     list_display = ['id', 'cliente', 'cancha', 'fecha_hora_inicio', 'fecha_hora_fin', 'estado', 'get_monto_total']
-    list_filter = ['estado', 'fecha_hora_inicio', 'cancha', 'torneo']
+    list_filter = ['estado', RangoFechaFilter, CanchaActivaFilter, TorneoVigenteFilter]
     search_fields = ['cliente__nombre', 'cliente__apellido', 'cliente__dni', 'cancha__nombre']
-    date_hierarchy = 'fecha_hora_inicio'
     ordering = ['-fecha_hora_inicio']
     filter_horizontal = ['servicios']
+    autocomplete_fields = ['cliente', 'cancha', 'torneo']
     inlines = [PagoInline]
+    # El __str__ de la cancha usa el tipo; el monto sale de una anotación
+    list_select_related = ['cliente', 'cancha__tipo_cancha']
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(monto_pago=F('pago__monto_total'))
     
     def get_monto_total(self, obj):
-        try:
-            if hasattr(obj, 'pago'):
-                return format_html('<strong>${:,.2f}</strong>', float(obj.pago.monto_total))
+        if obj.monto_pago is None:
             return '-'
-        except Exception:
-            return format_html('<span style="color: red;">Error</span>')
+        return format_html('<strong>${}</strong>', f'{obj.monto_pago:,.2f}')
     get_monto_total.short_description = 'Monto Total'
+    get_monto_total.admin_order_field = 'monto_pago'
     
     fieldsets = (
         ('Información Básica', {
@@ -86,6 +181,8 @@ class PagoAdmin(admin.ModelAdmin):
     list_filter = ['estado', 'metodo_pago', 'fecha_pago']
     search_fields = ['reserva__cliente__nombre', 'reserva__cliente__apellido', 'comprobante']
     ordering = ['-fecha_pago']
+    list_select_related = ['reserva__cliente', 'reserva__cancha']
+    show_full_result_count = False
     readonly_fields = ['reserva']
     
     fieldsets = (
@@ -97,6 +194,16 @@ class PagoAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(EsperaReserva)
+class EsperaReservaAdmin(admin.ModelAdmin):
+    list_display = ['cliente', 'cancha', 'fecha_hora_inicio', 'fecha_hora_fin', 'estado', 'fecha_creacion']
+    list_filter = ['estado', RangoFechaFilter, CanchaActivaFilter]
+    list_select_related = ['cliente', 'cancha__tipo_cancha']
+    autocomplete_fields = ['cliente', 'cancha']
+    show_full_result_count = False
+    search_fields = ['cliente__nombre', 'cliente__apellido', 'cliente__dni']
+    readonly_fields = ['reserva', 'fecha_creacion']
+
 @admin.register(Equipo)
 class EquipoAdmin(admin.ModelAdmin):
     list_display = ['nombre', 'fecha_creacion', 'activo']
@@ -113,9 +220,13 @@ class EquipoAdmin(admin.ModelAdmin):
 @admin.register(Partido)
 class PartidoAdmin(admin.ModelAdmin):
     list_display = ['torneo', 'nombre_ronda', 'equipo1', 'equipo2', 'resultado_display', 'ganador', 'estado']
-    list_filter = ['torneo', 'estado', 'ronda']
+    list_filter = [TorneoVigenteFilter, 'estado', 'ronda']
     search_fields = ['torneo__nombre', 'equipo1__nombre', 'equipo2__nombre']
     ordering = ['torneo', 'ronda', 'numero_partido']
+    list_select_related = ['torneo', 'equipo1', 'equipo2', 'ganador']
+    show_full_result_count = False
+    autocomplete_fields = ['torneo', 'equipo1', 'equipo2', 'ganador']
+    raw_id_fields = ['partido_anterior_equipo1', 'partido_anterior_equipo2', 'siguiente']
     
     fieldsets = (
         ('Información del Partido', {
@@ -128,7 +239,7 @@ class PartidoAdmin(admin.ModelAdmin):
             'fields': ('resultado_equipo1', 'resultado_equipo2', 'ganador', 'estado')
         }),
         ('Referencias', {
-            'fields': ('partido_anterior_equipo1', 'partido_anterior_equipo2', 'observaciones'),
+            'fields': ('siguiente', 'partido_anterior_equipo1', 'partido_anterior_equipo2', 'observaciones'),
             'classes': ('collapse',)
         }),
     )
@@ -0,0 +1,282 @@
+"""
+API JSON de solo lectura (/api/v1/) para la app móvil y las pantallas de kiosco.
+
+- Cada recurso declara sus campos públicos ({nombre: lookup del ORM}) y se
+  consulta con values() solo de los campos pedidos (?campos=id,inicio,...).
+- Los listados se paginan por cursor (?cursor=...&limite=50): el cursor es
+  el orden de la última fila, así que cada página es una consulta por índice
+  sin OFFSET y no se corre si se agregan filas.
+- El ETag sale de las versiones de la caché compartida (reservas, catalogo,
+  torneos) y de la URL: un GET condicional sin cambios responde 304 sin
+  consultar la base. Las respuestas se comprimen con gzip.
+"""
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.db.models import Q
+from django.utils import timezone
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_GET
+from datetime import date, datetime, time, timedelta
+from functools import wraps
+from . import catalogo
+from .disponibilidad import apertura_del_dia, cierre_del_dia, franjas_horarias, ocupacion_por_dia, DURACION_FRANJA
+from .models import Cancha, Partido, Reserva, Torneo
+from .versiones import obtener_version
+import base64
+import hashlib
+import json
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 200
+
+CAMPOS_RESERVA = {
+    'id': 'id',
+    'cliente_id': 'cliente_id',
+    'cancha_id': 'cancha_id',
+    'cancha': 'cancha__nombre',
+    'torneo_id': 'torneo_id',
+    'serie_id': 'serie_id',
+    'inicio': 'fecha_hora_inicio',
+    'fin': 'fecha_hora_fin',
+    'estado': 'estado',
+}
+
+CAMPOS_CANCHA = {
+    'id': 'id',
+    'nombre': 'nombre',
+    'tipo_cancha_id': 'tipo_cancha_id',
+    'tipo_cancha': 'tipo_cancha__nombre',
+    'precio_por_hora': 'precio_por_hora',
+    'capacidad_personas': 'capacidad_personas',
+    'activa': 'activa',
+}
+
+CAMPOS_TORNEO = {
+    'id': 'id',
+    'nombre': 'nombre',
+    'fecha_inicio': 'fecha_inicio',
+    'fecha_fin': 'fecha_fin',
+    'estado': 'estado',
+    'costo_inscripcion': 'costo_inscripcion',
+    'premio': 'premio',
+    'total_rondas': 'total_rondas',
+}
+
+CAMPOS_PARTIDO = {
+    'id': 'id',
+    'ronda': 'ronda',
+    'numero_partido': 'numero_partido',
+    'equipo1_id': 'equipo1_id',
+    'equipo1': 'equipo1__nombre',
+    'equipo2_id': 'equipo2_id',
+    'equipo2': 'equipo2__nombre',
+    'resultado_equipo1': 'resultado_equipo1',
+    'resultado_equipo2': 'resultado_equipo2',
+    'ganador_id': 'ganador_id',
+    'estado': 'estado',
+    'fecha_hora': 'fecha_hora',
+    'siguiente_id': 'siguiente_id',
+}
+
+
+class ErrorDeParametros(ValueError):
+    pass
+
+
+def _error(mensaje, status=400):
+    return JsonResponse({'error': mensaje}, status=status)
+
+
+def _etag_por_versiones(*nombres):
+    """ETag de las versiones de datos y la URL completa (con los parámetros)"""
+    def etag(request, *args, **kwargs):
+        versiones = ':'.join(str(obtener_version(nombre)) for nombre in nombres)
+        return hashlib.md5(f'{versiones}:{request.get_full_path()}'.encode()).hexdigest()
+    return etag
+
+
+def endpoint(*versiones):
+    """GET, gzip, ETag por versiones y los errores de parámetros como 400"""
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            try:
+                return vista(request, *args, **kwargs)
+            except ErrorDeParametros as error:
+                return _error(str(error))
+        return require_GET(gzip_page(condition(etag_func=_etag_por_versiones(*versiones))(envoltura)))
+    return decorador
+
+
+def _campos(request, disponibles):
+    """Campos pedidos en ?campos= (todos si no se indica) validados contra los disponibles"""
+    pedidos = [campo for campo in request.GET.get('campos', '').split(',') if campo]
+    desconocidos = [campo for campo in pedidos if campo not in disponibles]
+    if desconocidos:
+        raise ErrorDeParametros(f'Campos desconocidos: {", ".join(desconocidos)}.')
+    return pedidos or list(disponibles)
+
+
+def _proyectar(filas, campos, disponibles):
+    """Renombra las claves de values() a los nombres públicos"""
+    return [{campo: fila[disponibles[campo]] for campo in campos} for fila in filas]
+
+
+def _codificar_cursor(valores):
+    texto = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in valores])
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor, modelo, orden):
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(valores, list) or len(valores) != len(orden):
+            raise ValueError
+        return [
+            modelo._meta.get_field(campo).to_python(valor) if valor is not None else None
+            for campo, valor in zip(orden, valores)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        raise ErrorDeParametros('Cursor inválido.')
+
+
+def paginar(request, queryset, orden, campos, disponibles):
+    """
+    Página de values() ordenada por `orden` (el último campo debe ser único,
+    normalmente 'id'), a partir del cursor de la página anterior.
+    Retorna {'resultados': [...], 'siguiente': cursor o None}.
+    """
+    try:
+        limite = min(int(request.GET.get('limite', LIMITE_POR_DEFECTO)), LIMITE_MAXIMO)
+    except ValueError:
+        raise ErrorDeParametros('limite debe ser un número.')
+    if limite < 1:
+        raise ErrorDeParametros('limite debe ser mayor a cero.')
+
+    if request.GET.get('cursor'):
+        valores = _decodificar_cursor(request.GET['cursor'], queryset.model, orden)
+        # (a, b) > (va, vb)  <=>  a > va  o  (a = va y b > vb)
+        posterior = Q()
+        for i, campo in enumerate(orden):
+            posterior |= Q(**{campo: valor for campo, valor in zip(orden[:i], valores[:i])},
+                           **{f'{campo}__gt': valores[i]})
+        queryset = queryset.filter(posterior)
+
+    lookups = list(dict.fromkeys([disponibles[campo] for campo in campos] + list(orden)))
+    filas = list(queryset.order_by(*orden).values(*lookups)[:limite + 1])
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = _codificar_cursor([filas[-1][campo] for campo in orden])
+    return {'resultados': _proyectar(filas, campos, disponibles), 'siguiente': siguiente}
+
+
+def _fecha(request, parametro):
+    if not request.GET.get(parametro):
+        return None
+    try:
+        return date.fromisoformat(request.GET[parametro])
+    except ValueError:
+        raise ErrorDeParametros(f'{parametro} debe tener el formato AAAA-MM-DD.')
+
+
+def _id(request, parametro):
+    if not request.GET.get(parametro):
+        return None
+    if not request.GET[parametro].isdigit():
+        raise ErrorDeParametros(f'{parametro} debe ser un id.')
+    return int(request.GET[parametro])
+
+
+@endpoint('reservas', 'catalogo')
+def reservas(request):
+    """Reservas ordenadas por inicio. Filtros: desde, hasta (fechas), cancha, cliente, torneo y estado."""
+    campos = _campos(request, CAMPOS_RESERVA)
+    queryset = Reserva.objects.all()
+    desde, hasta = _fecha(request, 'desde'), _fecha(request, 'hasta')
+    if desde:
+        queryset = queryset.filter(fecha_hora_inicio__gte=timezone.make_aware(datetime.combine(desde, time.min)))
+    if hasta:
+        queryset = queryset.filter(
+            fecha_hora_inicio__lt=timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+        )
+    for parametro in ('cancha', 'cliente', 'torneo'):
+        valor = _id(request, parametro)
+        if valor is not None:
+            queryset = queryset.filter(**{f'{parametro}_id': valor})
+    if request.GET.get('estado'):
+        queryset = queryset.filter(estado=request.GET['estado'])
+    return JsonResponse(paginar(request, queryset, ('fecha_hora_inicio', 'id'), campos, CAMPOS_RESERVA))
+
+
+@endpoint('catalogo')
+def canchas(request):
+    """Canchas ordenadas por id. Filtros: activa (true/false) y tipo_cancha."""
+    campos = _campos(request, CAMPOS_CANCHA)
+    queryset = Cancha.objects.all()
+    if request.GET.get('activa') in ('true', 'false'):
+        queryset = queryset.filter(activa=request.GET['activa'] == 'true')
+    tipo_cancha = _id(request, 'tipo_cancha')
+    if tipo_cancha is not None:
+        queryset = queryset.filter(tipo_cancha_id=tipo_cancha)
+    return JsonResponse(paginar(request, queryset, ('id',), campos, CAMPOS_CANCHA))
+
+
+@endpoint('reservas', 'catalogo')
+def disponibilidad(request):
+    """
+    Franjas libres y ocupadas de las canchas activas en una fecha (?fecha=,
+    hoy por defecto; ?cancha= para una sola). Usa la ocupación cacheada de la
+    agenda y las canchas del catálogo; no expone datos de los clientes.
+    """
+    fecha = _fecha(request, 'fecha') or timezone.localdate()
+    cancha_id = _id(request, 'cancha')
+    canchas_activas = catalogo.canchas(activas=True)
+    if cancha_id is not None:
+        canchas_activas = [cancha for cancha in canchas_activas if cancha.id == cancha_id]
+        if not canchas_activas:
+            return _error('La cancha no existe o no está activa.', status=404)
+
+    ocupacion = ocupacion_por_dia([fecha])[fecha]
+    franjas = franjas_horarias()
+    apertura = timezone.localtime(apertura_del_dia(fecha))
+    horarios = [(apertura + i * DURACION_FRANJA).strftime('%H:%M') for i in range(len(franjas) + 1)]
+    resultado = []
+    for cancha in canchas_activas:
+        celdas = ocupacion.get(cancha.id) or [None] * len(franjas)
+        resultado.append({
+            'cancha_id': cancha.id,
+            'cancha': cancha.nombre,
+            'franjas': [
+                {'inicio': horarios[i], 'fin': horarios[i + 1], 'libre': celda is None}
+                for i, celda in enumerate(celdas)
+            ],
+        })
+    return JsonResponse({
+        'fecha': fecha,
+        'apertura': apertura,
+        'cierre': timezone.localtime(cierre_del_dia(fecha)),
+        'canchas': resultado,
+    })
+
+
+@endpoint('torneos')
+def torneos(request):
+    """Torneos ordenados por fecha de inicio. Filtros: estado."""
+    campos = _campos(request, CAMPOS_TORNEO)
+    queryset = Torneo.objects.all()
+    if request.GET.get('estado'):
+        queryset = queryset.filter(estado=request.GET['estado'])
+    return JsonResponse(paginar(request, queryset, ('fecha_inicio', 'id'), campos, CAMPOS_TORNEO))
+
+
+@endpoint('torneos')
+def fixture(request, pk):
+    """Partidos del torneo por ronda y número, con los nombres de los equipos"""
+    torneo = get_object_or_404(Torneo.objects.values('id', 'nombre', 'estado', 'total_rondas'), pk=pk)
+    campos = _campos(request, CAMPOS_PARTIDO)
+    partidos = Partido.objects.filter(torneo_id=pk).order_by('ronda', 'numero_partido').values(
+        *dict.fromkeys(CAMPOS_PARTIDO[campo] for campo in campos)
+    )
+    return JsonResponse({'torneo': torneo, 'partidos': _proyectar(partidos, campos, CAMPOS_PARTIDO)})
@@ -0,0 +1,71 @@
+"""
+Catálogo de canchas, tipos de cancha y servicios en memoria de cada proceso.
+
+Cambian muy poco pero casi todo los lee (precios, validación, formularios y
+reportes). Cada proceso carga el catálogo completo una vez, con tres consultas,
+y lo guarda junto con la versión 'catalogo' de la caché compartida. Las señales
+de Cancha, TipoCancha y Servicio incrementan la versión y cada proceso recarga
+el catálogo en la próxima lectura, igual que la tabla de reglas de precio.
+
+Las instancias se comparten entre requests: son de solo lectura. Para
+modificar una cancha o un servicio hay que leerlo de la base.
+"""
+from .models import Cancha, Servicio, TipoCancha
+from .versiones import obtener_version
+import threading
+
+_lock = threading.Lock()
+_cargado = {'version': None, 'tipos': {}, 'canchas': {}, 'servicios': {}}
+
+
+def _cargar():
+    tipos = TipoCancha.objects.in_bulk()
+    canchas = Cancha.objects.in_bulk()
+    for cancha in canchas.values():
+        cancha.tipo_cancha = tipos[cancha.tipo_cancha_id]
+    return {'tipos': tipos, 'canchas': canchas, 'servicios': Servicio.objects.in_bulk()}
+
+
+def catalogo():
+    """{'tipos', 'canchas', 'servicios'}: dicts por id, recargados si cambió la versión"""
+    version = obtener_version('catalogo')
+    if _cargado['version'] != version:
+        with _lock:
+            if _cargado['version'] != version:
+                _cargado.update(_cargar(), version=version)
+    return _cargado
+
+
+def cancha(pk):
+    """La cancha (con su tipo cargado) o None si no existe"""
+    return catalogo()['canchas'].get(int(pk))
+
+
+def servicio(pk):
+    return catalogo()['servicios'].get(int(pk))
+
+
+def servicios(pks):
+    """Los servicios de los ids dados que existen, en el orden del catálogo"""
+    pks = {int(pk) for pk in pks}
+    return [servicio for servicio in lista_servicios() if servicio.pk in pks]
+
+
+def canchas(activas=False, tipo_cancha_id=None):
+    """Canchas ordenadas por nombre (opcionalmente solo activas o de un tipo)"""
+    resultado = sorted(catalogo()['canchas'].values(), key=lambda c: (c.nombre, c.pk))
+    if activas:
+        resultado = [c for c in resultado if c.activa]
+    if tipo_cancha_id:
+        resultado = [c for c in resultado if c.tipo_cancha_id == int(tipo_cancha_id)]
+    return resultado
+
+
+def lista_servicios(activos=False):
+    """Servicios ordenados por nombre (opcionalmente solo activos)"""
+    resultado = sorted(catalogo()['servicios'].values(), key=lambda s: (s.nombre, s.pk))
+    return [s for s in resultado if s.activo] if activos else resultado
+
+
+def tipos_cancha():
+    return sorted(catalogo()['tipos'].values(), key=lambda t: (t.nombre, t.pk))
@@ -0,0 +1,42 @@
+"""
+Montos de dinero como Decimal con dos decimales.
+
+Todos los importes (precios, costos, pagos y totales de reportes) se calculan
+con estas funciones para no pasar por float: los float acumulan error al
+sumar y las conversiones Decimal(str(float)) agregan costo en los reportes.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+CENTAVOS = Decimal('0.01')
+CERO = Decimal('0.00')
+
+
+def dinero(valor):
+    """Convierte valor (Decimal, int o str) a un monto redondeado al centavo"""
+    if isinstance(valor, float):
+        raise TypeError('Los montos no se calculan con float; usar Decimal o str.')
+    if valor is None:
+        return CERO
+    return Decimal(valor).quantize(CENTAVOS, ROUND_HALF_UP)
+
+
+def horas(duracion):
+    """Duración (timedelta) en horas, exacta como Decimal"""
+    if duracion is None:
+        return Decimal(0)
+    return Decimal(duracion.days * 86400 + duracion.seconds) / 3600
+
+
+def costo_por_tiempo(precio_por_hora, inicio, fin):
+    """Precio por hora por la duración entre inicio y fin, al centavo"""
+    return dinero(precio_por_hora * horas(fin - inicio))
+
+
+def sumar(montos):
+    """Suma de montos Decimal (nunca float)"""
+    return sum(montos, CERO)
+
+
+def formatear(monto):
+    """Monto con separador de miles para mensajes y PDF: $12,345.60"""
+    return f'${dinero(monto):,.2f}'
@@ -0,0 +1,225 @@
+"""
+Disponibilidad de canchas.
+
+- Grilla de ocupación por franjas de una hora entre HORA_APERTURA y HORA_CIERRE.
+  Se arma con una sola consulta sin importar la cantidad de canchas o de días:
+  un único rango de reservas que se reparte en las franjas en Python (las
+  canchas activas salen del catálogo). La ocupación de cada día se cachea por
+  separado.
+- Búsqueda de los horarios libres más cercanos a uno pedido, en todas las
+  canchas a la vez, a partir de los intervalos libres de cada cancha en el día.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from datetime import datetime, timedelta
+from . import catalogo
+from .models import (
+    Reserva, HORA_APERTURA, HORA_CIERRE, DURACION_MINIMA_RESERVA, DURACION_MAXIMA_RESERVA,
+)
+from .versiones import obtener_version
+import heapq
+import math
+
+DURACION_FRANJA = timedelta(hours=1)
+# Los horarios sugeridos empiezan en múltiplos de este paso desde la apertura
+PASO_BUSQUEDA = timedelta(minutes=30)
+ESTADOS_OCUPADOS = ['PENDIENTE', 'PAGADA']
+
+
+def franjas_horarias():
+    """Horas de inicio de cada franja del día: [08:00, 09:00, ..., 22:00]"""
+    franjas = []
+    hora = datetime.combine(datetime.min, HORA_APERTURA)
+    cierre = datetime.combine(datetime.min, HORA_CIERRE)
+    while hora + DURACION_FRANJA <= cierre:
+        franjas.append(hora.time())
+        hora += DURACION_FRANJA
+    return franjas
+
+
+def apertura_del_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, HORA_APERTURA))
+
+
+def cierre_del_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, HORA_CIERRE))
+
+
+def ocupacion_por_dia(fechas):
+    """
+    Retorna {fecha: {cancha_id: [celda o None por franja]}}.
+
+    Cada celda ocupada es un dict con reserva_id, estado, cliente, inicio y fin.
+    Los días que no están en caché se calculan con una sola consulta.
+    """
+    version = obtener_version('reservas')
+    claves = {fecha: f'ocupacion:{version}:{fecha.isoformat()}' for fecha in fechas}
+    cacheadas = cache.get_many(claves.values())
+    ocupacion = {fecha: cacheadas[clave] for fecha, clave in claves.items() if clave in cacheadas}
+
+    faltantes = sorted(set(fechas) - set(ocupacion))
+    if faltantes:
+        calculadas = _calcular_ocupacion(faltantes)
+        cache.set_many(
+            {claves[fecha]: datos for fecha, datos in calculadas.items()},
+            getattr(settings, 'OCUPACION_CACHE_SEGUNDOS', 300),
+        )
+        ocupacion.update(calculadas)
+    return ocupacion
+
+
+def _calcular_ocupacion(fechas):
+    cantidad_franjas = len(franjas_horarias())
+    ocupacion = {fecha: {} for fecha in fechas}
+
+    reservas = Reserva.objects.filter(
+        estado__in=ESTADOS_OCUPADOS,
+        fecha_hora_inicio__lt=cierre_del_dia(fechas[-1]),
+        fecha_hora_fin__gt=apertura_del_dia(fechas[0]),
+    ).order_by().values(
+        'id', 'cancha_id', 'estado', 'fecha_hora_inicio', 'fecha_hora_fin',
+        'cliente__nombre', 'cliente__apellido',
+    )
+
+    for reserva in reservas:
+        inicio = timezone.localtime(reserva['fecha_hora_inicio'])
+        fin = timezone.localtime(reserva['fecha_hora_fin'])
+        celda = {
+            'reserva_id': reserva['id'],
+            'estado': reserva['estado'],
+            'cliente': f"{reserva['cliente__nombre']} {reserva['cliente__apellido']}",
+            'inicio': inicio.strftime('%H:%M'),
+            'fin': fin.strftime('%H:%M'),
+        }
+
+        fecha = inicio.date()
+        while fecha <= fin.date():
+            if fecha in ocupacion:
+                apertura = apertura_del_dia(fecha)
+                primera = max(0, math.floor((inicio - apertura) / DURACION_FRANJA))
+                ultima = min(cantidad_franjas, math.ceil((fin - apertura) / DURACION_FRANJA))
+                celdas = ocupacion[fecha].setdefault(reserva['cancha_id'], [None] * cantidad_franjas)
+                for indice in range(primera, ultima):
+                    celdas[indice] = celda
+            fecha += timedelta(days=1)
+
+    return ocupacion
+
+
+def grilla_ocupacion(fecha_inicio, dias=1):
+    """
+    Grilla de canchas activas x franjas para `dias` días desde `fecha_inicio`.
+
+    Retorna {'franjas': [...], 'dias': [{'fecha', 'filas': [{'cancha', 'celdas', 'libres'}]}]}.
+    """
+    franjas = franjas_horarias()
+    fechas = [fecha_inicio + timedelta(days=i) for i in range(dias)]
+    canchas = catalogo.canchas(activas=True)
+    ocupacion = ocupacion_por_dia(fechas)
+
+    grilla_dias = []
+    for fecha in fechas:
+        filas = []
+        for cancha in canchas:
+            celdas = ocupacion[fecha].get(cancha.id) or [None] * len(franjas)
+            filas.append({
+                'cancha': cancha,
+                'celdas': celdas,
+                'libres': celdas.count(None),
+            })
+        grilla_dias.append({'fecha': fecha, 'filas': filas})
+
+    return {'franjas': franjas, 'dias': grilla_dias}
+
+
+def intervalos_libres(ocupados, desde, hasta):
+    """
+    Intervalos libres dentro de [desde, hasta) dados los intervalos ocupados
+    (pares inicio, fin ordenados por inicio). Los ocupados que se solapan o
+    se tocan se unen antes de calcular los huecos.
+    """
+    libres = []
+    cursor = desde
+    for inicio, fin in ocupados:
+        if fin <= cursor:
+            continue
+        if inicio >= hasta:
+            break
+        if inicio > cursor:
+            libres.append((cursor, inicio))
+        cursor = max(cursor, fin)
+    if cursor < hasta:
+        libres.append((cursor, hasta))
+    return libres
+
+
+def buscar_horarios_libres(inicio, duracion, cantidad=5, tipo_cancha_id=None, precio_maximo=None):
+    """
+    Los `cantidad` horarios libres más cercanos a `inicio` para reservar
+    `duracion` (timedelta) en cualquier cancha activa del mismo día.
+
+    Usa una consulta, las reservas del día; las canchas salen del catálogo.
+    Retorna una lista de dicts con cancha, inicio, fin y diferencia (timedelta),
+    ordenada por cercanía al horario pedido y luego por precio.
+    """
+    horas = duracion.total_seconds() / 3600
+    if not DURACION_MINIMA_RESERVA <= horas <= DURACION_MAXIMA_RESERVA:
+        raise ValidationError(
+            f'La duración debe estar entre {DURACION_MINIMA_RESERVA} y {DURACION_MAXIMA_RESERVA} horas.'
+        )
+
+    fecha = timezone.localtime(inicio).date()
+    apertura = apertura_del_dia(fecha)
+    cierre = cierre_del_dia(fecha)
+
+    # No sugerir horarios pasados: arrancar en el próximo paso a partir de ahora
+    desde = apertura
+    ahora = timezone.now()
+    if ahora > desde:
+        pasos = math.ceil((ahora - apertura) / PASO_BUSQUEDA)
+        desde = apertura + pasos * PASO_BUSQUEDA
+
+    canchas = {
+        cancha.id: cancha for cancha in catalogo.canchas(activas=True, tipo_cancha_id=tipo_cancha_id)
+        if precio_maximo is None or cancha.precio_por_hora <= precio_maximo
+    }
+    if not canchas or desde >= cierre:
+        return []
+
+    ocupados = {cancha_id: [] for cancha_id in canchas}
+    reservas = Reserva.objects.filter(
+        cancha_id__in=canchas,
+        estado__in=ESTADOS_OCUPADOS,
+        fecha_hora_inicio__lt=cierre,
+        fecha_hora_fin__gt=apertura,
+    ).order_by('cancha_id', 'fecha_hora_inicio').values_list('cancha_id', 'fecha_hora_inicio', 'fecha_hora_fin')
+    for cancha_id, reserva_inicio, reserva_fin in reservas:
+        ocupados[cancha_id].append((reserva_inicio, reserva_fin))
+
+    candidatos = []
+    for cancha_id, cancha in canchas.items():
+        for libre_inicio, libre_fin in intervalos_libres(ocupados[cancha_id], desde, cierre):
+            ultimo_inicio = libre_fin - duracion
+            if ultimo_inicio < libre_inicio:
+                continue
+            # El horario pedido (o el más cercano dentro del hueco) y los inicios alineados al paso
+            inicios = {min(max(inicio, libre_inicio), ultimo_inicio)}
+            paso = apertura + math.ceil((libre_inicio - apertura) / PASO_BUSQUEDA) * PASO_BUSQUEDA
+            while paso <= ultimo_inicio:
+                inicios.add(paso)
+                paso += PASO_BUSQUEDA
+            for candidato in inicios:
+                candidatos.append((abs(candidato - inicio), cancha.precio_por_hora, cancha.nombre, candidato, cancha))
+
+    mejores = heapq.nsmallest(cantidad, candidatos, key=lambda c: c[:4])
+    return [
+        {
+            'cancha': cancha,
+            'inicio': candidato,
+            'fin': candidato + duracion,
+            'diferencia': diferencia,
+        }
+        for diferencia, _, _, candidato, cancha in mejores
+    ]
@@ -0,0 +1,153 @@
+"""
+Estadísticas desnormalizadas por cliente (EstadisticasCliente).
+
+Cada cambio de estado de una reserva o de un pago aplica su diferencia con un
+update() sobre la fila del cliente (F() + n, sin leerla antes). Si la fila no
+existe todavía se recalcula desde las reservas, que ya tienen el estado nuevo.
+recalcular_estadisticas() reconstruye todo con dos consultas agregadas; se usa
+después de cargas masivas y desde el comando recalcular_estadisticas.
+"""
+from django.db.models import Count, F, Max, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from collections import Counter
+from decimal import Decimal
+from .dinero import CERO, dinero
+from .models import Cliente, EstadisticasCliente, Pago, Reserva
+
+
+def _cambios(ultima_visita=None, **diferencias):
+    cambios = {campo: F(campo) + valor for campo, valor in diferencias.items() if valor}
+    if ultima_visita is not None:
+        cambios['ultima_visita'] = Greatest(Coalesce('ultima_visita', Value(ultima_visita)), Value(ultima_visita))
+    if cambios:
+        cambios['fecha_actualizacion'] = timezone.now()
+    return cambios
+
+
+def _aplicar(cliente_id, ultima_visita=None, **diferencias):
+    cambios = _cambios(ultima_visita, **diferencias)
+    if cambios and not EstadisticasCliente.objects.filter(cliente_id=cliente_id).update(**cambios):
+        recalcular_estadisticas([cliente_id])
+
+
+def registrar_cambio_reserva(reserva, estado_anterior=None):
+    """Aplica el paso de una reserva de estado_anterior (None si es nueva) a su estado actual"""
+    estado = reserva.estado
+    if estado == estado_anterior:
+        return
+    diferencias = Counter()
+    if estado_anterior is None:
+        diferencias['total_reservas'] += 1
+    if estado == 'PAGADA':
+        diferencias['reservas_pagadas'] += 1
+    if estado_anterior == 'PAGADA':
+        diferencias['reservas_pagadas'] -= 1
+    if estado == 'CANCELADA':
+        diferencias['reservas_canceladas'] += 1
+    if estado_anterior == 'CANCELADA':
+        diferencias['reservas_canceladas'] -= 1
+
+    if estado_anterior == 'PAGADA':
+        # La última visita puede haber sido esta: se vuelve a calcular para el cliente
+        _aplicar(reserva.cliente_id, **diferencias)
+        EstadisticasCliente.objects.filter(cliente_id=reserva.cliente_id).update(
+            ultima_visita=Subquery(
+                Reserva.objects.filter(cliente_id=reserva.cliente_id, estado='PAGADA')
+                .order_by().values('cliente_id').annotate(ultima=Max('fecha_hora_inicio')).values('ultima')
+            )
+        )
+        return
+    _aplicar(reserva.cliente_id, ultima_visita=reserva.fecha_hora_inicio if estado == 'PAGADA' else None,
+             **diferencias)
+
+
+def registrar_cambio_pago(pago, estado_anterior=None, monto_anterior=None):
+    """Suma o resta el monto del pago al total gastado cuando entra o sale de PAGADO"""
+    gastado = CERO
+    if pago.estado == 'PAGADO':
+        gastado += dinero(pago.monto_total)
+    if estado_anterior == 'PAGADO':
+        gastado -= dinero(pago.monto_total if monto_anterior is None else monto_anterior)
+    if gastado:
+        _aplicar(pago.reserva.cliente_id, total_gastado=gastado)
+
+
+def registrar_reservas_nuevas(cantidades):
+    """Reservas pendientes creadas en bloque: {cliente_id: cantidad}"""
+    for cliente_id, cantidad in cantidades.items():
+        _aplicar(cliente_id, total_reservas=cantidad)
+
+
+def registrar_cancelaciones(cantidades):
+    """Reservas pendientes canceladas en bloque: {cliente_id: cantidad}"""
+    for cliente_id, cantidad in cantidades.items():
+        _aplicar(cliente_id, reservas_canceladas=cantidad)
+
+
+def registrar_baja_reserva(reserva):
+    """
+    Descuenta una reserva borrada. Solo actualiza filas existentes: si se está
+    borrando el cliente, su fila se borra con él.
+    """
+    cambios = _cambios(
+        total_reservas=-1,
+        reservas_pagadas=-1 if reserva.estado == 'PAGADA' else 0,
+        reservas_canceladas=-1 if reserva.estado == 'CANCELADA' else 0,
+    )
+    EstadisticasCliente.objects.filter(cliente_id=reserva.cliente_id).update(**cambios)
+
+
+def registrar_baja_pago(pago):
+    """Descuenta del total gastado un pago PAGADO que se borra"""
+    if pago.estado == 'PAGADO':
+        EstadisticasCliente.objects.filter(cliente__reservas=pago.reserva_id).update(
+            **_cambios(total_gastado=-dinero(pago.monto_total))
+        )
+
+
+def recalcular_estadisticas(cliente_ids=None):
+    """Reconstruye las estadísticas (de todos los clientes o de los indicados). Retorna cuántas filas escribió."""
+    clientes = Cliente.objects.all()
+    reservas = Reserva.objects.all()
+    pagos = Pago.objects.filter(estado='PAGADO')
+    if cliente_ids is not None:
+        clientes = clientes.filter(pk__in=cliente_ids)
+        reservas = reservas.filter(cliente_id__in=cliente_ids)
+        pagos = pagos.filter(reserva__cliente_id__in=cliente_ids)
+
+    por_cliente = {
+        fila['cliente_id']: fila
+        for fila in reservas.order_by().values('cliente_id').annotate(
+            total=Count('pk'),
+            pagadas=Count('pk', filter=Q(estado='PAGADA')),
+            canceladas=Count('pk', filter=Q(estado='CANCELADA')),
+            ultima=Max('fecha_hora_inicio', filter=Q(estado='PAGADA')),
+        )
+    }
+    gastado = dict(
+        pagos.order_by().values_list('reserva__cliente_id').annotate(total=Sum('monto_total'))
+    )
+
+    ahora = timezone.now()
+    filas = []
+    for cliente_id in clientes.values_list('pk', flat=True):
+        datos = por_cliente.get(cliente_id, {})
+        filas.append(EstadisticasCliente(
+            cliente_id=cliente_id,
+            total_reservas=datos.get('total', 0),
+            reservas_pagadas=datos.get('pagadas', 0),
+            reservas_canceladas=datos.get('canceladas', 0),
+            total_gastado=gastado.get(cliente_id) or Decimal('0'),
+            ultima_visita=datos.get('ultima'),
+            fecha_actualizacion=ahora,
+        ))
+    EstadisticasCliente.objects.bulk_create(
+        filas,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['cliente'],
+        update_fields=['total_reservas', 'reservas_pagadas', 'reservas_canceladas',
+                       'total_gastado', 'ultima_visita', 'fecha_actualizacion'],
+    )
+    return len(filas)
@@ -0,0 +1,264 @@
+"""
+Eventos en vivo de ocupación de canchas (server-sent events).
+
+Cada cancha y día es un canal ('<cancha_id>:<AAAA-MM-DD>'). Las señales de
+Reserva y los caminos en bloque (series, lista de espera, vencimiento)
+publican, después del commit, un evento 'ocupada' cuando una reserva pasa a
+ocupar un horario y 'liberada' cuando lo deja (cancelación, borrado o cambio
+de horario). La vista reserva_eventos abre un flujo SSE con el estado inicial
+del día y después solo esos deltas, y el formulario de reservas los aplica
+sobre las reservas que ya tiene.
+
+El broker se elige con EVENTOS_BACKEND. BrokerLocal reparte los eventos en
+memoria: solo llegan a los clientes conectados al mismo proceso. Con varios
+workers hace falta un backend compartido con la misma interfaz (suscribir,
+desuscribir y publicar).
+
+Los flujos largos requieren ASGI. Con WSGI cada conexión ocupa un hilo del
+worker, así que se corta a los EVENTOS_DURACION_MAXIMA_WSGI_SEGUNDOS (20 por
+defecto) y el navegador vuelve a conectarse: funciona como una consulta
+periódica que no deja el hilo tomado.
+"""
+from asgiref.sync import sync_to_async
+from collections import deque, namedtuple
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Reserva
+import asyncio
+import json
+import threading
+import time as reloj
+
+ESTADOS_OCUPADOS = ('PENDIENTE', 'PAGADA')
+
+# Eventos sin leer por suscripción; si un cliente lento se atrasa más, se le pide recargar
+EVENTOS_MAXIMO_PENDIENTES = 500
+
+
+def canal(cancha_id, fecha):
+    return f'{cancha_id}:{fecha.isoformat()}'
+
+
+class Ocupacion(namedtuple('Ocupacion', 'id cancha_id inicio fin estado')):
+    """Lo que una reserva ocupa de su cancha, tal como se publica en los eventos"""
+
+    @classmethod
+    def de(cls, reserva):
+        """Toma los valores cargados (sin consultar campos diferidos); None si falta alguno"""
+        valores = reserva.__dict__
+        ocupacion = cls(
+            reserva.pk, valores.get('cancha_id'), valores.get('fecha_hora_inicio'),
+            valores.get('fecha_hora_fin'), valores.get('estado'),
+        )
+        if None in ocupacion or not isinstance(ocupacion.inicio, datetime) or not isinstance(ocupacion.fin, datetime):
+            return None
+        return ocupacion
+
+    @property
+    def activa(self):
+        return self.estado in ESTADOS_OCUPADOS
+
+    @property
+    def canal(self):
+        inicio = timezone.localtime(self.inicio) if timezone.is_aware(self.inicio) else self.inicio
+        return canal(self.cancha_id, inicio.date())
+
+    def datos(self):
+        return {
+            'id': self.id,
+            'cancha_id': self.cancha_id,
+            'fecha_hora_inicio': self.inicio.isoformat(),
+            'fecha_hora_fin': self.fin.isoformat(),
+            'estado': self.estado,
+        }
+
+
+class Suscripcion:
+    """Cola de eventos de un cliente conectado. Se entrega desde cualquier hilo."""
+
+    def __init__(self, canales):
+        self.canales = frozenset(canales)
+        self._eventos = deque()
+        self._condicion = threading.Condition()
+        self._avisos = []  # (loop, asyncio.Event) de los flujos async que esperan
+
+    def entregar(self, evento):
+        with self._condicion:
+            if len(self._eventos) >= EVENTOS_MAXIMO_PENDIENTES:
+                self._eventos.clear()
+                evento = ('recargar', {})
+            self._eventos.append(evento)
+            self._condicion.notify_all()
+            avisos = list(self._avisos)
+        for loop, aviso in avisos:
+            loop.call_soon_threadsafe(aviso.set)
+
+    def _tomar(self):
+        eventos = list(self._eventos)
+        self._eventos.clear()
+        return eventos
+
+    def esperar(self, timeout):
+        """Eventos pendientes; bloquea el hilo hasta timeout segundos si no hay ninguno"""
+        with self._condicion:
+            if not self._eventos:
+                self._condicion.wait(timeout)
+            return self._tomar()
+
+    async def aesperar(self, timeout):
+        """Como esperar(), sin bloquear el event loop"""
+        aviso = (asyncio.get_running_loop(), asyncio.Event())
+        with self._condicion:
+            if self._eventos:
+                return self._tomar()
+            self._avisos.append(aviso)
+        try:
+            await asyncio.wait_for(aviso[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._condicion:
+                self._avisos.remove(aviso)
+        with self._condicion:
+            return self._tomar()
+
+
+class BrokerLocal:
+    """Reparte los eventos entre las suscripciones del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscripciones = {}  # canal -> set de Suscripcion
+
+    def suscribir(self, canales):
+        suscripcion = Suscripcion(canales)
+        with self._lock:
+            for nombre in suscripcion.canales:
+                self._suscripciones.setdefault(nombre, set()).add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion):
+        with self._lock:
+            for nombre in suscripcion.canales:
+                suscripciones = self._suscripciones.get(nombre)
+                if suscripciones is not None:
+                    suscripciones.discard(suscripcion)
+                    if not suscripciones:
+                        del self._suscripciones[nombre]
+
+    def publicar(self, nombre, evento):
+        with self._lock:
+            suscripciones = list(self._suscripciones.get(nombre, ()))
+        for suscripcion in suscripciones:
+            suscripcion.entregar(evento)
+
+
+_broker = None
+_lock = threading.Lock()
+
+
+def obtener_broker():
+    global _broker
+    with _lock:
+        if _broker is None:
+            _broker = import_string(getattr(settings, 'EVENTOS_BACKEND', 'reservas.eventos.BrokerLocal'))()
+        return _broker
+
+
+def publicar_cambio(antes, despues):
+    """
+    Publica lo que cambió entre dos Ocupacion de la misma reserva (None si no
+    se conoce). Un 'liberada' de más es inofensivo: el cliente lo ignora si no
+    tiene la reserva.
+    """
+    if antes == despues:
+        return
+    broker = obtener_broker()
+    if antes is not None and antes.activa and not (despues is not None and despues.activa and despues.canal == antes.canal):
+        broker.publicar(antes.canal, ('liberada', {'id': antes.id, 'cancha_id': antes.cancha_id}))
+    if despues is None:
+        return
+    if despues.activa:
+        broker.publicar(despues.canal, ('ocupada', despues.datos()))
+    elif antes is None:
+        broker.publicar(despues.canal, ('liberada', {'id': despues.id, 'cancha_id': despues.cancha_id}))
+
+
+def publicar_ocupadas(reservas):
+    """Para las reservas creadas con bulk_create, que no disparan señales"""
+    ocupaciones = [Ocupacion.de(reserva) for reserva in reservas]
+    transaction.on_commit(lambda: [publicar_cambio(None, ocupacion) for ocupacion in ocupaciones if ocupacion])
+
+
+def publicar_liberadas(filas):
+    """Para las reservas canceladas con update(): filas (id, cancha_id, inicio, fin)"""
+    ocupaciones = [Ocupacion(*fila, 'PENDIENTE') for fila in filas]
+    transaction.on_commit(lambda: [publicar_cambio(ocupacion, None) for ocupacion in ocupaciones])
+
+
+def estado_del_dia(cancha_ids, fecha):
+    """Reservas activas del día en esas canchas: el evento inicial de cada flujo"""
+    desde = timezone.make_aware(datetime.combine(fecha, time.min))
+    reservas = Reserva.objects.filter(
+        cancha_id__in=cancha_ids,
+        estado__in=ESTADOS_OCUPADOS,
+        fecha_hora_inicio__gte=desde,
+        fecha_hora_inicio__lt=desde + timedelta(days=1),
+    ).values_list('id', 'cancha_id', 'fecha_hora_inicio', 'fecha_hora_fin', 'estado')
+    return {
+        'fecha': fecha.isoformat(),
+        'canchas': list(cancha_ids),
+        'reservas': [Ocupacion(*fila).datos() for fila in reservas],
+    }
+
+
+def formatear(evento, datos):
+    return f'event: {evento}\ndata: {json.dumps(datos)}\n\n'
+
+
+def _inicio_flujo():
+    # El navegador reintenta a los 3 segundos si se corta la conexión
+    return 'retry: 3000\n\n'
+
+
+def _texto(eventos):
+    return ''.join(formatear(*evento) for evento in eventos) or ': ping\n\n'
+
+
+def _tiempos(duracion_maxima):
+    return getattr(settings, 'EVENTOS_KEEPALIVE_SEGUNDOS', 15), reloj.monotonic() + duracion_maxima
+
+
+def flujo(cancha_ids, fecha):
+    """
+    Flujo SSE para WSGI: ocupa un hilo del servidor mientras el cliente está
+    conectado, por eso se corta a los EVENTOS_DURACION_MAXIMA_WSGI_SEGUNDOS (el
+    navegador se reconecta solo).
+    """
+    broker = obtener_broker()
+    suscripcion = broker.suscribir(canal(cancha_id, fecha) for cancha_id in cancha_ids)
+    try:
+        yield _inicio_flujo()
+        yield formatear('estado', estado_del_dia(cancha_ids, fecha))
+        keepalive, fin = _tiempos(getattr(settings, 'EVENTOS_DURACION_MAXIMA_WSGI_SEGUNDOS', 20))
+        while (restante := fin - reloj.monotonic()) > 0:
+            yield _texto(suscripcion.esperar(min(keepalive, restante)))
+    finally:
+        broker.desuscribir(suscripcion)
+
+
+async def aflujo(cancha_ids, fecha):
+    """Flujo SSE para ASGI: espera los eventos en el event loop, sin ocupar un hilo"""
+    broker = obtener_broker()
+    suscripcion = broker.suscribir(canal(cancha_id, fecha) for cancha_id in cancha_ids)
+    try:
+        yield _inicio_flujo()
+        yield formatear('estado', await sync_to_async(estado_del_dia)(cancha_ids, fecha))
+        keepalive, fin = _tiempos(getattr(settings, 'EVENTOS_DURACION_MAXIMA_SEGUNDOS', 300))
+        while (restante := fin - reloj.monotonic()) > 0:
+            yield _texto(await suscripcion.aesperar(min(keepalive, restante)))
+    finally:
+        broker.desuscribir(suscripcion)
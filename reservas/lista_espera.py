@@ -0,0 +1,99 @@
+"""
+Lista de espera de horarios ocupados.
+
+Al cancelarse (o borrarse) una reserva activa se programa, en segundo plano,
+la promoción de las esperas de esa cancha que entran en el horario liberado.
+La búsqueda usa el índice parcial (cancha, inicio, fin) de las esperas activas,
+así que solo lee las esperas de ese horario y no toda la lista.
+"""
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from collections import Counter
+from .estadisticas import registrar_reservas_nuevas
+from .eventos import publicar_ocupadas
+from .models import EsperaReserva, Pago, Reserva
+from .precios import cotizar
+from .tareas import en_segundo_plano
+from .validacion import validar_reservas
+from .versiones import incrementar_version
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def programar_promocion(reserva):
+    """Programa la promoción de la lista de espera para el horario de la reserva"""
+    en_segundo_plano(promover_esperas, reserva.cancha_id, reserva.fecha_hora_inicio, reserva.fecha_hora_fin)
+
+
+def esperas_compatibles(cancha_id, inicio, fin):
+    """Esperas activas de la cancha cuyo horario entra en [inicio, fin), por orden de llegada"""
+    return (
+        EsperaReserva.objects
+        .filter(
+            cancha_id=cancha_id,
+            estado='ESPERANDO',
+            fecha_hora_inicio__gte=max(inicio, timezone.now()),
+            fecha_hora_inicio__lt=fin,
+            fecha_hora_fin__lte=fin,
+        )
+        .select_related('cliente', 'cancha')
+        .order_by('fecha_creacion', 'id')
+    )
+
+
+def promover_esperas(cancha_id, inicio, fin):
+    """
+    Convierte en reservas pendientes las esperas que entran en el horario
+    liberado, respetando el orden de llegada: si dos esperas se solapan,
+    se promueve la primera. Las que no pasan la validación siguen esperando.
+
+    Retorna la lista de esperas promovidas.
+    """
+    with transaction.atomic():
+        esperas = list(esperas_compatibles(cancha_id, inicio, fin).select_for_update())
+        if not esperas:
+            return []
+
+        # En hora local, como llegan desde los formularios: clean() compara .time() y .date()
+        candidatas = [
+            Reserva(
+                cliente=espera.cliente, cancha=espera.cancha, estado='PENDIENTE',
+                fecha_hora_inicio=timezone.localtime(espera.fecha_hora_inicio),
+                fecha_hora_fin=timezone.localtime(espera.fecha_hora_fin),
+                observaciones='Reserva generada desde la lista de espera',
+            )
+            for espera in esperas
+        ]
+        errores = validar_reservas(candidatas)
+        promovidas = [(espera, reserva) for espera, reserva, error in zip(esperas, candidatas, errores) if error is None]
+        if not promovidas:
+            return []
+
+        reservas = Reserva.objects.bulk_create([reserva for _, reserva in promovidas])
+        # Con las reglas de precio, como una reserva hecha desde el formulario
+        prefetch_related_objects([reserva.cliente for reserva in reservas], 'estadisticas')
+        Pago.objects.bulk_create([
+            Pago(
+                reserva=reserva,
+                monto_total=cotizar(
+                    reserva.cancha, reserva.fecha_hora_inicio, reserva.fecha_hora_fin,
+                    reservas_pagadas=reserva.cliente.reservas_pagadas_registradas(),
+                )['total'],
+                estado='PENDIENTE',
+            )
+            for reserva in reservas
+        ])
+        for espera, reserva in promovidas:
+            espera.estado = 'PROMOVIDA'
+            espera.reserva = reserva
+        EsperaReserva.objects.bulk_update([espera for espera, _ in promovidas], ['estado', 'reserva'])
+        registrar_reservas_nuevas(Counter(reserva.cliente_id for reserva in reservas))
+
+    # bulk_create no dispara señales
+    incrementar_version('reservas')
+    publicar_ocupadas(reservas)
+    for espera, reserva in promovidas:
+        logger.info('Espera %s promovida a la reserva %s', espera.pk, reserva.pk)
+    return [espera for espera, _ in promovidas]
@@ -0,0 +1,160 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from reservas.management.commands.benchmark_vistas import percentil
+from reservas.models import Reserva
+import asyncio
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = ('Throughput de requests concurrentes a las mismas vistas servidas por el handler WSGI '
+            '(un hilo por request en curso, como un servidor WSGI con hilos) y por el handler ASGI '
+            '(una tarea por request en un event loop, como uvicorn). Corre en el proceso, sin red.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help='Requests por vista y por handler')
+        parser.add_argument('--concurrencia', type=int, default=8, help='Requests en curso a la vez')
+        parser.add_argument('--vista', action='append', help='Medir solo las vistas indicadas (repetible)')
+
+    def handle(self, *args, **options):
+        if not Reserva.objects.exists():
+            raise CommandError('No hay reservas. Generá un dataset con: python manage.py generar_datos')
+
+        casos = self._casos()
+        if options['vista']:
+            casos = [caso for caso in casos if caso[0] in options['vista']]
+
+        resultados = []
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for nombre, url in casos:
+                for handler, medir in (('WSGI', self._medir_wsgi), ('ASGI', self._medir_asgi)):
+                    tiempos, total = medir(nombre, url, options['requests'], options['concurrencia'])
+                    resultados.append((nombre, handler, len(tiempos) / total, tiempos))
+
+        self.stdout.write(f'\n{"Vista":<22}{"Handler":>8}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}')
+        for nombre, handler, por_segundo, tiempos in resultados:
+            self.stdout.write(
+                f'{nombre:<22}{handler:>8}{por_segundo:>10.1f}'
+                f'{percentil(tiempos, 50):>10.1f}{percentil(tiempos, 95):>10.1f}'
+            )
+
+    def _casos(self):
+        """Vistas a medir: (nombre, url). home es una vista sync, como referencia."""
+        hoy = timezone.localdate()
+        return [
+            ('home', reverse('home')),
+            ('reportes', f"{reverse('reportes')}?mes={hoy.month}&anio={hoy.year}"),
+            ('reportes_pdf', f"{reverse('reportes_pdf')}?mes={hoy.month}&anio={hoy.year}"),
+            ('api_reservas', f"{reverse('api_reservas')}?desde={hoy.isoformat()}"),
+            ('api_disponibilidad', reverse('api_disponibilidad')),
+        ]
+
+    def _medir_wsgi(self, nombre, url, cantidad, concurrencia):
+        handler = WSGIHandler()
+        pendientes = iter(range(cantidad))
+        lock = threading.Lock()
+        tiempos = []
+        errores = []
+
+        def trabajador():
+            try:
+                while True:
+                    with lock:
+                        if next(pendientes, None) is None:
+                            return
+                    estado = []
+                    environ = RequestFactory().get(url).environ
+                    inicio = time.perf_counter()
+                    respuesta = handler(environ, lambda status, headers, exc_info=None: estado.append(status))
+                    for _ in respuesta:
+                        pass
+                    respuesta.close()
+                    with lock:
+                        tiempos.append((time.perf_counter() - inicio) * 1000)
+                    if not estado[0].startswith('200'):
+                        errores.append(estado[0])
+                        return
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=trabajador) for _ in range(concurrencia)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        total = time.perf_counter() - inicio
+        if errores:
+            raise CommandError(f'{nombre} ({url}) respondió {errores[0]} con WSGI')
+        return tiempos, total
+
+    def _medir_asgi(self, nombre, url, cantidad, concurrencia):
+        # Con ASGI cada request usa su propio hilo para el código sync: sin conexiones persistentes
+        default = connections['default'].settings_dict
+        conn_max_age = default['CONN_MAX_AGE']
+        default['CONN_MAX_AGE'] = 0
+        try:
+            tiempos, total, errores = asyncio.run(self._correr_asgi(url, cantidad, concurrencia))
+        finally:
+            default['CONN_MAX_AGE'] = conn_max_age
+        if errores:
+            raise CommandError(f'{nombre} ({url}) respondió {errores[0]} con ASGI')
+        return tiempos, total
+
+    async def _correr_asgi(self, url, cantidad, concurrencia):
+        handler = ASGIHandler()
+        pendientes = iter(range(cantidad))
+        tiempos = []
+        errores = []
+
+        async def trabajador():
+            while next(pendientes, None) is not None and not errores:
+                inicio = time.perf_counter()
+                estado = await self._pedir_asgi(handler, url)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                if estado != 200:
+                    errores.append(estado)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        return tiempos, time.perf_counter() - inicio, errores
+
+    async def _pedir_asgi(self, handler, url):
+        ruta, _, query = url.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': ruta,
+            'raw_path': ruta.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [(b'host', b'testserver')],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        cuerpo = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        estado = []
+
+        async def recibir():
+            if cuerpo:
+                return cuerpo.pop()
+            # Django espera una desconexión mientras arma la respuesta: el cliente nunca se va
+            await asyncio.Future()
+
+        async def enviar(mensaje):
+            if mensaje['type'] == 'http.response.start':
+                estado.append(mensaje['status'])
+
+        await handler(scope, recibir, enviar)
+        return estado[0]
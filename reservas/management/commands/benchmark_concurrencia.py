@@ -0,0 +1,127 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+from datetime import timedelta
+from pathlib import Path
+from reservas.management.commands.benchmark_vistas import percentil
+from reservas.models import Reserva, Torneo
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = ('Lectores y escritores concurrentes sobre una copia de la base SQLite, '
+            'con la configuración por defecto de Django y con el perfil de producción '
+            '(WAL, busy timeout y BEGIN IMMEDIATE). Cuenta los errores "database is locked".')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lectores', type=int, default=8, help='Hilos que leen')
+        parser.add_argument('--escritores', type=int, default=4, help='Hilos que escriben')
+        parser.add_argument('--segundos', type=float, default=5, help='Duración de cada corrida')
+        parser.add_argument('--timeout-por-defecto', type=float, default=5,
+                            help='Timeout de sqlite3 para el perfil por defecto (el default de Python es 5 s)')
+
+    def handle(self, *args, **options):
+        default = connections['default'].settings_dict
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('El benchmark de concurrencia es solo para SQLite.')
+        if not Reserva.objects.exists():
+            raise CommandError('No hay reservas. Generá un dataset con: python manage.py generar_datos')
+
+        # "por defecto" es el backend de Django sin opciones: journal DELETE, BEGIN diferido
+        # y el timeout de sqlite3
+        perfiles = [
+            ('por defecto', {'ENGINE': 'django.db.backends.sqlite3',
+                             'OPTIONS': {'timeout': options['timeout_por_defecto']}}),
+            ('producción', {}),
+        ]
+
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados = []
+            for nombre, perfil in perfiles:
+                copia = Path(directorio) / f'{len(resultados)}.sqlite3'
+                self._copiar_base(default['NAME'], copia)
+                alias = f'benchmark_concurrencia_{len(resultados)}'
+                connections.settings[alias] = {**default, 'NAME': str(copia), 'CONN_MAX_AGE': None, **perfil}
+                resultados.append((nombre, self._correr(alias, options)))
+                del connections.settings[alias]
+
+        self.stdout.write(f'\n{"Perfil":<15}{"Lecturas":>10}{"Escrituras":>12}{"Locks":>8}{"p95 escritura ms":>18}')
+        for nombre, datos in resultados:
+            self.stdout.write(
+                f'{nombre:<15}{datos["lecturas"]:>10}{datos["escrituras"]:>12}'
+                f'{datos["locks"]:>8}{datos["p95_escritura_ms"]:>18.1f}'
+            )
+
+    def _copiar_base(self, origen, destino):
+        """Copia consistente de la base (incluye lo que esté en el WAL), en modo journal DELETE"""
+        with sqlite3.connect(origen) as fuente, sqlite3.connect(destino) as copia:
+            fuente.backup(copia)
+            copia.execute('PRAGMA journal_mode = DELETE')
+
+    def _correr(self, alias, options):
+        ids_reservas = list(Reserva.objects.using(alias).values_list('pk', flat=True)[:5000])
+        ids_torneos = list(Torneo.objects.using(alias).values_list('pk', flat=True))
+        desde = timezone.now() - timedelta(days=90)
+
+        fin = time.perf_counter() + options['segundos']
+        lock = threading.Lock()
+        datos = {'lecturas': 0, 'escrituras': 0, 'locks': 0, 'tiempos_escritura': []}
+
+        def lector():
+            while time.perf_counter() < fin:
+                try:
+                    # Lectura tipo reportes: recorre un rango amplio de reservas
+                    list(Reserva.objects.using(alias)
+                         .filter(fecha_hora_inicio__gte=desde)
+                         .select_related('cliente', 'cancha')[:2000])
+                    with lock:
+                        datos['lecturas'] += 1
+                except OperationalError as error:
+                    self._registrar_error(error, datos, lock)
+
+        def escritor():
+            while time.perf_counter() < fin:
+                inicio = time.perf_counter()
+                try:
+                    # Escritura tipo reserva_crear: valida (lee) y escribe en una transacción
+                    with transaction.atomic(using=alias):
+                        reserva = Reserva.objects.using(alias).get(pk=random.choice(ids_reservas))
+                        Reserva.objects.using(alias).filter(
+                            cancha_id=reserva.cancha_id, fecha_hora_inicio__lt=reserva.fecha_hora_fin,
+                            fecha_hora_fin__gt=reserva.fecha_hora_inicio,
+                        ).exclude(pk=reserva.pk).exists()
+                        Reserva.objects.using(alias).filter(pk=reserva.pk).update(observaciones=f'benchmark {inicio}')
+                        if ids_torneos:
+                            Torneo.objects.using(alias).filter(pk=random.choice(ids_torneos)).update(activo=True)
+                    with lock:
+                        datos['escrituras'] += 1
+                        datos['tiempos_escritura'].append((time.perf_counter() - inicio) * 1000)
+                except OperationalError as error:
+                    self._registrar_error(error, datos, lock)
+
+        def ejecutar(funcion):
+            try:
+                funcion()
+            finally:
+                connections[alias].close()
+
+        hilos = [threading.Thread(target=ejecutar, args=(lector,)) for _ in range(options['lectores'])]
+        hilos += [threading.Thread(target=ejecutar, args=(escritor,)) for _ in range(options['escritores'])]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        connections[alias].close()
+
+        datos['p95_escritura_ms'] = percentil(datos.pop('tiempos_escritura') or [0], 95)
+        return datos
+
+    def _registrar_error(self, error, datos, lock):
+        if 'locked' not in str(error):
+            raise error
+        with lock:
+            datos['locks'] += 1
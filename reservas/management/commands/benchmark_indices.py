@@ -0,0 +1,114 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from datetime import timedelta
+from reservas.models import Cliente, Reserva, Torneo, Pago
+import time
+
+
+class _Rollback(Exception):
+    """Fuerza el rollback del dataset generado al terminar el benchmark"""
+
+
+class Command(BaseCommand):
+    help = ('Muestra los planes de consulta (EXPLAIN) de los filtros más usados '
+            'antes y después de los índices de la migración 0012, sobre un dataset generado')
+
+    # Índices creados por la migración 0012
+    INDICES = [
+        'reserva_estado_id_idx', 'reserva_inicio_idx', 'reserva_torneo_estado_idx',
+        'pago_estado_fecha_idx', 'pago_fecha_pago_idx',
+        'torneo_fecha_fin_idx',
+        'cliente_activo_apellido_idx',
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=500, help='Clientes a generar')
+        parser.add_argument('--canchas', type=int, default=10, help='Canchas a generar')
+        parser.add_argument('--anios', type=float, default=1, help='Años de reservas a generar')
+        parser.add_argument('--repeticiones', type=int, default=20, help='Ejecuciones por consulta para medir tiempos')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                torneo = self._generar_dataset(options)
+                consultas = self._consultas(torneo)
+
+                resultados = {}
+                for nombre, qs in consultas:
+                    resultados[nombre] = {
+                        'despues_plan': self._explicar(qs, 'despues'),
+                        'despues_ms': self._medir(qs, options['repeticiones']),
+                    }
+
+                self._eliminar_indices()
+
+                for nombre, qs in consultas:
+                    resultados[nombre]['antes_plan'] = self._explicar(qs, 'antes')
+                    resultados[nombre]['antes_ms'] = self._medir(qs, options['repeticiones'])
+
+                self._imprimir(resultados)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('\nDataset e índices restaurados (rollback).'))
+
+    def _generar_dataset(self, options):
+        """Genera el dataset con generar_datos y devuelve el torneo con más reservas"""
+        call_command(
+            'generar_datos',
+            clientes=options['clientes'], canchas=options['canchas'], anios=options['anios'],
+            seed=options['seed'], stdout=self.stdout,
+        )
+        return Torneo.objects.annotate(num_reservas=Count('reservas')).order_by('-num_reservas').first()
+
+    def _consultas(self, torneo):
+        """Consultas tomadas de home, reserva_lista, reportes, torneo_detalle y el admin"""
+        hoy = timezone.now()
+        inicio_mes = hoy.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return [
+            # count() descarta el ordering por defecto
+            ('home: reservas pagadas', Reserva.objects.filter(estado='PAGADA').order_by().values('pk')),
+            ('reserva_lista: filtro por estado', Reserva.objects.filter(estado='PENDIENTE').order_by('-id')[:15]),
+            ('reportes: rango de fechas', Reserva.objects.filter(
+                fecha_hora_inicio__gte=inicio_mes - timedelta(days=30), fecha_hora_inicio__lt=inicio_mes)),
+            ('torneo_detalle: reservas pagadas', Reserva.objects.filter(torneo=torneo, estado='PAGADA')),
+            ('admin: pagos por estado', Pago.objects.filter(estado='PAGADO').order_by('-fecha_pago')[:100]),
+            ('admin: pagos por fecha', Pago.objects.order_by('-fecha_pago')[:100]),
+            ('home: torneos vigentes', Torneo.objects.filter(fecha_fin__gte=hoy.date()).order_by().values('pk')),
+            ('clientes activos', Cliente.objects.filter(activo=True)[:50]),
+        ]
+
+    def _explicar(self, qs, etiqueta):
+        """EXPLAIN de la consulta.
+
+        La etiqueta cambia el texto del SQL: sqlite3 reutiliza sentencias
+        preparadas y devolvería el plan anterior al DROP INDEX.
+        """
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql} /* {etiqueta} */', params)
+            return '\n'.join(' '.join(str(col) for col in fila) for fila in cursor.fetchall())
+
+    def _medir(self, qs, repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            list(qs.all())
+        return (time.perf_counter() - inicio) * 1000 / repeticiones
+
+    def _eliminar_indices(self):
+        with connection.cursor() as cursor:
+            for nombre in self.INDICES:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(nombre)}')
+
+    def _imprimir(self, resultados):
+        for nombre, datos in resultados.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n=== {nombre} ==='))
+            self.stdout.write(self.style.WARNING(f'ANTES ({datos["antes_ms"]:.2f} ms):'))
+            self.stdout.write(datos['antes_plan'])
+            self.stdout.write(self.style.SUCCESS(f'DESPUÉS ({datos["despues_ms"]:.2f} ms):'))
+            self.stdout.write(datos['despues_plan'])
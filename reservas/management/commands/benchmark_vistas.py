@@ -0,0 +1,143 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from pathlib import Path
+from reservas.models import Reserva, Torneo
+import json
+import math
+import statistics
+import subprocess
+import time
+
+
+class ContadorConsultas:
+    """execute_wrapper que cuenta consultas sin el límite de connection.queries"""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano (p entre 0 y 100)"""
+    ordenados = sorted(valores)
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+class Command(BaseCommand):
+    help = ('Mide latencia (p50/p95) y cantidad de consultas SQL de las vistas principales '
+            'y guarda los resultados en JSON para comparar entre commits')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=10, help='Requests por vista')
+        parser.add_argument('--salida', help='Archivo JSON de salida (default: benchmarks/vistas-<commit>.json)')
+        parser.add_argument('--comparar', help='JSON de una corrida anterior para mostrar diferencias')
+        parser.add_argument('--vista', action='append', help='Medir solo las vistas indicadas (repetible)')
+
+    def handle(self, *args, **options):
+        if not Reserva.objects.exists():
+            raise CommandError('No hay reservas. Generá un dataset con: python manage.py generar_datos')
+
+        casos = self._casos()
+        if options['vista']:
+            casos = [caso for caso in casos if caso[0] in options['vista']]
+
+        cliente_http = Client()
+        resultados = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for nombre, url in casos:
+                resultados[nombre] = self._medir(cliente_http, nombre, url, options['repeticiones'])
+
+        commit = self._commit_actual()
+        informe = {
+            'commit': commit,
+            'fecha': timezone.now().isoformat(),
+            'base_de_datos': connection.vendor,
+            'reservas': Reserva.objects.count(),
+            'repeticiones': options['repeticiones'],
+            'vistas': resultados,
+        }
+
+        salida = Path(options['salida'] or settings.BASE_DIR / 'benchmarks' / f'vistas-{commit or "sin-commit"}.json')
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        salida.write_text(json.dumps(informe, indent=2, ensure_ascii=False))
+
+        self._imprimir(resultados)
+        if options['comparar']:
+            self._comparar(resultados, json.loads(Path(options['comparar']).read_text())['vistas'])
+        self.stdout.write(self.style.SUCCESS(f'\nResultados guardados en {salida}'))
+
+    def _casos(self):
+        """Vistas a medir: (nombre, url)"""
+        paginas = max(1, math.ceil(Reserva.objects.count() / 15))
+        hoy = timezone.now()
+        casos = [
+            ('home', reverse('home')),
+            ('reserva_lista', reverse('reserva_lista')),
+            ('reserva_lista_pagina_media', f"{reverse('reserva_lista')}?page={paginas // 2 or 1}"),
+            ('reserva_lista_ultima_pagina', f"{reverse('reserva_lista')}?page={paginas}"),
+            ('reserva_crear_get', reverse('reserva_crear')),
+            ('reportes', f"{reverse('reportes')}?mes={hoy.month}&anio={hoy.year}"),
+            ('reportes_pdf', f"{reverse('reportes_pdf')}?mes={hoy.month}&anio={hoy.year}"),
+        ]
+        torneo = Torneo.objects.exclude(estado='INSCRIPCION').filter(partidos__isnull=False).first()
+        if torneo:
+            casos.append(('torneo_fixture', reverse('torneo_fixture', args=[torneo.pk])))
+        return casos
+
+    def _medir(self, cliente_http, nombre, url, repeticiones):
+        tiempos = []
+        consultas = []
+        for _ in range(repeticiones):
+            contador = ContadorConsultas()
+            with connection.execute_wrapper(contador):
+                inicio = time.perf_counter()
+                response = cliente_http.get(url)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{nombre} ({url}) respondió {response.status_code}')
+            consultas.append(contador.total)
+
+        return {
+            'url': url,
+            'p50_ms': round(percentil(tiempos, 50), 2),
+            'p95_ms': round(percentil(tiempos, 95), 2),
+            'media_ms': round(statistics.mean(tiempos), 2),
+            'consultas': max(consultas),
+            'bytes': len(response.content) if not response.streaming else None,
+        }
+
+    def _commit_actual(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _imprimir(self, resultados):
+        self.stdout.write(f'\n{"Vista":<30}{"p50 ms":>10}{"p95 ms":>10}{"Consultas":>11}')
+        for nombre, datos in resultados.items():
+            self.stdout.write(f'{nombre:<30}{datos["p50_ms"]:>10.2f}{datos["p95_ms"]:>10.2f}{datos["consultas"]:>11}')
+
+    def _comparar(self, resultados, anteriores):
+        self.stdout.write(self.style.MIGRATE_HEADING('\nComparación con la corrida anterior (p50 / consultas):'))
+        for nombre, datos in resultados.items():
+            previo = anteriores.get(nombre)
+            if not previo:
+                continue
+            delta = datos['p50_ms'] - previo['p50_ms']
+            estilo = self.style.SUCCESS if delta <= 0 else self.style.WARNING
+            self.stdout.write(estilo(
+                f'{nombre:<30}{previo["p50_ms"]:>10.2f} -> {datos["p50_ms"]:<10.2f}'
+                f'{previo["consultas"]:>6} -> {datos["consultas"]}'
+            ))
@@ -0,0 +1,310 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from datetime import datetime, timedelta
+from decimal import Decimal
+from reservas.dinero import costo_por_tiempo, sumar
+from reservas.estadisticas import recalcular_estadisticas
+from reservas.versiones import incrementar_version
+from reservas.models import (
+    Cliente, TipoCancha, Cancha, Servicio, Torneo, Equipo, Partido, Reserva, Pago,
+    HORA_APERTURA, HORA_CIERRE,
+)
+from itertools import accumulate
+import math
+import random
+
+# Probabilidad relativa de que un turno esté ocupado según la hora de inicio.
+# Mañanas tranquilas, pico de 18 a 22 h (mismo rango que el recargo horario pico).
+PESO_POR_HORA = {
+    8: 0.15, 9: 0.2, 10: 0.25, 11: 0.25, 12: 0.3, 13: 0.3, 14: 0.3, 15: 0.35,
+    16: 0.45, 17: 0.6, 18: 0.9, 19: 1.0, 20: 1.0, 21: 0.9, 22: 0.5,
+}
+
+TIPOS_CANCHA = ['Fútbol 5', 'Fútbol 7', 'Fútbol 11', 'Paddle']
+PRECIOS_POR_TIPO = {
+    'Fútbol 5': (8000, 15000),
+    'Fútbol 7': (12000, 20000),
+    'Fútbol 11': (20000, 35000),
+    'Paddle': (5000, 9000),
+}
+SERVICIOS = [
+    ('Iluminación', Decimal('1500.00')),
+    ('Vestuarios', Decimal('800.00')),
+    ('Árbitro', Decimal('5000.00')),
+    ('Buffet', Decimal('2500.00')),
+]
+NOMBRES = ['Juan', 'María', 'Carlos', 'Ana', 'Pedro', 'Laura', 'Diego', 'Sofía', 'Miguel', 'Valentina',
+           'Lucas', 'Camila', 'Mateo', 'Julieta', 'Tomás', 'Martina', 'Nicolás', 'Florencia']
+APELLIDOS = ['García', 'Rodríguez', 'López', 'Martínez', 'González', 'Pérez', 'Sánchez', 'Ramírez',
+             'Torres', 'Flores', 'Gómez', 'Díaz', 'Fernández', 'Romero', 'Álvarez', 'Sosa']
+METODOS_PAGO = ['EFECTIVO', 'TRANSFERENCIA', 'TARJETA_DEBITO', 'TARJETA_CREDITO', 'MERCADOPAGO']
+
+
+class Command(BaseCommand):
+    help = ('Genera un dataset sintético de escala productiva (clientes, canchas, años de reservas '
+            'con distribución horaria realista, pagos, torneos y fixtures) usando bulk_create')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=1000, help='Cantidad de clientes')
+        parser.add_argument('--canchas', type=int, default=20, help='Cantidad de canchas')
+        parser.add_argument('--anios', type=float, default=2, help='Años de historial de reservas')
+        parser.add_argument('--dias-futuros', type=int, default=30, help='Días de reservas a futuro')
+        parser.add_argument('--ocupacion', type=float, default=0.6,
+                            help='Factor de ocupación (0-1) aplicado a la distribución horaria')
+        parser.add_argument('--torneos', type=int, default=12, help='Cantidad de torneos')
+        parser.add_argument('--equipos-por-torneo', type=int, default=16,
+                            help='Equipos por torneo (potencia de 2)')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=None, help='Semilla para resultados reproducibles')
+
+    def handle(self, *args, **options):
+        equipos_por_torneo = options['equipos_por_torneo']
+        if equipos_por_torneo < 2 or equipos_por_torneo & (equipos_por_torneo - 1) != 0:
+            raise CommandError('--equipos-por-torneo debe ser una potencia de 2 (2, 4, 8, 16...).')
+        if not 0 < options['ocupacion'] <= 1:
+            raise CommandError('--ocupacion debe estar entre 0 y 1.')
+
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.ahora = timezone.now()
+
+        with transaction.atomic():
+            canchas = self._crear_canchas(options['canchas'])
+            servicios = self._crear_servicios()
+            clientes = self._crear_clientes(options['clientes'])
+            torneos = self._crear_torneos(options['torneos'], equipos_por_torneo, options['anios'])
+            reservas = self._crear_reservas(
+                canchas, clientes, torneos, options['anios'], options['dias_futuros'], options['ocupacion']
+            )
+            self._asignar_servicios(reservas, servicios)
+            self._crear_pagos(reservas, canchas, servicios)
+            # bulk_create no dispara señales
+            recalcular_estadisticas()
+        incrementar_version('reservas')
+        incrementar_version('torneos')
+        incrementar_version('catalogo')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Dataset generado: {len(clientes)} clientes, {len(canchas)} canchas, '
+            f'{len(torneos)} torneos, {len(reservas)} reservas y pagos.'
+        ))
+
+    # CATÁLOGO
+
+    def _crear_canchas(self, cantidad):
+        tipos = [TipoCancha.objects.get_or_create(nombre=nombre)[0] for nombre in TIPOS_CANCHA]
+        offset = Cancha.objects.count()
+        canchas = []
+        for i in range(cantidad):
+            tipo = self.random.choice(tipos)
+            minimo, maximo = PRECIOS_POR_TIPO[tipo.nombre]
+            canchas.append(Cancha(
+                nombre=f'Cancha {offset + i + 1} - {tipo.nombre}',
+                tipo_cancha=tipo,
+                precio_por_hora=Decimal(self.random.randrange(minimo, maximo, 500)),
+                capacidad_personas=self.random.choice([10, 14, 22, 4]),
+            ))
+        return Cancha.objects.bulk_create(canchas, batch_size=self.batch_size)
+
+    def _crear_servicios(self):
+        return [
+            Servicio.objects.get_or_create(nombre=nombre, defaults={'costo_adicional': costo})[0]
+            for nombre, costo in SERVICIOS
+        ]
+
+    def _crear_clientes(self, cantidad):
+        offset = Cliente.objects.count()
+        clientes = []
+        for i in range(offset, offset + cantidad):
+            clientes.append(Cliente(
+                nombre=self.random.choice(NOMBRES),
+                apellido=self.random.choice(APELLIDOS),
+                dni=str(40000000 + i),
+                email=f'cliente{i}@sintetico.example.com',
+                telefono=f'11{self.random.randrange(10**7, 10**8)}',
+                activo=self.random.random() > 0.05,
+            ))
+        return Cliente.objects.bulk_create(clientes, batch_size=self.batch_size)
+
+    # TORNEOS Y FIXTURES
+
+    def _crear_torneos(self, cantidad, equipos_por_torneo, anios):
+        if cantidad == 0:
+            return []
+
+        offset = Torneo.objects.count()
+        hoy = self.ahora.date()
+        dias_historial = int(anios * 365)
+        torneos = []
+        for i in range(cantidad):
+            # Repartidos a lo largo del historial; el último arranca en unos días
+            inicio = hoy - timedelta(days=dias_historial) + timedelta(days=(dias_historial + 10) * i // cantidad)
+            fin = inicio + timedelta(days=self.random.randint(14, 45))
+            if fin < hoy:
+                estado = 'FINALIZADO'
+            elif inicio <= hoy:
+                estado = 'EN_CURSO'
+            else:
+                estado = 'INSCRIPCION'
+            torneos.append(Torneo(
+                nombre=f'Torneo {offset + i + 1}',
+                fecha_inicio=inicio,
+                fecha_fin=fin,
+                premio='Trofeo y medallas',
+                costo_inscripcion=Decimal(self.random.randrange(10000, 50000, 5000)),
+                estado=estado,
+                # Los que no están en inscripción tienen el fixture generado
+                total_rondas=int(math.log2(equipos_por_torneo)) if estado != 'INSCRIPCION' else 0,
+            ))
+        torneos = Torneo.objects.bulk_create(torneos, batch_size=self.batch_size)
+
+        offset_equipos = Equipo.objects.count()
+        equipos = Equipo.objects.bulk_create([
+            Equipo(nombre=f'Equipo {offset_equipos + i + 1}')
+            for i in range(max(equipos_por_torneo * 2, 32))
+        ], batch_size=self.batch_size)
+
+        inscripciones = []
+        for torneo in torneos:
+            torneo.equipos_inscritos = self.random.sample(equipos, equipos_por_torneo)
+            inscripciones.extend(
+                Torneo.equipos.through(torneo_id=torneo.pk, equipo_id=equipo.pk)
+                for equipo in torneo.equipos_inscritos
+            )
+        Torneo.equipos.through.objects.bulk_create(inscripciones, batch_size=self.batch_size)
+
+        for torneo in torneos:
+            if torneo.estado != 'INSCRIPCION':
+                self._crear_fixture(torneo, torneo.equipos_inscritos)
+        return torneos
+
+    def _crear_fixture(self, torneo, equipos):
+        """Fixture de eliminación directa, ronda por ronda con bulk_create.
+
+        Los torneos finalizados quedan con todos los resultados cargados;
+        los que están en curso, solo con la primera ronda jugada.
+        """
+        num_rondas = int(math.log2(len(equipos)))
+        equipos = list(equipos)
+        self.random.shuffle(equipos)
+
+        anteriores = None
+        for ronda in range(1, num_rondas + 1):
+            jugar = torneo.estado == 'FINALIZADO' or (ronda == 1 and torneo.estado == 'EN_CURSO')
+            partidos = []
+            cantidad = len(equipos) // (2 ** ronda)
+            for numero in range(1, cantidad + 1):
+                if anteriores is None:
+                    equipo1, equipo2 = equipos[2 * numero - 2], equipos[2 * numero - 1]
+                    previo1 = previo2 = None
+                else:
+                    previo1, previo2 = anteriores[2 * numero - 2], anteriores[2 * numero - 1]
+                    equipo1, equipo2 = previo1.ganador, previo2.ganador
+                partido = Partido(
+                    torneo=torneo, ronda=ronda, numero_partido=numero,
+                    equipo1=equipo1, equipo2=equipo2,
+                    partido_anterior_equipo1=previo1, partido_anterior_equipo2=previo2,
+                    fecha_hora=timezone.make_aware(datetime.combine(
+                        torneo.fecha_inicio + timedelta(days=7 * (ronda - 1)), HORA_APERTURA
+                    )) + timedelta(hours=numero % 10),
+                )
+                if jugar and equipo1 and equipo2:
+                    goles = self.random.sample(range(0, 8), 2)
+                    partido.resultado_equipo1, partido.resultado_equipo2 = goles
+                    partido.ganador = equipo1 if goles[0] > goles[1] else equipo2
+                    partido.estado = 'FINALIZADO'
+                partidos.append(partido)
+            creados = Partido.objects.bulk_create(partidos, batch_size=self.batch_size)
+            if anteriores is not None:
+                for i, previo in enumerate(anteriores):
+                    previo.siguiente = creados[i // 2]
+                Partido.objects.bulk_update(anteriores, ['siguiente'], batch_size=self.batch_size)
+            anteriores = creados
+
+    # RESERVAS Y PAGOS
+
+    def _crear_reservas(self, canchas, clientes, torneos, anios, dias_futuros, ocupacion):
+        hoy = self.ahora.date()
+        primer_dia = hoy - timedelta(days=int(anios * 365))
+        total_dias = (hoy - primer_dia).days + dias_futuros
+        hora_cierre = HORA_CIERRE.hour
+
+        # Pocos clientes concentran muchas reservas (clientes frecuentes)
+        activos = [c for c in clientes if c.activo] or clientes
+        pesos_acumulados = list(accumulate(1 / math.sqrt(i + 1) for i in range(len(activos))))
+
+        torneos_por_dia = {}
+        for torneo in torneos:
+            dia = torneo.fecha_inicio
+            while dia <= torneo.fecha_fin:
+                torneos_por_dia.setdefault(dia, []).append(torneo)
+                dia += timedelta(days=1)
+
+        reservas = []
+        for offset in range(total_dias):
+            dia = primer_dia + timedelta(days=offset)
+            inicio_dia = timezone.make_aware(datetime.combine(dia, HORA_APERTURA))
+            # Los fines de semana hay más demanda
+            factor_dia = ocupacion * (1.2 if dia.weekday() >= 5 else 1.0)
+            for cancha in canchas:
+                hora = HORA_APERTURA.hour
+                while hora < hora_cierre:
+                    if self.random.random() >= factor_dia * PESO_POR_HORA.get(hora, 0):
+                        hora += 1
+                        continue
+                    duracion = min(self.random.choices([1, 2, 3], weights=[65, 30, 5])[0], hora_cierre - hora)
+                    inicio = inicio_dia + timedelta(hours=hora - HORA_APERTURA.hour)
+                    torneo = None
+                    if dia in torneos_por_dia and self.random.random() < 0.1:
+                        torneo = self.random.choice(torneos_por_dia[dia])
+                    reservas.append(Reserva(
+                        cliente=self.random.choices(activos, cum_weights=pesos_acumulados)[0],
+                        cancha=cancha,
+                        fecha_hora_inicio=inicio,
+                        fecha_hora_fin=inicio + timedelta(hours=duracion),
+                        estado=self._estado_reserva(inicio),
+                        torneo=torneo,
+                    ))
+                    hora += duracion
+        return Reserva.objects.bulk_create(reservas, batch_size=self.batch_size)
+
+    def _estado_reserva(self, inicio):
+        if inicio < self.ahora:
+            return self.random.choices(['PAGADA', 'CANCELADA', 'PENDIENTE'], weights=[85, 12, 3])[0]
+        return self.random.choices(['PENDIENTE', 'PAGADA', 'CANCELADA'], weights=[60, 32, 8])[0]
+
+    def _asignar_servicios(self, reservas, servicios):
+        through = Reserva.servicios.through
+        relaciones = []
+        for reserva in reservas:
+            if self.random.random() < 0.25:
+                reserva.servicios_generados = self.random.sample(servicios, self.random.randint(1, 2))
+                relaciones.extend(
+                    through(reserva_id=reserva.pk, servicio_id=servicio.pk)
+                    for servicio in reserva.servicios_generados
+                )
+            else:
+                reserva.servicios_generados = []
+        through.objects.bulk_create(relaciones, batch_size=self.batch_size)
+
+    def _crear_pagos(self, reservas, canchas, servicios):
+        estado_pago = {'PAGADA': 'PAGADO', 'PENDIENTE': 'PENDIENTE'}
+        pagos = []
+        for reserva in reservas:
+            monto = costo_por_tiempo(reserva.cancha.precio_por_hora, reserva.fecha_hora_inicio, reserva.fecha_hora_fin)
+            monto += sumar(s.costo_adicional for s in reserva.servicios_generados)
+            pagado = reserva.estado == 'PAGADA'
+            if reserva.estado == 'CANCELADA':
+                # Algunas cancelaciones ocurrieron después de pagar
+                estado = 'REEMBOLSADO' if self.random.random() < 0.4 else 'PENDIENTE'
+            else:
+                estado = estado_pago[reserva.estado]
+            pagos.append(Pago(
+                reserva=reserva,
+                monto_total=monto,
+                estado=estado,
+                fecha_pago=min(reserva.fecha_hora_inicio, self.ahora) if pagado else None,
+                metodo_pago=self.random.choice(METODOS_PAGO) if pagado else None,
+            ))
+        Pago.objects.bulk_create(pagos, batch_size=self.batch_size)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reservas.estadisticas import recalcular_estadisticas
+
+
+class Command(BaseCommand):
+    help = ('Reconstruye las estadísticas de todos los clientes desde sus reservas y pagos '
+            '(después de cargas masivas o para corregir diferencias)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            cantidad = recalcular_estadisticas()
+        self.stdout.write(self.style.SUCCESS(f'Estadísticas recalculadas para {cantidad} clientes.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from datetime import timedelta
+from reservas.vencimiento import vencer_reservas_pendientes
+
+
+class Command(BaseCommand):
+    help = ('Cancela las reservas que siguen pendientes de pago después de RESERVA_PENDIENTE_TTL_MINUTOS '
+            'y anula sus pagos. Pensado para correr periódicamente (cron).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl-minutos', type=int, help='Sobrescribe RESERVA_PENDIENTE_TTL_MINUTOS')
+        parser.add_argument('--simular', action='store_true', help='Solo muestra lo que se cancelaría')
+
+    def handle(self, *args, **options):
+        ttl = None
+        if options['ttl_minutos'] is not None:
+            if options['ttl_minutos'] <= 0:
+                raise CommandError('--ttl-minutos debe ser mayor a cero.')
+            ttl = timedelta(minutes=options['ttl_minutos'])
+
+        resumen = vencer_reservas_pendientes(ttl=ttl, simular=options['simular'])
+
+        accion = 'Se cancelarían' if options['simular'] else 'Canceladas'
+        self.stdout.write(f'{accion}: {resumen["reservas"]} reservas pendientes vencidas')
+        for cancha, total in sorted(resumen['por_cancha'].items()):
+            self.stdout.write(f'  {cancha:<30}{total:>6}')
+        self.stdout.write(f'Pagos anulados: {resumen["pagos"]}')
+        self.stdout.write(f'Monto sin cobrar: ${resumen["monto_sin_cobrar"]}')
+        self.stdout.write(f'Horarios futuros liberados: {resumen["horarios_liberados"]}')
+        if not options['simular'] and resumen['reservas']:
+            self.stdout.write(self.style.SUCCESS('Vencimiento completado.'))
@@ -0,0 +1,155 @@
+"""
+Métricas de rendimiento por vista, en memoria del proceso.
+
+El MetricasMiddleware registra por cada request (agrupado por nombre de URL)
+el tiempo total, la cantidad y el tiempo de las consultas SQL, el tiempo de
+render de templates y el tamaño de la respuesta. El registro se expone en
+formato de texto de Prometheus en la vista ``metricas``.
+
+Cada proceso (worker) mantiene su propio registro.
+"""
+from collections import Counter
+from contextvars import ContextVar
+from django.template.backends.django import DjangoTemplates, Template
+import re
+import threading
+import time
+
+# Buckets de los histogramas (límite superior inclusive, como en Prometheus)
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+BUCKETS_BYTES = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+# Medición del request en curso (la usa el backend de templates)
+medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+class MedicionRequest:
+    """Acumula los datos de un request mientras se procesa"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+        self.tiempo_templates = 0.0
+        self.formas_sql = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper: cuenta y mide cada consulta"""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo_sql += time.perf_counter() - inicio
+            self.consultas += 1
+            self.formas_sql[normalizar_sql(sql)] += 1
+
+    def consultas_repetidas(self, umbral):
+        """Formas de SQL que se repiten al menos `umbral` veces (posible N+1)"""
+        return [(forma, veces) for forma, veces in self.formas_sql.most_common() if veces >= umbral]
+
+
+_RE_LISTA_IN = re.compile(r'IN \((?:%s, )*%s\)')
+_RE_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalizar_sql(sql):
+    """Reduce una consulta a su "forma": sin literales ni listas IN de largo variable"""
+    sql = _RE_LISTA_IN.sub('IN (...)', sql)
+    return _RE_LITERAL.sub('?', sql)
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = buckets
+        self.series = {}
+
+    def observar(self, vista, valor):
+        serie = self.series.setdefault(vista, {'buckets': [0] * len(self.buckets), 'suma': 0, 'cantidad': 0})
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                serie['buckets'][i] += 1
+        serie['suma'] += valor
+        serie['cantidad'] += 1
+
+    def exportar(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        for vista, serie in sorted(self.series.items()):
+            for limite, acumulado in zip(self.buckets, serie['buckets']):
+                lineas.append(f'{self.nombre}_bucket{{vista="{vista}",le="{limite}"}} {acumulado}')
+            lineas.append(f'{self.nombre}_bucket{{vista="{vista}",le="+Inf"}} {serie["cantidad"]}')
+            lineas.append(f'{self.nombre}_sum{{vista="{vista}"}} {serie["suma"]}')
+            lineas.append(f'{self.nombre}_count{{vista="{vista}"}} {serie["cantidad"]}')
+        return lineas
+
+
+class RegistroMetricas:
+    """Histogramas por vista y contador de posibles N+1, protegidos por un lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.duracion = Histograma(
+                'reservas_request_duracion_segundos', 'Tiempo total del request.', BUCKETS_SEGUNDOS)
+            self.consultas = Histograma(
+                'reservas_db_consultas', 'Consultas SQL por request.', BUCKETS_CONSULTAS)
+            self.tiempo_sql = Histograma(
+                'reservas_db_duracion_segundos', 'Tiempo total en SQL por request.', BUCKETS_SEGUNDOS)
+            self.tiempo_templates = Histograma(
+                'reservas_template_duracion_segundos', 'Tiempo de render de templates por request.',
+                BUCKETS_SEGUNDOS)
+            self.tamanio = Histograma(
+                'reservas_respuesta_bytes', 'Tamaño del cuerpo de la respuesta.', BUCKETS_BYTES)
+            self.n_mas_uno = Counter()
+
+    def registrar(self, vista, medicion, duracion, tamanio, repetidas):
+        with self._lock:
+            self.duracion.observar(vista, duracion)
+            self.consultas.observar(vista, medicion.consultas)
+            self.tiempo_sql.observar(vista, medicion.tiempo_sql)
+            self.tiempo_templates.observar(vista, medicion.tiempo_templates)
+            if tamanio is not None:
+                self.tamanio.observar(vista, tamanio)
+            if repetidas:
+                self.n_mas_uno[vista] += 1
+
+    def exportar_prometheus(self):
+        with self._lock:
+            lineas = []
+            for histograma in (self.duracion, self.consultas, self.tiempo_sql, self.tiempo_templates, self.tamanio):
+                lineas.extend(histograma.exportar())
+            lineas.append('# HELP reservas_n_mas_uno_total Requests con consultas SQL repetidas (posible N+1).')
+            lineas.append('# TYPE reservas_n_mas_uno_total counter')
+            for vista, cantidad in sorted(self.n_mas_uno.items()):
+                lineas.append(f'reservas_n_mas_uno_total{{vista="{vista}"}} {cantidad}')
+            return '\n'.join(lineas) + '\n'
+
+
+registro = RegistroMetricas()
+
+
+class TemplateMedido(Template):
+    def render(self, context=None, request=None):
+        medicion = medicion_actual.get()
+        if medicion is None:
+            return super().render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicion.tiempo_templates += time.perf_counter() - inicio
+
+
+class DjangoTemplatesMedido(DjangoTemplates):
+    """Backend de templates de Django que suma el tiempo de render a la medición del request"""
+
+    def from_string(self, template_code):
+        return TemplateMedido(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TemplateMedido(super().get_template(template_name).template, self)
@@ -0,0 +1,104 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from .metricas import MedicionRequest, medicion_actual, registro
+import logging
+import time
+
+logger = logging.getLogger('reservas.metricas')
+
+
+class MetricasMiddleware:
+    """
+    Mide cada request y lo registra en reservas.metricas agrupado por nombre de URL.
+
+    Si una misma forma de consulta SQL se repite METRICAS_UMBRAL_N_MAS_UNO veces
+    o más en un request, se loguea como posible N+1.
+
+    Funciona con WSGI y con ASGI: con ASGI no fuerza a las vistas async a
+    correr en un hilo.
+
+    El header Server-Timing (consultas y tiempos) solo se agrega con DEBUG o
+    para usuarios staff, igual que el acceso a /metrics/.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.habilitado = getattr(settings, 'METRICAS_HABILITADAS', True)
+        self.umbral = getattr(settings, 'METRICAS_UMBRAL_N_MAS_UNO', 10)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.habilitado:
+            return self.get_response(request)
+
+        medicion = MedicionRequest()
+        token = medicion_actual.set(medicion)
+        try:
+            with self._envolver_conexiones(medicion):
+                response = self.get_response(request)
+        finally:
+            medicion_actual.reset(token)
+        return self._registrar(request, response, medicion, self._ver_tiempos(getattr(request, 'user', None)))
+
+    async def __acall__(self, request):
+        if not self.habilitado:
+            return await self.get_response(request)
+
+        medicion = MedicionRequest()
+        token = medicion_actual.set(medicion)
+        try:
+            # Las conexiones son por hilo: se envuelven las del hilo donde corre el ORM del request
+            envoltura = await sync_to_async(self._envolver_conexiones)(medicion)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(envoltura.close)()
+        finally:
+            medicion_actual.reset(token)
+        usuario = await request.auser() if hasattr(request, 'auser') else None
+        return self._registrar(request, response, medicion, self._ver_tiempos(usuario))
+
+    def _ver_tiempos(self, usuario):
+        return settings.DEBUG or getattr(usuario, 'is_staff', False)
+
+    def _envolver_conexiones(self, medicion):
+        stack = ExitStack()
+        for conexion in connections.all():
+            stack.enter_context(conexion.execute_wrapper(medicion))
+        return stack
+
+    def _registrar(self, request, response, medicion, ver_tiempos):
+        duracion = time.perf_counter() - medicion.inicio
+
+        vista = self._nombre_vista(request)
+        if vista == 'metricas':
+            return response
+
+        repetidas = medicion.consultas_repetidas(self.umbral)
+        for forma, veces in repetidas:
+            logger.warning('Posible N+1 en %s: %d consultas con la forma %s', vista, veces, forma)
+
+        tamanio = None if response.streaming else len(response.content)
+        registro.registrar(vista, medicion, duracion, tamanio, repetidas)
+
+        if not ver_tiempos:
+            return response
+        response['Server-Timing'] = (
+            f'db;desc="{medicion.consultas} consultas";dur={medicion.tiempo_sql * 1000:.1f}, '
+            f'tpl;dur={medicion.tiempo_templates * 1000:.1f}, '
+            f'total;dur={duracion * 1000:.1f}'
+        )
+        return response
+
+    def _nombre_vista(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'sin_ruta'
+        return match.view_name
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0011_pago_mp_payment_id_pago_mp_payment_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['apellido', 'nombre'], name='cliente_activo_apellido_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['estado', 'fecha_pago'], name='pago_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha_pago'], name='pago_fecha_pago_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', 'id'], name='reserva_estado_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_hora_inicio'], name='reserva_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['torneo', 'estado', 'fecha_hora_inicio'], name='reserva_torneo_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='torneo',
+            index=models.Index(fields=['fecha_fin'], name='torneo_fecha_fin_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=models.CheckConstraint(check=models.Q(('fecha_hora_fin__gt', models.F('fecha_hora_inicio'))), name='reserva_fin_posterior_inicio', violation_error_message='La fecha de fin debe ser posterior a la fecha de inicio.'),
+        ),
+    ]
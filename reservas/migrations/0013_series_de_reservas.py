@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0012_indices_y_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerieReserva',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hora_inicio', models.TimeField()),
+                ('hora_fin', models.TimeField()),
+                ('frecuencia', models.CharField(choices=[('SEMANAL', 'Semanal'), ('QUINCENAL', 'Quincenal')], default='SEMANAL', max_length=20)),
+                ('fecha_desde', models.DateField(help_text='Fecha de la primera ocurrencia')),
+                ('fecha_hasta', models.DateField(help_text='Última fecha posible de la serie')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('cancha', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='series', to='reservas.cancha')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='series', to='reservas.cliente')),
+            ],
+            options={
+                'verbose_name': 'Serie de Reservas',
+                'verbose_name_plural': 'Series de Reservas',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.AddField(
+            model_name='reserva',
+            name='serie',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservas', to='reservas.seriereserva'),
+        ),
+    ]
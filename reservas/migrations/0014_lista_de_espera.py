@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0013_series_de_reservas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EsperaReserva',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_hora_inicio', models.DateTimeField()),
+                ('fecha_hora_fin', models.DateTimeField()),
+                ('estado', models.CharField(choices=[('ESPERANDO', 'Esperando'), ('PROMOVIDA', 'Promovida'), ('CANCELADA', 'Cancelada')], default='ESPERANDO', max_length=20)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Espera de Reserva',
+                'verbose_name_plural': 'Lista de Espera',
+                'ordering': ['fecha_creacion'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='reserva',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ['PENDIENTE', 'PAGADA'])), fields=('cancha', 'fecha_hora_inicio'), name='reserva_cancha_inicio_activa', violation_error_message='La cancha no está disponible en el horario seleccionado.'),
+        ),
+        migrations.AddField(
+            model_name='esperareserva',
+            name='cancha',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='esperas', to='reservas.cancha'),
+        ),
+        migrations.AddField(
+            model_name='esperareserva',
+            name='cliente',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='esperas', to='reservas.cliente'),
+        ),
+        migrations.AddField(
+            model_name='esperareserva',
+            name='reserva',
+            field=models.OneToOneField(blank=True, help_text='Reserva creada al promover la espera', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='espera', to='reservas.reserva'),
+        ),
+        migrations.AddIndex(
+            model_name='esperareserva',
+            index=models.Index(condition=models.Q(('estado', 'ESPERANDO')), fields=['cancha', 'fecha_hora_inicio', 'fecha_hora_fin'], name='espera_cancha_horario_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='esperareserva',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'ESPERANDO')), fields=('cliente', 'cancha', 'fecha_hora_inicio'), name='espera_unica_por_horario', violation_error_message='El cliente ya está en la lista de espera de ese horario.'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0014_lista_de_espera'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pago',
+            name='estado',
+            field=models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PAGADO', 'Pagado'), ('REEMBOLSADO', 'Reembolsado'), ('ANULADO', 'Anulado')], default='PENDIENTE', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['cancha', 'estado', 'fecha_hora_inicio'], name='reserva_cancha_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('estado', 'PENDIENTE')), fields=['fecha_creacion'], name='reserva_pendiente_creacion_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:37
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+
+def calcular_estadisticas(apps, schema_editor):
+    """Carga las estadísticas iniciales de todos los clientes con dos consultas agregadas"""
+    Cliente = apps.get_model('reservas', 'Cliente')
+    Reserva = apps.get_model('reservas', 'Reserva')
+    Pago = apps.get_model('reservas', 'Pago')
+    EstadisticasCliente = apps.get_model('reservas', 'EstadisticasCliente')
+
+    por_cliente = {
+        fila['cliente_id']: fila
+        for fila in Reserva.objects.order_by().values('cliente_id').annotate(
+            total=Count('pk'),
+            pagadas=Count('pk', filter=Q(estado='PAGADA')),
+            canceladas=Count('pk', filter=Q(estado='CANCELADA')),
+            ultima=Max('fecha_hora_inicio', filter=Q(estado='PAGADA')),
+        )
+    }
+    gastado = dict(
+        Pago.objects.filter(estado='PAGADO').order_by()
+        .values_list('reserva__cliente_id').annotate(total=Sum('monto_total'))
+    )
+    ahora = timezone.now()
+    EstadisticasCliente.objects.bulk_create([
+        EstadisticasCliente(
+            cliente_id=cliente_id,
+            total_reservas=por_cliente.get(cliente_id, {}).get('total', 0),
+            reservas_pagadas=por_cliente.get(cliente_id, {}).get('pagadas', 0),
+            reservas_canceladas=por_cliente.get(cliente_id, {}).get('canceladas', 0),
+            total_gastado=gastado.get(cliente_id) or Decimal('0'),
+            ultima_visita=por_cliente.get(cliente_id, {}).get('ultima'),
+            fecha_actualizacion=ahora,
+        )
+        for cliente_id in Cliente.objects.values_list('pk', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0015_vencimiento_de_pendientes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticasCliente',
+            fields=[
+                ('cliente', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estadisticas', serialize=False, to='reservas.cliente')),
+                ('total_reservas', models.IntegerField(default=0)),
+                ('reservas_pagadas', models.IntegerField(default=0)),
+                ('reservas_canceladas', models.IntegerField(default=0)),
+                ('total_gastado', models.DecimalField(decimal_places=2, default=Decimal('0'), help_text='Suma de los pagos en estado PAGADO', max_digits=12)),
+                ('ultima_visita', models.DateTimeField(blank=True, help_text='Inicio de la última reserva pagada', null=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadísticas de Cliente',
+                'verbose_name_plural': 'Estadísticas de Clientes',
+            },
+        ),
+        migrations.RunPython(calcular_estadisticas, reverse_code=migrations.RunPython.noop),
+    ]
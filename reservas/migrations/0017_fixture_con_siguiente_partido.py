@@ -0,0 +1,49 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def enlazar_partidos(apps, schema_editor):
+    """Completa total_rondas y el siguiente partido de los fixtures ya generados"""
+    Torneo = apps.get_model('reservas', 'Torneo')
+    Partido = apps.get_model('reservas', 'Partido')
+
+    rondas = dict(Partido.objects.order_by().values_list('torneo_id').annotate(total=Max('ronda')))
+    torneos = list(Torneo.objects.filter(pk__in=rondas))
+    for torneo in torneos:
+        torneo.total_rondas = rondas[torneo.pk]
+    Torneo.objects.bulk_update(torneos, ['total_rondas'], batch_size=500)
+
+    partidos = list(Partido.objects.only('id', 'torneo_id', 'ronda', 'numero_partido'))
+    por_posicion = {(p.torneo_id, p.ronda, p.numero_partido): p.pk for p in partidos}
+    enlazados = []
+    for partido in partidos:
+        partido.siguiente_id = por_posicion.get(
+            (partido.torneo_id, partido.ronda + 1, (partido.numero_partido + 1) // 2)
+        )
+        if partido.siguiente_id:
+            enlazados.append(partido)
+    Partido.objects.bulk_update(enlazados, ['siguiente'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0016_estadisticas_de_clientes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partido',
+            name='siguiente',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='anteriores', to='reservas.partido'),
+        ),
+        migrations.AddField(
+            model_name='torneo',
+            name='total_rondas',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Rondas del fixture (se fija al generarlo)'),
+        ),
+        migrations.RunPython(enlazar_partidos, migrations.RunPython.noop),
+    ]
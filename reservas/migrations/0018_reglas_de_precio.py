@@ -0,0 +1,52 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:50
+
+import django.core.validators
+import django.db.models.deletion
+from datetime import time
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def crear_reglas_iniciales(apps, schema_editor):
+    """Las estrategias que antes estaban fijas en Reserva, incluido el recargo por horario pico"""
+    ReglaPrecio = apps.get_model('reservas', 'ReglaPrecio')
+    ReglaPrecio.objects.bulk_create([
+        ReglaPrecio(nombre='Cliente frecuente', porcentaje=Decimal('-10'), reservas_pagadas_minimas=5),
+        ReglaPrecio(nombre='Horario matutino', porcentaje=Decimal('-15'), hora_desde=time(8), hora_hasta=time(12)),
+        ReglaPrecio(nombre='Reserva de torneo', porcentaje=Decimal('-25'), solo_torneos=True),
+        ReglaPrecio(nombre='Horario pico', porcentaje=Decimal('20'), hora_desde=time(18), hora_hasta=time(22),
+                    acumulable=True),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0017_fixture_con_siguiente_partido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReglaPrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+                ('porcentaje', models.DecimalField(decimal_places=2, help_text='Negativo para descuentos (-15 = 15% menos), positivo para recargos', max_digits=5, validators=[django.core.validators.MinValueValidator(-100), django.core.validators.MaxValueValidator(100)])),
+                ('hora_desde', models.TimeField(blank=True, help_text='Inicio de la reserva desde esta hora', null=True)),
+                ('hora_hasta', models.TimeField(blank=True, help_text='Inicio de la reserva antes de esta hora', null=True)),
+                ('dias_semana', models.CharField(blank=True, help_text='Días de 0 (lunes) a 6 (domingo) separados por coma; vacío = todos', max_length=20, validators=[django.core.validators.RegexValidator('^[0-6](,[0-6])*$', 'Días de 0 (lunes) a 6 (domingo) separados por coma.')])),
+                ('reservas_pagadas_minimas', models.PositiveIntegerField(default=0, help_text='Categoría de cliente: reservas pagadas que necesita para la regla')),
+                ('solo_torneos', models.BooleanField(default=False, help_text='Solo reservas asociadas a un torneo')),
+                ('prioridad', models.PositiveIntegerField(default=0, help_text='Mayor prioridad gana entre las no acumulables')),
+                ('acumulable', models.BooleanField(default=False, help_text='Se aplica además de la mejor regla no acumulable')),
+                ('activa', models.BooleanField(default=True)),
+                ('tipo_cancha', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reglas_precio', to='reservas.tipocancha')),
+            ],
+            options={
+                'verbose_name': 'Regla de Precio',
+                'verbose_name_plural': 'Reglas de Precio',
+                'ordering': ['-prioridad', 'nombre'],
+            },
+        ),
+        migrations.RunPython(crear_reglas_iniciales, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,12 @@
-from django.db import models
+from contextlib import contextmanager
+from django.db import IntegrityError, models, transaction
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.utils import timezone
 from datetime import datetime, time, timedelta
 from decimal import Decimal
+from .dinero import CERO, costo_por_tiempo, horas, sumar
+from .versiones import incrementar_version
 import re
 
 # Configuración del negocio
@@ -12,6 +15,7 @@ HORA_CIERRE = time(23, 0)
 DURACION_MINIMA_RESERVA = 1
 DURACION_MAXIMA_RESERVA = 4
 MAX_RESERVAS_POR_CLIENTE_DIA = 3
+HORARIO_NO_DISPONIBLE = 'La cancha no está disponible en el horario seleccionado.'
 
 # Validadores
 def validar_dni_argentino(value):
@@ -39,6 +43,23 @@ def validar_telefono(value):
     if int(digitos) == 0:
         raise ValidationError('El teléfono debe contener dígitos válidos.')
 
+@contextmanager
+def horario_no_disponible_como_validacion():
+    """
+    Convierte el IntegrityError de reserva_cancha_inicio_activa en el mismo
+    ValidationError que da clean(). Pasa cuando dos pedidos toman el mismo
+    horario a la vez: los dos validan antes de que el otro guarde.
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        mensaje = str(e)
+        # PostgreSQL nombra la restricción; SQLite lista las columnas
+        if ('reserva_cancha_inicio_activa' in mensaje
+                or 'reservas_reserva.cancha_id, reservas_reserva.fecha_hora_inicio' in mensaje):
+            raise ValidationError({'cancha': HORARIO_NO_DISPONIBLE}) from e
+        raise
+
 class TipoCancha(models.Model):
     nombre = models.CharField(max_length=100, unique=True)
     descripcion = models.TextField(blank=True, null=True, help_text="Descripción o reglas del tipo de cancha.")
@@ -118,18 +139,58 @@ class Cliente(models.Model):
         self.nombre = self.nombre.strip().title()
         self.apellido = self.apellido.strip().title()
     
-    def puede_reservar(self, fecha):
-        """Verifica si el cliente puede hacer más reservas en una fecha determinada"""
+    def puede_reservar(self, fecha, excluir=None):
+        """Verifica si el cliente puede hacer más reservas en una fecha determinada
+        
+        excluir: pk de una reserva que no cuenta (la que se está editando)
+        """
         reservas_dia = self.reservas.filter(
             fecha_hora_inicio__date=fecha,
             estado__in=['PENDIENTE', 'PAGADA']
-        ).count()
+        ).exclude(pk=excluir).count()
         return reservas_dia < MAX_RESERVAS_POR_CLIENTE_DIA
     
+    def reservas_pagadas_registradas(self):
+        """Categoría del cliente para las reglas de precio, desde sus estadísticas"""
+        try:
+            return self.estadisticas.reservas_pagadas
+        except EstadisticasCliente.DoesNotExist:
+            return self.reservas.filter(estado='PAGADA').count()
+    
     class Meta:
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['apellido', 'nombre']
+        indexes = [
+            # Listados de clientes activos, ya ordenados como el Meta.ordering
+            models.Index(
+                fields=['apellido', 'nombre'],
+                condition=models.Q(activo=True),
+                name='cliente_activo_apellido_idx',
+            ),
+        ]
+
+class EstadisticasCliente(models.Model):
+    """
+    Totales de un cliente mantenidos al cambiar el estado de sus reservas y
+    pagos (ver reservas/estadisticas.py), para no recalcularlos en cada consulta.
+    """
+    cliente = models.OneToOneField(Cliente, on_delete=models.CASCADE, primary_key=True, related_name="estadisticas")
+    total_reservas = models.IntegerField(default=0)
+    reservas_pagadas = models.IntegerField(default=0)
+    reservas_canceladas = models.IntegerField(default=0)
+    total_gastado = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0'),
+                                        help_text="Suma de los pagos en estado PAGADO")
+    ultima_visita = models.DateTimeField(null=True, blank=True,
+                                         help_text="Inicio de la última reserva pagada")
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Estadísticas de {self.cliente}"
+
+    class Meta:
+        verbose_name = "Estadísticas de Cliente"
+        verbose_name_plural = "Estadísticas de Clientes"
 
 class Cancha(models.Model):
     nombre = models.CharField(max_length=100, help_text="Ej: Cancha 1 - Central")
@@ -195,6 +256,67 @@ class Servicio(models.Model):
         verbose_name_plural = "Servicios"
         ordering = ['nombre']
 
+class ReglaPrecio(models.Model):
+    """
+    Descuento o recargo sobre el costo base de una reserva (cancha + servicios).
+    
+    Una regla aplica cuando la reserva cumple todas sus condiciones; las que
+    quedan vacías no restringen. Entre las reglas no acumulables que aplican
+    gana la de mayor prioridad (a igual prioridad, la más conveniente para el
+    cliente); las acumulables se suman a esa, en orden de prioridad.
+    Se compilan en una tabla en memoria (ver reservas/precios.py).
+    """
+    DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+    
+    nombre = models.CharField(max_length=100, unique=True)
+    porcentaje = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        validators=[MinValueValidator(-100), MaxValueValidator(100)],
+        help_text="Negativo para descuentos (-15 = 15% menos), positivo para recargos"
+    )
+    hora_desde = models.TimeField(null=True, blank=True, help_text="Inicio de la reserva desde esta hora")
+    hora_hasta = models.TimeField(null=True, blank=True, help_text="Inicio de la reserva antes de esta hora")
+    dias_semana = models.CharField(
+        max_length=20,
+        blank=True,
+        validators=[RegexValidator(r'^[0-6](,[0-6])*$', 'Días de 0 (lunes) a 6 (domingo) separados por coma.')],
+        help_text="Días de 0 (lunes) a 6 (domingo) separados por coma; vacío = todos"
+    )
+    tipo_cancha = models.ForeignKey(
+        TipoCancha, on_delete=models.CASCADE, null=True, blank=True, related_name='reglas_precio'
+    )
+    reservas_pagadas_minimas = models.PositiveIntegerField(
+        default=0, help_text="Categoría de cliente: reservas pagadas que necesita para la regla"
+    )
+    solo_torneos = models.BooleanField(default=False, help_text="Solo reservas asociadas a un torneo")
+    prioridad = models.PositiveIntegerField(default=0, help_text="Mayor prioridad gana entre las no acumulables")
+    acumulable = models.BooleanField(default=False, help_text="Se aplica además de la mejor regla no acumulable")
+    activa = models.BooleanField(default=True)
+    
+    def __str__(self):
+        signo = '+' if self.porcentaje > 0 else ''
+        return f"{self.nombre} ({signo}{self.porcentaje}%)"
+    
+    def clean(self):
+        super().clean()
+        if (self.hora_desde is None) != (self.hora_hasta is None):
+            raise ValidationError('Indique las dos horas de la franja o ninguna.')
+        if self.hora_desde is not None and self.hora_hasta <= self.hora_desde:
+            raise ValidationError({'hora_hasta': 'La hora hasta debe ser posterior a la hora desde.'})
+    
+    def dias(self):
+        """Días de la semana en los que aplica (0 = lunes), o None si aplica todos"""
+        if not self.dias_semana:
+            return None
+        return frozenset(int(dia) for dia in self.dias_semana.split(','))
+    
+    class Meta:
+        verbose_name = "Regla de Precio"
+        verbose_name_plural = "Reglas de Precio"
+        ordering = ['-prioridad', 'nombre']
+
+
 class Torneo(models.Model):
     ESTADO_CHOICES = [
         ('INSCRIPCION', 'Abierto para Inscripciones'),
@@ -228,6 +350,10 @@ class Torneo(models.Model):
         help_text="Equipos inscritos en el torneo"
     )
     activo = models.BooleanField(default=True)
+    total_rondas = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Rondas del fixture (se fija al generarlo)"
+    )
 
     def __str__(self):
         return self.nombre
@@ -242,6 +368,31 @@ class Torneo(models.Model):
                     'fecha_fin': 'La fecha de fin debe ser posterior a la fecha de inicio.'
                 })
     
+    @classmethod
+    def actualizar_estados_por_fecha(cls, hoy=None, pk=None):
+        """
+        Pasa a EN_CURSO los torneos que ya empezaron y a FINALIZADO los que terminaron.
+        
+        Solo escribe cuando hay torneos para actualizar, así los GET que llaman
+        a este método no toman el lock de escritura de la base en cada request.
+        Retorna la cantidad de torneos actualizados.
+        """
+        hoy = hoy or timezone.now().date()
+        torneos = cls.objects.all() if pk is None else cls.objects.filter(pk=pk)
+        
+        a_finalizar = torneos.filter(fecha_fin__lt=hoy).exclude(estado='FINALIZADO')
+        a_iniciar = torneos.filter(estado='INSCRIPCION', fecha_inicio__lte=hoy, fecha_fin__gte=hoy)
+        
+        actualizados = 0
+        if a_finalizar.exists():
+            actualizados += a_finalizar.update(estado='FINALIZADO')
+        if a_iniciar.exists():
+            actualizados += a_iniciar.update(estado='EN_CURSO')
+        if actualizados:
+            # update() no dispara señales
+            incrementar_version('torneos')
+        return actualizados
+    
     def equipos_count(self):
         """Retorna la cantidad de equipos inscritos"""
         return self.equipos.count()
@@ -261,44 +412,51 @@ class Torneo(models.Model):
         if num_equipos < 2:
             raise ValidationError('Se necesitan al menos 2 equipos para generar el fixture.')
         
-        # Verificar que sea potencia de 2 (2, 4, 8, 16, etc.)
-        import math
-        if num_equipos & (num_equipos - 1) != 0:
-            raise ValidationError(f'El número de equipos debe ser potencia de 2 (2, 4, 8, 16...). Tienes {num_equipos} equipos.')
-        
         # Eliminar partidos anteriores si existen
         self.partidos.all().delete()
         
-        # Calcular número de rondas
-        num_rondas = int(math.log2(num_equipos))
+        # El cuadro se completa hasta la potencia de 2 siguiente: los lugares
+        # que sobran son partidos libres de primera ronda
+        num_rondas = (num_equipos - 1).bit_length()
+        lugares = 2 ** num_rondas
+        libres = lugares - num_equipos
         
-        # Crear primera ronda con equipos
         import random
         random.shuffle(equipos_list)
+        # Un equipo por partido libre y el resto de a pares: ningún partido queda sin equipos
+        cruces = [(equipo, None) for equipo in equipos_list[:libres]]
+        restantes = equipos_list[libres:]
+        cruces += list(zip(restantes[::2], restantes[1::2]))
         
-        ronda = 1
-        for i in range(0, num_equipos, 2):
-            Partido.objects.create(
-                torneo=self,
-                equipo1=equipos_list[i],
-                equipo2=equipos_list[i + 1],
-                ronda=ronda,
-                numero_partido=(i // 2) + 1
-            )
-        
-        # Crear partidos vacíos para las rondas siguientes (semifinales, final, etc.)
-        for ronda in range(2, num_rondas + 1):
-            partidos_en_ronda = num_equipos // (2 ** ronda)
-            for partido_num in range(1, partidos_en_ronda + 1):
-                Partido.objects.create(
+        # Se crea desde la final hacia la primera ronda, así cada partido ya
+        # nace con el partido al que avanza su ganador
+        siguientes = []
+        for ronda in range(num_rondas, 0, -1):
+            partidos = []
+            for partido_num in range(1, lugares // (2 ** ronda) + 1):
+                partido = Partido(
                     torneo=self,
-                    equipo1=None,  # Se llenarán cuando avancen los ganadores
-                    equipo2=None,
                     ronda=ronda,
-                    numero_partido=partido_num
+                    numero_partido=partido_num,
+                    siguiente=siguientes[(partido_num + 1) // 2 - 1] if siguientes else None,
                 )
+                if ronda == 1:
+                    # Primera ronda con equipos; las demás se llenan cuando avancen los ganadores
+                    partido.equipo1, partido.equipo2 = cruces[partido_num - 1]
+                    partido.aplicar_pase_libre()
+                partidos.append(partido)
+            siguientes = Partido.objects.bulk_create(partidos)
+        
+        # Los equipos con partido libre pasan a la segunda ronda
+        for partido in siguientes:
+            if partido.estado == 'WALKOVER':
+                partido.avanzar_ganador()
+        
+        # bulk_create no dispara señales
+        incrementar_version('torneos')
         
         # Cambiar estado del torneo
+        self.total_rondas = num_rondas
         self.estado = 'EN_CURSO'
         self.save()
     
@@ -306,6 +464,10 @@ class Torneo(models.Model):
         verbose_name = "Torneo"
         verbose_name_plural = "Torneos"
         ordering = ['-fecha_inicio']
+        indexes = [
+            # Torneos vigentes en el home (fecha_fin >= hoy)
+            models.Index(fields=['fecha_fin'], name='torneo_fecha_fin_idx'),
+        ]
 
 class Equipo(models.Model):
     """Modelo para gestionar equipos independientes"""
@@ -342,6 +504,17 @@ class Equipo(models.Model):
         verbose_name_plural = "Equipos"
         ordering = ['nombre']
 
+def nombre_de_ronda(ronda, total_rondas):
+    """Final, Semifinal, Cuartos de Final o Ronda N según cuántas rondas faltan"""
+    if ronda == total_rondas:
+        return "Final"
+    elif ronda == total_rondas - 1:
+        return "Semifinal"
+    elif ronda == total_rondas - 2:
+        return "Cuartos de Final"
+    return f"Ronda {ronda}"
+
+
 class Partido(models.Model):
     """Modelo para representar un partido del torneo (eliminación directa)"""
     ESTADO_CHOICES = [
@@ -410,6 +583,14 @@ class Partido(models.Model):
         blank=True,
         related_name='siguiente_partido_ganador2'
     )
+    # Partido al que avanza el ganador (null en la final)
+    siguiente = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='anteriores'
+    )
     
     def __str__(self):
         e1 = self.equipo1.nombre if self.equipo1 else 'TBD'
@@ -440,46 +621,80 @@ class Partido(models.Model):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
     
+    def aplicar_resultado(self, resultado_equipo1=None, resultado_equipo2=None, walkover=None):
+        """
+        Valida el resultado y lo asigna en memoria (ganador y estado), sin guardar.
+        
+        Con walkover='equipo1' o 'equipo2' gana ese equipo porque el otro no se
+        presentó; el partido queda en WALKOVER sin resultados.
+        """
+        if self.estado != 'PENDIENTE':
+            raise ValidationError('Este partido ya tiene un resultado registrado.')
+        if not self.equipo1_id or not self.equipo2_id:
+            raise ValidationError('El partido todavía no tiene los dos equipos definidos.')
+        
+        if walkover is not None:
+            if walkover not in ('equipo1', 'equipo2'):
+                raise ValidationError('Debe indicar qué equipo gana por walkover.')
+            self.resultado_equipo1 = self.resultado_equipo2 = None
+            self.ganador = getattr(self, walkover)
+            self.estado = 'WALKOVER'
+            return
+        
+        if resultado_equipo1 is None or resultado_equipo2 is None:
+            raise ValidationError('Debe ingresar el resultado de ambos equipos.')
+        if resultado_equipo1 < 0 or resultado_equipo2 < 0:
+            raise ValidationError('Los resultados no pueden ser negativos.')
+        self.resultado_equipo1 = resultado_equipo1
+        self.resultado_equipo2 = resultado_equipo2
+        # El clean() determina el ganador y valida que no haya empate
+        self.clean()
+    
+    def aplicar_pase_libre(self):
+        """
+        Partido libre de primera ronda (un solo equipo): gana ese equipo por
+        walkover, en memoria. Retorna True si lo aplicó.
+        
+        Las rondas siguientes no necesitan este caso: generar_fixture deja al
+        menos un equipo en cada partido de primera ronda, así que cada lugar
+        de las demás rondas lo termina llenando un ganador.
+        """
+        if self.ronda != 1 or self.estado != 'PENDIENTE' or bool(self.equipo1_id) == bool(self.equipo2_id):
+            return False
+        self.resultado_equipo1 = self.resultado_equipo2 = None
+        self.ganador_id = self.equipo1_id or self.equipo2_id
+        self.estado = 'WALKOVER'
+        return True
+
+    def registrar_resultado(self, resultado_equipo1=None, resultado_equipo2=None, walkover=None):
+        """
+        Registra el resultado y avanza al ganador en una transacción: un UPDATE
+        del partido y otro del siguiente, sin buscarlo.
+        """
+        self.aplicar_resultado(resultado_equipo1, resultado_equipo2, walkover)
+        with transaction.atomic():
+            self.save(update_fields=['resultado_equipo1', 'resultado_equipo2', 'ganador', 'estado'])
+            self.avanzar_ganador()
+    
+    @property
+    def lado_en_siguiente(self):
+        """Lugar del ganador en el siguiente partido: impar -> equipo1, par -> equipo2"""
+        return 'equipo1' if self.numero_partido % 2 == 1 else 'equipo2'
+    
     def avanzar_ganador(self):
         """Avanza al ganador a la siguiente ronda"""
-        # Buscar el partido de la siguiente ronda
-        siguiente_ronda = self.ronda + 1
-        numero_siguiente = (self.numero_partido + 1) // 2
-        
-        try:
-            siguiente_partido = Partido.objects.get(
-                torneo=self.torneo,
-                ronda=siguiente_ronda,
-                numero_partido=numero_siguiente
-            )
-            
-            # Determinar si va como equipo1 o equipo2
-            if self.numero_partido % 2 == 1:  # Impar -> equipo1
-                siguiente_partido.equipo1 = self.ganador
-                siguiente_partido.partido_anterior_equipo1 = self
-            else:  # Par -> equipo2
-                siguiente_partido.equipo2 = self.ganador
-                siguiente_partido.partido_anterior_equipo2 = self
-            
-            siguiente_partido.save()
-        except Partido.DoesNotExist:
+        if self.siguiente_id is None:
             # Es la final, no hay siguiente partido
-            pass
+            return
+        lado = self.lado_en_siguiente
+        Partido.objects.filter(pk=self.siguiente_id).update(**{
+            lado: self.ganador_id,
+            f'partido_anterior_{lado}': self.pk,
+        })
     
     def nombre_ronda(self):
         """Retorna el nombre de la ronda"""
-        total_equipos = self.torneo.equipos.count()
-        import math
-        total_rondas = int(math.log2(total_equipos)) if total_equipos > 0 else 0
-        
-        if self.ronda == total_rondas:
-            return "Final"
-        elif self.ronda == total_rondas - 1:
-            return "Semifinal"
-        elif self.ronda == total_rondas - 2:
-            return "Cuartos de Final"
-        else:
-            return f"Ronda {self.ronda}"
+        return nombre_de_ronda(self.ronda, self.torneo.total_rondas)
     
     def get_ronda_display(self):
         """Alias de nombre_ronda para compatibilidad con templates"""
@@ -487,18 +702,8 @@ class Partido(models.Model):
     
     @property
     def siguiente_partido(self):
-        """Obtiene el partido de la siguiente ronda al que avanzará el ganador"""
-        siguiente_ronda = self.ronda + 1
-        numero_siguiente = (self.numero_partido + 1) // 2
-        
-        try:
-            return Partido.objects.get(
-                torneo=self.torneo,
-                ronda=siguiente_ronda,
-                numero_partido=numero_siguiente
-            )
-        except Partido.DoesNotExist:
-            return None
+        """Partido de la siguiente ronda al que avanzará el ganador"""
+        return self.siguiente
     
     class Meta:
         verbose_name = "Partido"
@@ -507,6 +712,45 @@ class Partido(models.Model):
         unique_together = ('torneo', 'ronda', 'numero_partido')
 
 
+class SerieReserva(models.Model):
+    """
+    Reserva recurrente: el mismo horario y cancha cada una o dos semanas
+    hasta una fecha de fin. Cada ocurrencia es una Reserva con su Pago.
+    """
+    FRECUENCIA_CHOICES = [
+        ('SEMANAL', 'Semanal'),
+        ('QUINCENAL', 'Quincenal'),
+    ]
+    DIAS_ENTRE_OCURRENCIAS = {'SEMANAL': 7, 'QUINCENAL': 14}
+
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name="series")
+    cancha = models.ForeignKey(Cancha, on_delete=models.CASCADE, related_name="series")
+    hora_inicio = models.TimeField()
+    hora_fin = models.TimeField()
+    frecuencia = models.CharField(max_length=20, choices=FRECUENCIA_CHOICES, default='SEMANAL')
+    fecha_desde = models.DateField(help_text="Fecha de la primera ocurrencia")
+    fecha_hasta = models.DateField(help_text="Última fecha posible de la serie")
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return (f"Serie {self.get_frecuencia_display().lower()} de {self.cliente} en {self.cancha.nombre} "
+                f"({self.hora_inicio.strftime('%H:%M')}-{self.hora_fin.strftime('%H:%M')})")
+
+    def fechas(self):
+        """Fechas de todas las ocurrencias de la serie"""
+        paso = timedelta(days=self.DIAS_ENTRE_OCURRENCIAS[self.frecuencia])
+        fechas = []
+        fecha = self.fecha_desde
+        while fecha <= self.fecha_hasta:
+            fechas.append(fecha)
+            fecha += paso
+        return fechas
+
+    class Meta:
+        verbose_name = "Serie de Reservas"
+        verbose_name_plural = "Series de Reservas"
+        ordering = ['-fecha_creacion']
+
 class Reserva(models.Model):
     ESTADO_CHOICES = [
         ('PENDIENTE', 'Pendiente'),
@@ -526,6 +770,7 @@ class Reserva(models.Model):
     # Relaciones opcionales/adicionales
     servicios = models.ManyToManyField(Servicio, blank=True, related_name="reservas")
     torneo = models.ForeignKey(Torneo, on_delete=models.SET_NULL, null=True, blank=True, related_name="reservas")
+    serie = models.ForeignKey(SerieReserva, on_delete=models.SET_NULL, null=True, blank=True, related_name="reservas")
     
     # Observaciones
     observaciones = models.TextField(blank=True, null=True, help_text="Notas adicionales sobre la reserva")
@@ -597,14 +842,14 @@ class Reserva(models.Model):
                     'cancha': 'La cancha no está disponible en el horario seleccionado.'
                 })
         
-        # 7. Validar límite de reservas del cliente
-        if self.cliente_id and not self.cliente.puede_reservar(self.fecha_hora_inicio.date()):
+        # 7. Validar límite de reservas del cliente (al editar, la reserva no cuenta dos veces)
+        if self.cliente_id and not self.cliente.puede_reservar(self.fecha_hora_inicio.date(), excluir=self.pk):
             raise ValidationError({
                 'cliente': f'El cliente ya alcanzó el límite de {MAX_RESERVAS_POR_CLIENTE_DIA} reservas para este día.'
             })
         
         # 8. Validar que la cancha esté activa
-        if self.cancha_id and not self.cancha.activa:
+        if self.cancha_id and not self._cancha_del_catalogo().activa:
             raise ValidationError({
                 'cancha': 'Esta cancha no está disponible para reservas.'
             })
@@ -615,71 +860,51 @@ class Reserva(models.Model):
                 'cliente': 'Este cliente no está activo en el sistema.'
             })
     
-    # PATRÓN STRATEGY
+    # PRECIOS (las estrategias de descuento son reglas, ver ReglaPrecio)
+    
+    def save(self, *args, **kwargs):
+        with horario_no_disponible_como_validacion():
+            super().save(*args, **kwargs)
+
+    def _cancha_del_catalogo(self):
+        """La cancha desde el catálogo en memoria (sin consulta), o la relación si no está"""
+        from .catalogo import cancha
+        return cancha(self.cancha_id) or self.cancha
     
     def _calcular_costo_base(self):
         """Calcula el costo base (cancha + servicios) sin descuentos"""
-        horas = (self.fecha_hora_fin - self.fecha_hora_inicio).total_seconds() / 3600
-        costo_cancha = Decimal(str(self.cancha.precio_por_hora)) * Decimal(str(horas))
-        costo_servicios = sum(Decimal(str(s.costo_adicional)) for s in self.servicios.all())
-        return costo_cancha + costo_servicios
-    
-    def _aplicar_descuento_cliente_frecuente(self):
-        """Descuento 10% si el cliente tiene 5+ reservas pagadas"""
-        reservas_pagadas = self.cliente.reservas.filter(estado='PAGADA').count()
-        if reservas_pagadas >= 5:
-            costo_base = self._calcular_costo_base()
-            return costo_base * Decimal('0.90')  # 10% descuento
-        return self._calcular_costo_base()
-    
-    def _aplicar_descuento_horario(self):
-        """Descuento 15% si la reserva es entre 8:00-12:00"""
-        hora_inicio = self.fecha_hora_inicio.time()
-        if time(8, 0) <= hora_inicio < time(12, 0):
-            costo_base = self._calcular_costo_base()
-            return costo_base * Decimal('0.85')  # 15% descuento
-        return self._calcular_costo_base()
+        costo_cancha = costo_por_tiempo(
+            self._cancha_del_catalogo().precio_por_hora, self.fecha_hora_inicio, self.fecha_hora_fin
+        )
+        return costo_cancha + sumar(s.costo_adicional for s in self.servicios.all())
     
-    def _aplicar_recargo_horario_pico(self):
-        """Recargo 20% si la reserva es entre 18:00-22:00"""
-        hora_inicio = self.fecha_hora_inicio.time()
-        if time(18, 0) <= hora_inicio < time(22, 0):
-            costo_base = self._calcular_costo_base()
-            return costo_base * Decimal('1.20')  # 20% recargo
-        return self._calcular_costo_base()
+    def _reservas_pagadas_del_cliente(self):
+        return self.cliente.reservas_pagadas_registradas()
     
-    def _aplicar_descuento_torneo(self):
-        """Descuento 25% si la reserva es para un torneo"""
-        if self.torneo is not None:
-            costo_base = self._calcular_costo_base()
-            return costo_base * Decimal('0.75')  # 25% descuento
-        return self._calcular_costo_base()
+    def cotizar(self):
+        """Desglose del precio con las reglas de precio (ver reservas/precios.py)"""
+        from .precios import cotizar
+        return cotizar(
+            self._cancha_del_catalogo(), self.fecha_hora_inicio, self.fecha_hora_fin, self.servicios.all(),
+            reservas_pagadas=self._reservas_pagadas_del_cliente(),
+            con_torneo=self.torneo_id is not None,
+        )
     
     def calcular_costo_total(self, usar_mejor_precio=False):
-        """Calcula el costo total (usar_mejor_precio=True aplica el mejor descuento)"""
+        """Calcula el costo total como Decimal (usar_mejor_precio=True aplica las reglas de precio)"""
         if not self.fecha_hora_inicio or not self.fecha_hora_fin:
-            return 0
+            return CERO
         
-        # Patrón Strategy: Usar estrategias de cálculo de costo
         if usar_mejor_precio:
-            # Calcular con todas las estrategias y elegir la mejor
-            estrategias = [
-                self._calcular_costo_base(),
-                self._aplicar_descuento_cliente_frecuente(),
-                self._aplicar_descuento_horario(),
-                self._aplicar_descuento_torneo(),
-            ]
-            mejor_precio = min(estrategias)
-            return float(mejor_precio)
-        else:
-            # Cálculo estándar (comportamiento original)
-            return float(self._calcular_costo_base())
+            return self.cotizar()['total']
+        # Cálculo estándar (comportamiento original)
+        return self._calcular_costo_base()
     
     def duracion_horas(self):
         """Retorna la duración de la reserva en horas"""
         if not self.fecha_hora_inicio or not self.fecha_hora_fin:
             return 0
-        return (self.fecha_hora_fin - self.fecha_hora_inicio).total_seconds() / 3600
+        return horas(self.fecha_hora_fin - self.fecha_hora_inicio)
     
     # PATRÓN STATE
     
@@ -760,6 +985,10 @@ class Reserva(models.Model):
             self.pago.estado = 'REEMBOLSADO'
             self.pago.save()
         
+        # Ofrecer el horario liberado a la lista de espera
+        from .lista_espera import programar_promocion
+        programar_promocion(self)
+        
         return True
     
     def get_info_estado(self):
@@ -791,11 +1020,99 @@ class Reserva(models.Model):
         }
 
     class Meta:
-        # Evita que se pueda reservar la misma cancha en el mismo horario
-        unique_together = ('cancha', 'fecha_hora_inicio')
         verbose_name = "Reserva"
         verbose_name_plural = "Reservas"
         ordering = ['-fecha_hora_inicio']
+        indexes = [
+            # Conteos por estado (home) y filtro por estado de reserva_lista (orden por -id)
+            models.Index(fields=['estado', 'id'], name='reserva_estado_id_idx'),
+            # Rangos de fechas de los reportes
+            models.Index(fields=['fecha_hora_inicio'], name='reserva_inicio_idx'),
+            # Reservas de un torneo por estado (torneo_detalle), con el orden por defecto
+            models.Index(fields=['torneo', 'estado', 'fecha_hora_inicio'], name='reserva_torneo_estado_idx'),
+            # Disponibilidad de una cancha: solo recorre las reservas activas del rango
+            models.Index(fields=['cancha', 'estado', 'fecha_hora_inicio'], name='reserva_cancha_estado_idx'),
+            # Pendientes vencidas (vencer_reservas)
+            models.Index(fields=['fecha_creacion'], condition=models.Q(estado='PENDIENTE'),
+                         name='reserva_pendiente_creacion_idx'),
+        ]
+        constraints = [
+            # Evita que se pueda reservar la misma cancha en el mismo horario. Las
+            # canceladas no cuentan, para que el horario se pueda volver a reservar
+            models.UniqueConstraint(
+                fields=['cancha', 'fecha_hora_inicio'],
+                condition=models.Q(estado__in=['PENDIENTE', 'PAGADA']),
+                name='reserva_cancha_inicio_activa',
+                violation_error_message=HORARIO_NO_DISPONIBLE,
+            ),
+            models.CheckConstraint(
+                check=models.Q(fecha_hora_fin__gt=models.F('fecha_hora_inicio')),
+                name='reserva_fin_posterior_inicio',
+                violation_error_message='La fecha de fin debe ser posterior a la fecha de inicio.',
+            ),
+        ]
+
+class EsperaReserva(models.Model):
+    """
+    Cliente anotado en la lista de espera de un horario ocupado. Cuando se
+    cancela una reserva de esa cancha, la primera espera que entra en el
+    horario liberado se convierte en una Reserva pendiente de pago.
+    """
+    ESTADO_CHOICES = [
+        ('ESPERANDO', 'Esperando'),
+        ('PROMOVIDA', 'Promovida'),
+        ('CANCELADA', 'Cancelada'),
+    ]
+
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name="esperas")
+    cancha = models.ForeignKey(Cancha, on_delete=models.CASCADE, related_name="esperas")
+    fecha_hora_inicio = models.DateTimeField()
+    fecha_hora_fin = models.DateTimeField()
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='ESPERANDO')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    reserva = models.OneToOneField(Reserva, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name="espera", help_text="Reserva creada al promover la espera")
+
+    def __str__(self):
+        return (f"Espera de {self.cliente} en {self.cancha.nombre} - "
+                f"{timezone.localtime(self.fecha_hora_inicio).strftime('%d/%m/%Y %H:%M')}")
+
+    def clean(self):
+        super().clean()
+
+        if not self.fecha_hora_inicio or not self.fecha_hora_fin:
+            return
+
+        if self.fecha_hora_fin <= self.fecha_hora_inicio:
+            raise ValidationError({
+                'fecha_hora_fin': 'La fecha de fin debe ser posterior a la fecha de inicio.'
+            })
+
+        if self.fecha_hora_inicio < timezone.now():
+            raise ValidationError({
+                'fecha_hora_inicio': 'No se pueden hacer reservas en el pasado.'
+            })
+
+    class Meta:
+        verbose_name = "Espera de Reserva"
+        verbose_name_plural = "Lista de Espera"
+        ordering = ['fecha_creacion']
+        indexes = [
+            # Esperas de una cancha dentro del horario liberado (solo las activas)
+            models.Index(
+                fields=['cancha', 'fecha_hora_inicio', 'fecha_hora_fin'],
+                condition=models.Q(estado='ESPERANDO'),
+                name='espera_cancha_horario_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cliente', 'cancha', 'fecha_hora_inicio'],
+                condition=models.Q(estado='ESPERANDO'),
+                name='espera_unica_por_horario',
+                violation_error_message='El cliente ya está en la lista de espera de ese horario.',
+            ),
+        ]
 
 class Pago(models.Model):
     """
@@ -806,6 +1123,7 @@ class Pago(models.Model):
         ('PENDIENTE', 'Pendiente'),
         ('PAGADO', 'Pagado'),
         ('REEMBOLSADO', 'Reembolsado'),
+        ('ANULADO', 'Anulado'),
     ]
 
     METODO_PAGO_CHOICES = [
@@ -880,4 +1198,9 @@ class Pago(models.Model):
     
     class Meta:
         verbose_name = "Pago"
-        verbose_name_plural = "Pagos"
\ No newline at end of file
+        verbose_name_plural = "Pagos"
+        indexes = [
+            # Filtro por estado + orden por fecha_pago del admin
+            models.Index(fields=['estado', 'fecha_pago'], name='pago_estado_fecha_idx'),
+            models.Index(fields=['fecha_pago'], name='pago_fecha_pago_idx'),
+        ]
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Cliente async de MercadoPago para las vistas async.
+
+La preferencia de pago se crea con un cliente HTTP async (httpx, en
+requirements.txt): mientras se espera a MercadoPago no se ocupa ningún hilo.
+
+MERCADOPAGO_CLIENTE = 'sdk' es un modo degradado explícito, para entornos
+sin httpx: usa el SDK oficial (sincrónico) en el pool de hilos de asgiref,
+fuera del hilo de la base del request, y ocupa un hilo por pago en curso.
+Las dos variantes retornan lo mismo que el SDK:
+{'status': código HTTP, 'response': JSON de la respuesta}.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+import logging
+
+try:
+    import httpx
+except ImportError:
+    # Se informa al crear una preferencia, no al importar: el resto del sitio funciona igual
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+URL_PREFERENCIAS = 'https://api.mercadopago.com/checkout/preferences'
+CLIENTES = ('httpx', 'sdk')
+
+
+def cliente_configurado():
+    """El cliente elegido con MERCADOPAGO_CLIENTE; httpx si no se definió"""
+    cliente = getattr(settings, 'MERCADOPAGO_CLIENTE', 'httpx')
+    if cliente not in CLIENTES:
+        raise ImproperlyConfigured(f"MERCADOPAGO_CLIENTE debe ser uno de {', '.join(CLIENTES)}, no {cliente!r}.")
+    if cliente == 'httpx' and httpx is None:
+        raise ImproperlyConfigured(
+            "httpx no está instalado: instalar requirements.txt o definir MERCADOPAGO_CLIENTE = 'sdk' "
+            "(modo degradado, ocupa un hilo por pago)."
+        )
+    return cliente
+
+
+async def crear_preferencia(access_token, datos):
+    timeout = getattr(settings, 'MERCADOPAGO_TIMEOUT_SEGUNDOS', 10)
+    if cliente_configurado() == 'sdk':
+        logger.warning('MercadoPago en modo degradado (MERCADOPAGO_CLIENTE=sdk): la preferencia ocupa un hilo')
+        return await sync_to_async(_crear_preferencia_sdk, thread_sensitive=False)(access_token, datos, timeout)
+
+    async with httpx.AsyncClient(timeout=timeout) as cliente:
+        respuesta = await cliente.post(
+            URL_PREFERENCIAS,
+            json=datos,
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+    return {'status': respuesta.status_code, 'response': respuesta.json()}
+
+
+def _crear_preferencia_sdk(access_token, datos, timeout):
+    import mercadopago
+    from mercadopago.config import RequestOptions
+
+    sdk = mercadopago.SDK(access_token, request_options=RequestOptions(connection_timeout=timeout))
+    return sdk.preference().create(datos)
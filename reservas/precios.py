@@ -0,0 +1,131 @@
+"""
+Precios de las reservas a partir de las reglas de precio (ReglaPrecio).
+
+Las reglas activas se compilan en una tabla en memoria indexada por día de la
+semana y tipo de cancha, que cada proceso guarda junto con la versión
+'precios' de la caché compartida. Cada cálculo solo lee esa versión (un get a
+la caché, sin consultas a la base); cuando cambia una regla las señales
+incrementan la versión y cada proceso recompila la tabla una sola vez.
+"""
+from dataclasses import dataclass
+from datetime import time
+from decimal import Decimal
+from django.utils import timezone
+from .dinero import CERO, costo_por_tiempo, dinero, sumar
+from .models import ReglaPrecio
+from .versiones import obtener_version
+import threading
+
+_lock = threading.Lock()
+_compiladas = {'version': None, 'tabla': {}}
+
+
+@dataclass(frozen=True)
+class ReglaCompilada:
+    nombre: str
+    porcentaje: Decimal
+    hora_desde: time = None
+    hora_hasta: time = None
+    reservas_pagadas_minimas: int = 0
+    solo_torneos: bool = False
+    prioridad: int = 0
+    acumulable: bool = False
+
+    def aplica(self, hora, reservas_pagadas, con_torneo):
+        if self.hora_desde is not None and not self.hora_desde <= hora < self.hora_hasta:
+            return False
+        if reservas_pagadas < self.reservas_pagadas_minimas:
+            return False
+        return con_torneo or not self.solo_torneos
+
+
+def compilar_reglas(reglas):
+    """
+    Retorna {(día, tipo_cancha_id): reglas ordenadas por prioridad}. La clave
+    (día, None) tiene las reglas para cualquier tipo de cancha; las de un tipo
+    puntual ya incluyen esas.
+    """
+    generales = {dia: [] for dia in range(7)}
+    por_tipo = {}
+    for regla in reglas:
+        compilada = ReglaCompilada(
+            nombre=regla.nombre,
+            porcentaje=regla.porcentaje,
+            hora_desde=regla.hora_desde,
+            hora_hasta=regla.hora_hasta,
+            reservas_pagadas_minimas=regla.reservas_pagadas_minimas,
+            solo_torneos=regla.solo_torneos,
+            prioridad=regla.prioridad,
+            acumulable=regla.acumulable,
+        )
+        for dia in regla.dias() or range(7):
+            if regla.tipo_cancha_id is None:
+                generales[dia].append(compilada)
+            else:
+                por_tipo.setdefault((dia, regla.tipo_cancha_id), []).append(compilada)
+
+    tabla = {(dia, None): reglas_dia for dia, reglas_dia in generales.items()}
+    for (dia, tipo_cancha_id), reglas_tipo in por_tipo.items():
+        tabla[(dia, tipo_cancha_id)] = reglas_tipo + generales[dia]
+    return {clave: tuple(sorted(valor, key=lambda r: -r.prioridad)) for clave, valor in tabla.items()}
+
+
+def tabla_de_reglas():
+    """La tabla compilada de este proceso, recompilada si cambió la versión 'precios'"""
+    version = obtener_version('precios')
+    if _compiladas['version'] != version:
+        with _lock:
+            if _compiladas['version'] != version:
+                _compiladas['tabla'] = compilar_reglas(ReglaPrecio.objects.filter(activa=True))
+                _compiladas['version'] = version
+    return _compiladas['tabla']
+
+
+def reglas_aplicables(inicio, tipo_cancha_id, reservas_pagadas=0, con_torneo=False):
+    """La mejor regla no acumulable que aplica (si hay) seguida de las acumulables"""
+    if timezone.is_aware(inicio):
+        inicio = timezone.localtime(inicio)
+    tabla = tabla_de_reglas()
+    candidatas = tabla.get((inicio.weekday(), tipo_cancha_id)) or tabla.get((inicio.weekday(), None), ())
+    hora = inicio.time()
+    aplicables = [regla for regla in candidatas if regla.aplica(hora, reservas_pagadas, con_torneo)]
+
+    exclusivas = [regla for regla in aplicables if not regla.acumulable]
+    elegidas = [max(exclusivas, key=lambda r: (r.prioridad, -r.porcentaje))] if exclusivas else []
+    return elegidas + [regla for regla in aplicables if regla.acumulable]
+
+
+def cotizar(cancha, inicio, fin, servicios=(), reservas_pagadas=0, con_torneo=False):
+    """Desglose del precio de una reserva sin crearla (ver cotizar_precio)"""
+    return cotizar_precio(
+        cancha.precio_por_hora, cancha.tipo_cancha_id, inicio, fin,
+        [servicio.costo_adicional for servicio in servicios], reservas_pagadas, con_torneo,
+    )
+
+
+def cotizar_precio(precio_por_hora, tipo_cancha_id, inicio, fin, costos_servicios=(), reservas_pagadas=0,
+                   con_torneo=False):
+    """
+    Desglose del precio: costo de la cancha, de los servicios, las reglas
+    aplicadas con su monto y el total. Cada regla se calcula sobre el costo
+    base; el total nunca es negativo.
+    """
+    costo_cancha = costo_por_tiempo(precio_por_hora, inicio, fin)
+    costo_servicios = sumar(costos_servicios)
+    base = costo_cancha + costo_servicios
+
+    ajustes = []
+    for regla in reglas_aplicables(inicio, tipo_cancha_id, reservas_pagadas, con_torneo):
+        ajustes.append({
+            'nombre': regla.nombre,
+            'porcentaje': regla.porcentaje,
+            'monto': dinero(base * regla.porcentaje / 100),
+        })
+    return {
+        'cancha': costo_cancha,
+        'servicios': costo_servicios,
+        'base': base,
+        'reglas': ajustes,
+        'total': max(base + sumar(ajuste['monto'] for ajuste in ajustes), CERO),
+    }
+
@@ -0,0 +1,328 @@
+"""
+PDF de reportes (reportes_pdf).
+
+El documento se escribe en un archivo temporal y se envía con FileResponse en
+bloques: el PDF nunca está entero en memoria ni se copia a la respuesta. Los
+estilos de párrafo y de tabla se crean una sola vez, al importar el módulo.
+
+Las tablas largas (el detalle por cliente o por cancha) se parten en tablas de
+FILAS_POR_TABLA filas con el encabezado repetido. Así reportlab no vuelve a
+medir todas las filas restantes de una tabla enorme cada vez que la corta en
+una página nueva.
+"""
+from asgiref.sync import sync_to_async
+from django.http import FileResponse
+from django.utils import timezone
+from itertools import islice
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import KeepTogether, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from xml.sax.saxutils import escape
+from .dinero import formatear, sumar
+import tempfile
+
+FILAS_POR_TABLA = 40
+TAMANIO_BLOQUE = 64 * 1024
+
+_estilos = getSampleStyleSheet()
+
+ESTILO_TITULO = ParagraphStyle(
+    'CustomTitle',
+    parent=_estilos['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#1e3a8a'),
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold',
+)
+ESTILO_SUBTITULO = ParagraphStyle(
+    'CustomSubtitle',
+    parent=_estilos['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#1e3a8a'),
+    spaceAfter=12,
+    spaceBefore=20,
+    fontName='Helvetica-Bold',
+)
+ESTILO_DETALLE = ParagraphStyle(
+    'Detalle',
+    parent=_estilos['Heading3'],
+    fontSize=11,
+    textColor=colors.HexColor('#1e3a8a'),
+    spaceAfter=6,
+    spaceBefore=14,
+    fontName='Helvetica-Bold',
+)
+ESTILO_NORMAL = ParagraphStyle(
+    'CustomNormal',
+    parent=_estilos['Normal'],
+    fontSize=10,
+    textColor=colors.black,
+    spaceAfter=6,
+)
+ESTILO_PIE = ParagraphStyle(
+    'Footer',
+    parent=_estilos['Normal'],
+    fontSize=8,
+    textColor=colors.grey,
+    alignment=TA_CENTER,
+)
+
+_CELDAS = [
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')]),
+]
+TABLA_AZUL = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+] + _CELDAS)
+TABLA_VERDE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#84cc16')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
+] + _CELDAS)
+TABLA_MESES = TableStyle([('FONTSIZE', (0, 1), (-1, -1), 10)], parent=TABLA_VERDE)
+TABLA_DETALLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')]),
+])
+
+
+class ReportePDF:
+    """Arma el documento por secciones y lo escribe en un archivo temporal"""
+
+    def __init__(self):
+        self.elementos = []
+
+    def parrafo(self, texto, estilo=ESTILO_NORMAL):
+        self.elementos.append(Paragraph(texto, estilo))
+
+    def espacio(self, alto=0.3 * inch):
+        self.elementos.append(Spacer(1, alto))
+
+    def salto_de_pagina(self):
+        self.elementos.append(PageBreak())
+
+    def tabla(self, encabezado, filas, anchos, estilo):
+        """Agrega las filas en tablas de FILAS_POR_TABLA filas, cada una con el encabezado"""
+        filas = iter(filas)
+        while tramo := list(islice(filas, FILAS_POR_TABLA)):
+            self.elementos.append(Table([encabezado] + tramo, colWidths=anchos, style=estilo, repeatRows=1))
+
+    def seccion_de_detalle(self, titulo, encabezado, filas, anchos, pie):
+        """Título y tabla de una sección de detalle; el título no queda solo al pie de una página"""
+        inicio = len(self.elementos)
+        self.parrafo(escape(titulo), ESTILO_DETALLE)
+        self.tabla(encabezado, filas, anchos, TABLA_DETALLE)
+        self.elementos[inicio:inicio + 2] = [KeepTogether(self.elementos[inicio:inicio + 2])]
+        self.parrafo(pie)
+
+    def construir(self):
+        """El archivo temporal con el PDF, al principio; se borra al cerrarlo"""
+        archivo = tempfile.TemporaryFile()
+        doc = SimpleDocTemplate(archivo, pagesize=A4,
+                                rightMargin=50, leftMargin=50,
+                                topMargin=50, bottomMargin=50)
+        try:
+            doc.build(self.elementos)
+        except BaseException:
+            archivo.close()
+            raise
+        archivo.seek(0)
+        return archivo
+
+
+def secciones_por_cliente(reservas, canchas):
+    """
+    Detalle de reservas agrupado por cliente (apellido y nombre). Las reservas
+    llegan con importe y cliente cargados; canchas es el dict del catálogo.
+    """
+    secciones = {}
+    for reserva in sorted(reservas, key=lambda r: (r.cliente.apellido, r.cliente.nombre, r.cliente_id)):
+        cliente = reserva.cliente
+        seccion = secciones.setdefault(cliente.pk, {
+            'titulo': f"{cliente.apellido}, {cliente.nombre} (DNI {cliente.dni})", 'reservas': [],
+        })
+        seccion['reservas'].append((reserva, canchas[reserva.cancha_id].nombre))
+    return [_seccion(seccion) for seccion in secciones.values()]
+
+
+def secciones_por_cancha(reservas, canchas):
+    """Detalle de reservas agrupado por cancha, en el orden del catálogo por nombre"""
+    secciones = {}
+    for reserva in sorted(reservas, key=lambda r: (canchas[r.cancha_id].nombre, r.cancha_id)):
+        cancha = canchas[reserva.cancha_id]
+        seccion = secciones.setdefault(cancha.pk, {
+            'titulo': f"{cancha.nombre} ({cancha.tipo_cancha.nombre})", 'reservas': [],
+        })
+        seccion['reservas'].append((reserva, f"{reserva.cliente.nombre} {reserva.cliente.apellido}"))
+    return [_seccion(seccion) for seccion in secciones.values()]
+
+
+def _seccion(seccion):
+    """Filas de texto de la tabla; sorted() es estable, así que siguen en orden de fecha"""
+    filas = []
+    for reserva, detalle in seccion['reservas']:
+        inicio, fin = timezone.localtime(reserva.fecha_hora_inicio), timezone.localtime(reserva.fecha_hora_fin)
+        filas.append([
+            inicio.strftime('%d/%m/%Y'),
+            f"{inicio:%H:%M}-{fin:%H:%M}",
+            detalle,
+            reserva.get_estado_display(),
+            formatear(reserva.importe),
+        ])
+    return {
+        'titulo': seccion['titulo'],
+        'filas': filas,
+        'total': sumar(reserva.importe for reserva, _ in seccion['reservas']),
+    }
+
+
+def construir_reporte(mes_seleccionado, anio_seleccionado, clientes_stats, canchas_stats, meses_data, resumen,
+                      detalle_clientes=None, detalle_canchas=None):
+    """
+    Arma el PDF de reportes_pdf() con los datos ya calculados (no consulta la
+    base) y retorna el archivo temporal. detalle_clientes y detalle_canchas son
+    las secciones de secciones_por_cliente() y secciones_por_cancha().
+    """
+    pdf = ReportePDF()
+
+    # ===== ENCABEZADO =====
+    pdf.parrafo("Sistema de Reservas de Canchas", ESTILO_TITULO)
+    pdf.parrafo(f"Reporte del Período: {mes_seleccionado}/{anio_seleccionado}")
+    pdf.parrafo(f"Fecha de generación: {timezone.now().strftime('%d/%m/%Y %H:%M')}")
+    pdf.espacio()
+
+    if clientes_stats:
+        pdf.parrafo("1. Top 10 Clientes por Gasto Total", ESTILO_SUBTITULO)
+        pdf.tabla(
+            ['#', 'Cliente', 'DNI', 'Reservas', 'Gasto Total'],
+            ([
+                str(idx),
+                f"{item['nombre']} {item['apellido']}",
+                str(item['dni']),
+                str(item['num_reservas']),
+                formatear(item['total_gasto'])
+            ] for idx, item in enumerate(clientes_stats, 1)),
+            [0.5*inch, 2*inch, 1.2*inch, 1*inch, 1.3*inch], TABLA_AZUL,
+        )
+        pdf.espacio()
+
+    if canchas_stats:
+        pdf.parrafo("2. Distribución de Ingresos por Cancha", ESTILO_SUBTITULO)
+        pdf.tabla(
+            ['#', 'Cancha', 'Deporte', 'Reservas', 'Horas', 'Ingresos'],
+            ([
+                str(idx),
+                item['nombre'],
+                item['tipo_deporte'],
+                str(item['num_reservas']),
+                f"{item['total_horas']:.1f}h",
+                formatear(item['total_ingresos'])
+            ] for idx, item in enumerate(canchas_stats, 1)),
+            [0.5*inch, 1.8*inch, 1*inch, 0.8*inch, 0.8*inch, 1.2*inch], TABLA_VERDE,
+        )
+        pdf.espacio()
+
+        # REPORTE 3: Ranking de Canchas por Número de Reservas
+        pdf.parrafo("3. Ranking de Canchas Más Utilizadas", ESTILO_SUBTITULO)
+        canchas_ranking = sorted(canchas_stats, key=lambda x: -x['num_reservas'])[:10]
+        pdf.tabla(
+            ['Posición', 'Cancha', 'Tipo Deporte', 'Reservas', 'Ingresos'],
+            ([
+                f"{idx}°",
+                item['nombre'],
+                item['tipo_deporte'],
+                str(item['num_reservas']),
+                formatear(item['total_ingresos'])
+            ] for idx, item in enumerate(canchas_ranking, 1)),
+            [0.8*inch, 2*inch, 1.2*inch, 1*inch, 1.2*inch], TABLA_AZUL,
+        )
+        pdf.espacio()
+
+    # REPORTE 4: Estadísticas Mensuales (últimos 6 meses)
+    pdf.salto_de_pagina()
+    pdf.parrafo("4. Estadísticas de los Últimos 6 Meses", ESTILO_SUBTITULO)
+    if meses_data:
+        pdf.tabla(
+            ['Mes', 'Año', 'Reservas', 'Horas Totales'],
+            ([
+                item['mes'],
+                str(item['anio']),
+                str(item['reservas']),
+                f"{item['horas']:.1f}h"
+            ] for item in meses_data),
+            [1.5*inch, 1*inch, 1.5*inch, 1.5*inch], TABLA_MESES,
+        )
+
+    # RESUMEN FINAL
+    pdf.espacio(0.5*inch)
+    pdf.parrafo(f"""
+    <b>Resumen del Período {mes_seleccionado}/{anio_seleccionado}:</b><br/>
+    • Total de reservas: {resumen['total_reservas']}<br/>
+    • Ingresos totales: {formatear(resumen['total_ingresos'])}<br/>
+    • Clientes únicos: {resumen['clientes']}<br/>
+    • Canchas utilizadas: {resumen['canchas']}
+    """)
+
+    # DETALLE: una sección por cliente o por cancha con cada reserva del período
+    numero = 5
+    for titulo, secciones, columna in (("Detalle por Cliente", detalle_clientes, 'Cancha'),
+                                       ("Detalle por Cancha", detalle_canchas, 'Cliente')):
+        if secciones is None:
+            continue
+        pdf.salto_de_pagina()
+        pdf.parrafo(f"{numero}. {titulo}", ESTILO_SUBTITULO)
+        numero += 1
+        for seccion in secciones:
+            pdf.seccion_de_detalle(
+                seccion['titulo'],
+                ['Fecha', 'Horario', columna, 'Estado', 'Importe'],
+                seccion['filas'],
+                [1*inch, 1.1*inch, 2.2*inch, 1*inch, 1.2*inch],
+                f"{len(seccion['filas'])} reservas - Total: {formatear(seccion['total'])}",
+            )
+
+    # Footer
+    pdf.espacio(0.5*inch)
+    pdf.parrafo(
+        f"Documento generado automáticamente - {timezone.now().strftime('%d/%m/%Y %H:%M:%S')}",
+        ESTILO_PIE,
+    )
+    return pdf.construir()
+
+
+def respuesta_pdf(archivo, nombre, asincronica=False):
+    """
+    FileResponse que envía el archivo en bloques de TAMANIO_BLOQUE y lo cierra
+    (y así lo borra) al terminar. Con ASGI Django lee entero un iterador sync
+    antes de enviarlo, por eso en ese caso el archivo se lee con un iterador
+    async, un bloque por vez en un hilo del pool.
+    """
+    response = FileResponse(archivo, as_attachment=True, filename=nombre, content_type='application/pdf')
+    response.block_size = TAMANIO_BLOQUE
+    if asincronica:
+        response.streaming_content = _leer_en_bloques(archivo)
+    return response
+
+
+async def _leer_en_bloques(archivo):
+    leer = sync_to_async(archivo.read, thread_sensitive=False)
+    while bloque := await leer(TAMANIO_BLOQUE):
+        yield bloque
@@ -0,0 +1,112 @@
+"""
+Totales de los reportes, agregados en la base de datos.
+
+El importe de una reserva es el monto de su pago (lo que se cobró, con las
+reglas de precio aplicadas); las reservas sin pago usan su costo base. Las
+sumas de importes y de duraciones las hace la base con Sum, así que los
+montos llegan como Decimal sin pasar por float ni recorrer las reservas.
+
+Las funciones con prefijo a son las mismas para las vistas async: recorren las
+consultas con async for y calculan el costo base de las reservas sin pago en
+el hilo de la base (sync_to_async).
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum, prefetch_related_objects
+from django.db.models.functions import TruncMonth
+from .dinero import CERO, dinero, horas
+
+DURACION = ExpressionWrapper(F('fecha_hora_fin') - F('fecha_hora_inicio'), output_field=DurationField())
+
+
+def reservas_con_importe(reservas):
+    """
+    Lista de reservas con el atributo importe (monto del pago o costo base).
+    Los servicios solo se cargan para las reservas sin pago.
+    """
+    return _completar_importes(list(reservas.annotate(importe=F('pago__monto_total'))))
+
+
+async def areservas_con_importe(reservas):
+    reservas = [reserva async for reserva in reservas.annotate(importe=F('pago__monto_total'))]
+    return await sync_to_async(_completar_importes)(reservas)
+
+
+def _completar_importes(reservas):
+    sin_pago = [reserva for reserva in reservas if reserva.importe is None]
+    prefetch_related_objects(sin_pago, 'servicios')
+    for reserva in sin_pago:
+        reserva.importe = reserva.calcular_costo_total()
+    return reservas
+
+
+def totales_por(reservas, campo):
+    """
+    {valor de campo: {'num_reservas', 'total_horas', 'total_importe'}} de las
+    reservas agrupadas por campo ('cliente_id', 'cancha_id'), con una consulta
+    agregada más el costo base de las reservas que no tienen pago.
+    """
+    totales = _totales(_filas_por(reservas, campo), campo)
+    for reserva in reservas_con_importe(_sin_pago(reservas)):
+        totales[getattr(reserva, campo)]['total_importe'] += reserva.importe
+    return totales
+
+
+async def atotales_por(reservas, campo):
+    totales = _totales([fila async for fila in _filas_por(reservas, campo)], campo)
+    for reserva in await areservas_con_importe(_sin_pago(reservas)):
+        totales[getattr(reserva, campo)]['total_importe'] += reserva.importe
+    return totales
+
+
+def _filas_por(reservas, campo):
+    return reservas.order_by().values(campo).annotate(
+        num_reservas=Count('pk'),
+        duracion=Sum(DURACION),
+        importe=Sum('pago__monto_total'),
+    )
+
+
+def _sin_pago(reservas):
+    return reservas.filter(pago__isnull=True).select_related('cancha')
+
+
+def _totales(filas, campo):
+    return {
+        fila[campo]: {
+            'num_reservas': fila['num_reservas'],
+            'total_horas': horas(fila['duracion']),
+            'total_importe': dinero(fila['importe']),
+        }
+        for fila in filas
+    }
+
+
+def totales_por_mes(reservas):
+    """{(año, mes): {'total_reservas', 'total_horas'}} en hora local"""
+    return _totales_mensuales(_filas_por_mes(reservas))
+
+
+async def atotales_por_mes(reservas):
+    return _totales_mensuales([fila async for fila in _filas_por_mes(reservas)])
+
+
+def _filas_por_mes(reservas):
+    return reservas.order_by().annotate(mes=TruncMonth('fecha_hora_inicio')).values('mes').annotate(
+        total_reservas=Count('pk'),
+        duracion=Sum(DURACION),
+    )
+
+
+def _totales_mensuales(filas):
+    return {
+        (fila['mes'].year, fila['mes'].month): {
+            'total_reservas': fila['total_reservas'],
+            'total_horas': horas(fila['duracion']),
+        }
+        for fila in filas
+    }
+
+
+def total_importes(totales):
+    """Suma de total_importe de un resultado de totales_por"""
+    return sum((fila['total_importe'] for fila in totales.values()), CERO)
@@ -0,0 +1,129 @@
+"""
+Creación de series de reservas recurrentes.
+
+Todas las ocurrencias se validan juntas con validar_reservas() (una sola
+consulta a las reservas existentes) y se crean en bloque, con sus pagos,
+dentro de una transacción.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from datetime import datetime
+from .models import (
+    Reserva, Pago, SerieReserva, horario_no_disponible_como_validacion,
+    HORA_APERTURA, HORA_CIERRE, DURACION_MINIMA_RESERVA, DURACION_MAXIMA_RESERVA,
+)
+from .estadisticas import registrar_reservas_nuevas
+from .eventos import publicar_ocupadas
+from .precios import cotizar
+from .validacion import validar_reservas
+from .versiones import incrementar_version
+
+MAX_OCURRENCIAS_SERIE = 104
+
+
+def _validar_serie(serie):
+    """Validaciones que valen para todas las ocurrencias a la vez"""
+    if serie.fecha_hasta < serie.fecha_desde:
+        raise ValidationError({'fecha_hasta': 'La fecha de fin de la serie debe ser posterior a la de inicio.'})
+
+    if serie.hora_fin <= serie.hora_inicio:
+        raise ValidationError({'hora_fin': 'La hora de fin debe ser posterior a la hora de inicio.'})
+
+    if serie.hora_inicio < HORA_APERTURA:
+        raise ValidationError({'hora_inicio': f'El complejo abre a las {HORA_APERTURA.strftime("%H:%M")}.'})
+
+    if serie.hora_fin > HORA_CIERRE:
+        raise ValidationError({'hora_fin': f'El complejo cierra a las {HORA_CIERRE.strftime("%H:%M")}.'})
+
+    duracion = (datetime.combine(serie.fecha_desde, serie.hora_fin)
+                - datetime.combine(serie.fecha_desde, serie.hora_inicio)).total_seconds() / 3600
+    if duracion < DURACION_MINIMA_RESERVA:
+        raise ValidationError({
+            'hora_fin': f'La duración mínima de una reserva es de {DURACION_MINIMA_RESERVA} hora(s).'
+        })
+    if duracion > DURACION_MAXIMA_RESERVA:
+        raise ValidationError({
+            'hora_fin': f'La duración máxima de una reserva es de {DURACION_MAXIMA_RESERVA} horas.'
+        })
+
+    if not serie.cancha.activa:
+        raise ValidationError({'cancha': 'Esta cancha no está disponible para reservas.'})
+
+    if not serie.cliente.activo:
+        raise ValidationError({'cliente': 'Este cliente no está activo en el sistema.'})
+
+    if len(serie.fechas()) > MAX_OCURRENCIAS_SERIE:
+        raise ValidationError({
+            'fecha_hasta': f'Una serie no puede tener más de {MAX_OCURRENCIAS_SERIE} ocurrencias.'
+        })
+
+
+def crear_serie(cliente, cancha, fecha_desde, fecha_hasta, hora_inicio, hora_fin,
+                frecuencia='SEMANAL', servicios=(), todo_o_nada=False):
+    """
+    Crea una serie de reservas recurrentes con sus pagos pendientes.
+
+    Las ocurrencias con conflicto se informan y se saltean; con todo_o_nada
+    no se crea nada si alguna tiene conflicto. Los errores que afectan a toda
+    la serie (horario, duración, cancha o cliente inactivos) levantan
+    ValidationError con los mismos mensajes que Reserva.clean().
+
+    Retorna un dict con 'serie' (None si no se creó), 'reservas' creadas y
+    'conflictos' ({fecha: motivo}).
+    """
+    serie = SerieReserva(
+        cliente=cliente, cancha=cancha, frecuencia=frecuencia,
+        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+        hora_inicio=hora_inicio, hora_fin=hora_fin,
+    )
+    _validar_serie(serie)
+
+    candidatas = {
+        fecha: Reserva(
+            cliente=cliente, cancha=cancha, estado='PENDIENTE',
+            fecha_hora_inicio=timezone.make_aware(datetime.combine(fecha, hora_inicio)),
+            fecha_hora_fin=timezone.make_aware(datetime.combine(fecha, hora_fin)),
+        )
+        for fecha in serie.fechas()
+    }
+    servicios = list(servicios)
+    reservas_pagadas = cliente.reservas_pagadas_registradas()
+
+    with transaction.atomic():
+        errores = validar_reservas(candidatas.values())
+        conflictos = {
+            fecha: error.messages[0]
+            for fecha, error in zip(candidatas, errores) if error is not None
+        }
+        fechas_libres = [fecha for fecha in candidatas if fecha not in conflictos]
+        if not fechas_libres or (todo_o_nada and conflictos):
+            return {'serie': None, 'reservas': [], 'conflictos': conflictos}
+
+        serie.save()
+        for fecha in fechas_libres:
+            candidatas[fecha].serie = serie
+        with horario_no_disponible_como_validacion():
+            reservas = Reserva.objects.bulk_create([candidatas[fecha] for fecha in fechas_libres])
+        if servicios:
+            ReservaServicio = Reserva.servicios.through
+            ReservaServicio.objects.bulk_create([
+                ReservaServicio(reserva_id=reserva.pk, servicio_id=servicio.pk)
+                for reserva in reservas for servicio in servicios
+            ])
+        # Cada ocurrencia se cotiza con su propio horario, como una reserva hecha desde el formulario
+        Pago.objects.bulk_create([
+            Pago(
+                reserva=reserva,
+                monto_total=cotizar(cancha, reserva.fecha_hora_inicio, reserva.fecha_hora_fin, servicios,
+                                    reservas_pagadas=reservas_pagadas)['total'],
+                estado='PENDIENTE',
+            )
+            for reserva in reservas
+        ])
+        registrar_reservas_nuevas({cliente.pk: len(reservas)})
+
+    # bulk_create no dispara señales
+    incrementar_version('reservas')
+    publicar_ocupadas(reservas)
+    return {'serie': serie, 'reservas': reservas, 'conflictos': conflictos}
@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .estadisticas import registrar_baja_pago, registrar_baja_reserva, registrar_cambio_pago, registrar_cambio_reserva
+from .eventos import Ocupacion, publicar_cambio
+from .lista_espera import programar_promocion
+from .models import (
+    Cancha, Cliente, Equipo, EstadisticasCliente, Pago, Partido, ReglaPrecio, Reserva, Servicio, TipoCancha, Torneo,
+)
+from .versiones import incrementar_version
+
+
+@receiver(post_save, sender=Reserva)
+@receiver(post_delete, sender=Reserva)
+def invalidar_cache_reservas(sender, **kwargs):
+    """Cualquier alta, cambio o baja de una reserva invalida la ocupación cacheada"""
+    incrementar_version('reservas')
+
+
+@receiver(post_save, sender=Pago)
+@receiver(post_delete, sender=Pago)
+@receiver(post_save, sender=Partido)
+@receiver(post_delete, sender=Partido)
+@receiver(post_save, sender=Torneo)
+@receiver(post_delete, sender=Torneo)
+@receiver(post_save, sender=Equipo)
+@receiver(post_delete, sender=Equipo)
+def invalidar_cache_torneos(sender, **kwargs):
+    """
+    Los pagos y los partidos cambian el resumen cacheado de los torneos; los
+    torneos y los equipos, lo que publica la API (ETag de /api/v1/torneos/)
+    """
+    incrementar_version('torneos')
+
+
+@receiver(post_save, sender=ReglaPrecio)
+@receiver(post_delete, sender=ReglaPrecio)
+def recompilar_reglas_precio(sender, **kwargs):
+    """Cada proceso recompila su tabla de reglas en el próximo cálculo"""
+    incrementar_version('precios')
+
+
+@receiver(post_save, sender=Cancha)
+@receiver(post_delete, sender=Cancha)
+@receiver(post_save, sender=TipoCancha)
+@receiver(post_delete, sender=TipoCancha)
+@receiver(post_save, sender=Servicio)
+@receiver(post_delete, sender=Servicio)
+def invalidar_catalogo(sender, **kwargs):
+    """Cada proceso recarga su catálogo (reservas/catalogo.py) en la próxima lectura"""
+    incrementar_version('catalogo')
+    # Otro proceso puede recargar antes del commit y leer los datos anteriores
+    transaction.on_commit(lambda: incrementar_version('catalogo'))
+
+
+@receiver(post_delete, sender=Reserva)
+def liberar_horario(sender, instance, **kwargs):
+    """Borrar una reserva activa libera su horario para la lista de espera"""
+    if instance.estado in ['PENDIENTE', 'PAGADA']:
+        programar_promocion(instance)
+
+
+@receiver(post_init, sender=Reserva)
+def recordar_ocupacion(sender, instance, **kwargs):
+    """
+    Lo que la reserva ocupaba y su estado al cargarse, para publicar y contar
+    solo los cambios al guardarla
+    """
+    instance._ocupacion_publicada = Ocupacion.de(instance)
+    instance._estado_registrado = instance.__dict__.get('estado')
+
+
+@receiver(post_save, sender=Reserva)
+def publicar_ocupacion(sender, instance, raw=False, **kwargs):
+    """Avisa a los flujos de reservas/eventos/ los horarios ocupados y liberados"""
+    if raw:
+        return
+    antes, despues = instance._ocupacion_publicada, Ocupacion.de(instance)
+    instance._ocupacion_publicada = despues
+    if antes != despues:
+        transaction.on_commit(lambda: publicar_cambio(antes, despues))
+
+
+@receiver(post_delete, sender=Reserva)
+def publicar_borrado(sender, instance, **kwargs):
+    ocupacion = Ocupacion.de(instance)
+    transaction.on_commit(lambda: publicar_cambio(ocupacion, None))
+
+
+@receiver(post_save, sender=Cliente)
+def crear_estadisticas_cliente(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        EstadisticasCliente.objects.get_or_create(cliente=instance)
+
+
+@receiver(post_save, sender=Reserva)
+def contar_cambio_reserva(sender, instance, created, raw=False, **kwargs):
+    """
+    Cualquier save() (vistas, admin, pagar(), cancelar()) registra en las
+    estadísticas el paso desde el estado cargado. Los update() en bloque
+    registran el suyo aparte.
+    """
+    if raw:
+        return
+    anterior = None if created else instance._estado_registrado
+    instance._estado_registrado = instance.__dict__.get('estado')
+    # Con el estado diferido no se sabe de dónde venía (y save() no lo escribe)
+    if created or anterior is not None:
+        registrar_cambio_reserva(instance, anterior)
+
+
+@receiver(post_init, sender=Pago)
+def recordar_estado_pago(sender, instance, **kwargs):
+    instance._pago_registrado = (instance.__dict__.get('estado'), instance.__dict__.get('monto_total'))
+
+
+@receiver(post_save, sender=Pago)
+def contar_cambio_pago(sender, instance, created, raw=False, **kwargs):
+    """Como contar_cambio_reserva: el total gastado sigue al estado y al monto guardados"""
+    if raw:
+        return
+    estado_anterior, monto_anterior = (None, None) if created else instance._pago_registrado
+    instance._pago_registrado = (instance.__dict__.get('estado'), instance.__dict__.get('monto_total'))
+    if created or estado_anterior is not None:
+        registrar_cambio_pago(instance, estado_anterior, monto_anterior)
+
+
+@receiver(post_delete, sender=Reserva)
+def descontar_reserva(sender, instance, **kwargs):
+    registrar_baja_reserva(instance)
+
+
+@receiver(post_delete, sender=Pago)
+def descontar_pago(sender, instance, **kwargs):
+    registrar_baja_pago(instance)
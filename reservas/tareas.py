@@ -0,0 +1,70 @@
+"""
+Tareas en segundo plano dentro del mismo proceso.
+
+Las tareas se encolan al confirmarse la transacción actual y corren en un
+hilo aparte, para no demorar la respuesta del request que las originó. Con
+TAREAS_EN_SEGUNDO_PLANO = False corren en el mismo hilo (útil en tests).
+
+cada() repite una tarea a intervalos fijos en un hilo daemon, para trabajos
+periódicos que no justifican un cron (cada proceso corre el suyo).
+"""
+from django.conf import settings
+from django.db import connections, transaction
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_ejecutor = None
+_lock = threading.Lock()
+_periodicas = {}
+
+
+def _obtener_ejecutor():
+    global _ejecutor
+    with _lock:
+        if _ejecutor is None:
+            _ejecutor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'TAREAS_HILOS', 2),
+                thread_name_prefix='reservas-tarea',
+            )
+        return _ejecutor
+
+
+def _ejecutar(funcion, args, kwargs):
+    try:
+        funcion(*args, **kwargs)
+    except Exception:
+        logger.exception('Falló la tarea en segundo plano %s', funcion.__name__)
+    finally:
+        # Las conexiones del hilo no pasan por request_finished
+        connections.close_all()
+
+
+def en_segundo_plano(funcion, *args, **kwargs):
+    """Ejecuta funcion(*args, **kwargs) después del commit de la transacción actual"""
+    if not getattr(settings, 'TAREAS_EN_SEGUNDO_PLANO', True):
+        transaction.on_commit(lambda: funcion(*args, **kwargs))
+        return
+    transaction.on_commit(lambda: _obtener_ejecutor().submit(_ejecutar, funcion, args, kwargs))
+
+
+def cada(segundos, funcion, nombre=None):
+    """
+    Ejecuta funcion() cada `segundos` en un hilo daemon. Una tarea con el mismo
+    nombre no se arranca dos veces en el proceso. Retorna el Event que la detiene.
+    """
+    nombre = nombre or funcion.__name__
+    with _lock:
+        if nombre in _periodicas:
+            return _periodicas[nombre]
+        detener = threading.Event()
+        _periodicas[nombre] = detener
+
+    def bucle():
+        while not detener.wait(segundos):
+            _ejecutar(funcion, (), {})
+
+    threading.Thread(target=bucle, name=f'reservas-{nombre}', daemon=True).start()
+    return detener
@@ -1,10 +1,30 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
 from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from datetime import datetime, time, timedelta
 from decimal import Decimal
-from reservas.models import Cliente, TipoCancha, Cancha, Reserva, Servicio, Pago, Torneo, Equipo
-from django.core.exceptions import ValidationError
+from io import StringIO
+from reservas import catalogo, eventos, pasarela
+from reservas.disponibilidad import buscar_horarios_libres, grilla_ocupacion, intervalos_libres
+from reservas.metricas import normalizar_sql, registro as registro_metricas
+from reservas.models import Cliente, TipoCancha, Cancha, Reserva, Servicio, Pago, Torneo, Equipo, Partido, SerieReserva, EsperaReserva, EstadisticasCliente, ReglaPrecio
+from reservas.estadisticas import recalcular_estadisticas
+from reservas.lista_espera import esperas_compatibles
+from reservas.precios import cotizar, tabla_de_reglas
+from reservas.series import crear_serie
+from reservas.torneos import registrar_resultados_ronda
+from reservas.validacion import validar_reservas
+from reservas.vencimiento import vencer_reservas_pendientes
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+import json
+import re
+import tempfile
 
 
 class ClienteModelTests(TestCase):
@@ -230,6 +250,20 @@ class ReservaModelTests(TestCase):
         costo_esperado = (Decimal("5000.00") * 2) + Decimal("1000.00")
         self.assertEqual(reserva.calcular_costo_total(), costo_esperado)
 
+    def test_constraint_fin_posterior_a_inicio_en_bd(self):
+        """Test: La base de datos rechaza reservas con fin <= inicio aunque se saltee clean()"""
+        fecha_inicio = timezone.now() + timedelta(days=1)
+        
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Reserva.objects.create(
+                    cliente=self.cliente,
+                    cancha=self.cancha,
+                    fecha_hora_inicio=fecha_inicio,
+                    fecha_hora_fin=fecha_inicio,
+                    estado='PENDIENTE'
+                )
+
 
 class PagoModelTests(TestCase):
     """Tests para el modelo Pago"""
@@ -331,6 +365,662 @@ class TorneoModelTests(TestCase):
         with self.assertRaises(ValidationError):
             torneo.full_clean()
 
+    def test_actualizar_estados_por_fecha(self):
+        """Test: Los torneos pasan a EN_CURSO o FINALIZADO según las fechas, sin tocar el resto"""
+        hoy = timezone.now().date()
+        en_curso = Torneo.objects.create(nombre="Empezado", fecha_inicio=hoy - timedelta(days=1),
+                                         fecha_fin=hoy + timedelta(days=5))
+        terminado = Torneo.objects.create(nombre="Terminado", fecha_inicio=hoy - timedelta(days=10),
+                                          fecha_fin=hoy - timedelta(days=1))
+        futuro = Torneo.objects.create(nombre="Futuro", fecha_inicio=hoy + timedelta(days=3),
+                                       fecha_fin=hoy + timedelta(days=10))
+        
+        self.assertEqual(Torneo.actualizar_estados_por_fecha(hoy), 2)
+        self.assertEqual(Torneo.objects.get(pk=en_curso.pk).estado, 'EN_CURSO')
+        self.assertEqual(Torneo.objects.get(pk=terminado.pk).estado, 'FINALIZADO')
+        self.assertEqual(Torneo.objects.get(pk=futuro.pk).estado, 'INSCRIPCION')
+        
+        # Sin cambios pendientes no se escribe nada
+        with self.assertNumQueries(2):
+            self.assertEqual(Torneo.actualizar_estados_por_fecha(hoy), 0)
+
+
+class TorneoDetalleTests(TestCase):
+    """Tests para el resumen de torneo_detalle"""
+
+    def setUp(self):
+        cache.clear()
+        hoy = timezone.localdate()
+        self.torneo = Torneo.objects.create(nombre="Apertura", fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=10),
+                                            costo_inscripcion=Decimal("1000.00"))
+        equipos = [Equipo.objects.create(nombre=f"Equipo {i}") for i in range(4)]
+        self.torneo.equipos.set(equipos)
+        self.torneo.generar_fixture()
+        cliente = Cliente.objects.create(nombre="Juan", apellido="Pérez", dni="12345678", email="juan@example.com")
+        tipo = TipoCancha.objects.create(nombre="Fútbol 5")
+        cancha = Cancha.objects.create(nombre="Cancha 1", tipo_cancha=tipo, precio_por_hora=Decimal("5000.00"))
+        for hora, monto in [(10, "5000.00"), (12, "7000.00"), (14, "3000.00")]:
+            inicio = timezone.make_aware(datetime.combine(hoy + timedelta(days=1), time(hora)))
+            reserva = Reserva.objects.create(cliente=cliente, cancha=cancha, torneo=self.torneo,
+                                             fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1))
+            Pago.objects.create(reserva=reserva, monto_total=Decimal(monto))
+            if hora != 14:
+                reserva.pagar()
+
+    def test_resumen_agregado_y_cacheado(self):
+        """Test: Ingresos y conteos salen de agregados y la segunda visita usa la caché"""
+        url = reverse('torneo_detalle', args=[self.torneo.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.context['ingresos_reservas'], Decimal("12000.00"))
+        self.assertEqual(response.context['reservas_count'], 2)
+        self.assertEqual(response.context['ingresos_totales'], Decimal("16000.00"))
+        self.assertEqual((response.context['total_partidos'], response.context['partidos_pendientes']), (3, 3))
+        
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as primera:
+            self.client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as sin_cache:
+            self.client.get(url)
+        self.assertEqual(len(sin_cache), len(primera) + 2)
+
+    def test_invalidacion(self):
+        """Test: Registrar un partido o un pago actualiza el resumen"""
+        url = reverse('torneo_detalle', args=[self.torneo.pk])
+        self.client.get(url)
+        partido = self.torneo.partidos.filter(ronda=1).first()
+        partido.resultado_equipo1, partido.resultado_equipo2 = 2, 1
+        partido.full_clean()
+        partido.save()
+        response = self.client.get(url)
+        self.assertEqual(response.context['partidos_completados'], 1)
+        
+        Reserva.objects.get(estado='PENDIENTE').pagar()
+        response = self.client.get(url)
+        self.assertEqual(response.context['ingresos_reservas'], Decimal("15000.00"))
+
+
+class FixtureTests(TestCase):
+    """Tests para el avance de ganadores en el fixture"""
+
+    def setUp(self):
+        hoy = timezone.localdate()
+        self.torneo = Torneo.objects.create(nombre="Apertura", fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=10))
+        self.torneo.equipos.set([Equipo.objects.create(nombre=f"Equipo {i}") for i in range(4)])
+        self.torneo.generar_fixture()
+
+    def partido(self, ronda, numero):
+        return Partido.objects.select_related('torneo', 'equipo1', 'equipo2').get(
+            torneo=self.torneo, ronda=ronda, numero_partido=numero)
+
+    def test_fixture_enlazado(self):
+        """Test: generar_fixture guarda las rondas y el partido siguiente de cada uno"""
+        self.assertEqual(self.torneo.total_rondas, 2)
+        final = self.partido(2, 1)
+        self.assertIsNone(final.siguiente)
+        self.assertEqual(self.partido(1, 1).siguiente, final)
+        self.assertEqual(self.partido(1, 2).siguiente, final)
+        self.assertEqual(final.nombre_ronda(), 'Final')
+
+    def test_registrar_resultado_avanza_sin_buscar(self):
+        """Test: Registrar un resultado actualiza el partido y el siguiente con consultas fijas"""
+        partido = self.partido(1, 2)
+        with self.assertNumQueries(4):
+            # Savepoint, UPDATE del partido, UPDATE del siguiente y release
+            partido.registrar_resultado(1, 3)
+        final = self.partido(2, 1)
+        self.assertEqual(final.equipo2, partido.equipo2)
+        self.assertEqual(final.partido_anterior_equipo2_id, partido.pk)
+        self.assertIsNone(final.equipo1)
+        
+        with self.assertRaises(ValidationError):
+            self.partido(1, 1).registrar_resultado(2, 2)
+        with self.assertRaises(ValidationError):
+            final.registrar_resultado(1, 0)
+
+    def test_walkover_desde_la_vista(self):
+        """Test: Un walkover da por ganador al equipo presente y lo avanza"""
+        partido = self.partido(1, 1)
+        response = self.client.post(reverse('partido_registrar_resultado', args=[partido.pk]), {'walkover': 'equipo2'})
+        self.assertRedirects(response, reverse('torneo_fixture', args=[self.torneo.pk]))
+        partido.refresh_from_db()
+        self.assertEqual((partido.estado, partido.ganador_id), ('WALKOVER', partido.equipo2_id))
+        self.assertIsNone(partido.resultado_equipo1)
+        self.assertEqual(self.partido(2, 1).equipo1_id, partido.equipo2_id)
+        
+        # No se puede volver a registrar
+        self.client.post(reverse('partido_registrar_resultado', args=[partido.pk]),
+                         {'resultado_equipo1': 3, 'resultado_equipo2': 1})
+        partido.refresh_from_db()
+        self.assertEqual(partido.estado, 'WALKOVER')
+        
+        response = self.client.get(reverse('torneo_fixture', args=[self.torneo.pk]))
+        self.assertContains(response, 'Walkover')
+
+    def test_cantidad_de_equipos_que_no_es_potencia_de_2(self):
+        """Test: Con 5 equipos los partidos libres se ganan por walkover al generar el fixture"""
+        hoy = timezone.localdate()
+        torneo = Torneo.objects.create(nombre="Clausura", fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=10))
+        torneo.equipos.set([Equipo.objects.create(nombre=f"Equipo {i}") for i in range(4, 9)])
+        self.assertContains(self.client.get(reverse('torneo_generar_fixture', args=[torneo.pk])), '3 ronda(s)')
+        torneo.generar_fixture()
+        self.assertEqual(torneo.total_rondas, 3)
+        
+        primera = list(Partido.objects.filter(torneo=torneo, ronda=1))
+        self.assertEqual([p.estado for p in primera], ['WALKOVER', 'WALKOVER', 'WALKOVER', 'PENDIENTE'])
+        self.assertTrue(all(p.ganador_id == p.equipo1_id and p.equipo2_id is None for p in primera[:3]))
+        inscritos = {p.equipo1_id for p in primera} | {primera[3].equipo2_id}
+        self.assertEqual(len(inscritos), 5)
+        
+        # Los ganadores de los partidos libres ya están en la segunda ronda
+        segunda = list(Partido.objects.filter(torneo=torneo, ronda=2))
+        self.assertEqual((segunda[0].equipo1_id, segunda[0].equipo2_id), (primera[0].equipo1_id, primera[1].equipo1_id))
+        self.assertEqual((segunda[1].equipo1_id, segunda[1].equipo2_id), (primera[2].equipo1_id, None))
+        self.assertEqual(segunda[0].partido_anterior_equipo1_id, primera[0].pk)
+        
+        # El único partido jugado de primera ronda completa la segunda
+        primera[3].registrar_resultado(0, 2)
+        segunda[1].refresh_from_db()
+        self.assertEqual(segunda[1].equipo2_id, primera[3].equipo2_id)
+        segunda[0].registrar_resultado(1, 0)
+        segunda[1].registrar_resultado(3, 1)
+        final = Partido.objects.get(torneo=torneo, ronda=3)
+        self.assertEqual((final.equipo1_id, final.equipo2_id), (primera[0].equipo1_id, primera[2].equipo1_id))
+        
+        response = self.client.get(reverse('torneo_fixture', args=[torneo.pk]))
+        self.assertContains(response, 'Libre')
+
+    def test_resultados_de_una_ronda_en_bloque(self):
+        """Test: Una ronda completa se guarda con dos bulk_update y llena la ronda siguiente"""
+        primero, segundo = self.partido(1, 1), self.partido(1, 2)
+        with self.assertNumQueries(6):
+            # Savepoint, partidos, siguientes, dos bulk_update y release
+            errores = registrar_resultados_ronda(self.torneo, 1, {primero.pk: (3, 1), segundo.pk: 'equipo2'})
+        self.assertEqual(errores, {})
+        final = self.partido(2, 1)
+        self.assertEqual((final.equipo1_id, final.equipo2_id), (primero.equipo1_id, segundo.equipo2_id))
+        self.assertEqual(Partido.objects.get(pk=segundo.pk).estado, 'WALKOVER')
+
+    def test_ronda_con_empate_no_guarda_nada(self):
+        """Test: Un empate en la ronda rechaza todos los resultados"""
+        primero, segundo = self.partido(1, 1), self.partido(1, 2)
+        url = reverse('torneo_registrar_ronda', args=[self.torneo.pk, 1])
+        response = self.client.post(url, {
+            f'resultado_equipo1_{primero.pk}': '2', f'resultado_equipo2_{primero.pk}': '0',
+            f'resultado_equipo1_{segundo.pk}': '1', f'resultado_equipo2_{segundo.pk}': '1',
+        })
+        self.assertContains(response, 'No puede haber empate')
+        self.assertEqual(Partido.objects.filter(torneo=self.torneo, estado='PENDIENTE').count(), 3)
+        
+        response = self.client.post(url, json.dumps({'resultados': [
+            {'partido': primero.pk, 'resultado_equipo1': 2, 'resultado_equipo2': 0},
+            {'partido': segundo.pk, 'walkover': 'equipo1'},
+        ]}), content_type='application/json')
+        self.assertEqual(response.json(), {'registrados': 2})
+        self.assertEqual(Partido.objects.filter(torneo=self.torneo, estado='PENDIENTE').count(), 1)
+
+
+class ReglasPrecioTests(TestCase):
+    """Tests para las reglas de precio compiladas"""
+
+    def setUp(self):
+        cache.clear()
+        self.tipo = TipoCancha.objects.create(nombre="Pádel")
+        self.cancha = Cancha.objects.create(nombre="Cancha 1", tipo_cancha=self.tipo, precio_por_hora=Decimal("5000.00"))
+        self.servicio = Servicio.objects.create(nombre="Pelotas", costo_adicional=Decimal("1000.00"))
+        # Un miércoles
+        self.dia = timezone.localdate() + timedelta(days=(2 - timezone.localdate().weekday()) % 7 + 7)
+
+    def tearDown(self):
+        # Las reglas creadas acá se borran con el rollback, sin señales
+        cache.clear()
+
+    def precio(self, hora, **kwargs):
+        inicio = timezone.make_aware(datetime.combine(self.dia, time(hora)))
+        return cotizar(self.cancha, inicio, inicio + timedelta(hours=1), [self.servicio], **kwargs)
+
+    def test_reglas_por_defecto(self):
+        """Test: Las estrategias anteriores siguen aplicando, con el recargo de horario pico acumulable"""
+        self.assertEqual(self.precio(14)['total'], Decimal("6000.00"))
+        self.assertEqual(self.precio(9)['total'], Decimal("5100.00"))
+        # El mejor descuento no acumulable: torneo (-25%) le gana a cliente frecuente (-10%)
+        cotizacion = self.precio(14, reservas_pagadas=5, con_torneo=True)
+        self.assertEqual([regla['nombre'] for regla in cotizacion['reglas']], ['Reserva de torneo'])
+        self.assertEqual(cotizacion['total'], Decimal("4500.00"))
+        # Horario pico se suma al descuento de cliente frecuente: 6000 - 600 + 1200
+        self.assertEqual(self.precio(19, reservas_pagadas=5)['total'], Decimal("6600.00"))
+
+    def test_condiciones_y_prioridad(self):
+        """Test: Día de la semana, tipo de cancha y prioridad"""
+        ReglaPrecio.objects.create(nombre="Miércoles de pádel", porcentaje=Decimal("-5"), dias_semana="2",
+                                   tipo_cancha=self.tipo, prioridad=10)
+        # Con mayor prioridad gana aunque el matutino sea mejor para el cliente
+        self.assertEqual([r['nombre'] for r in self.precio(9)['reglas']], ['Miércoles de pádel'])
+        otro_tipo = Cancha.objects.create(nombre="Cancha 2", tipo_cancha=TipoCancha.objects.create(nombre="Tenis"),
+                                          precio_por_hora=Decimal("5000.00"))
+        inicio = timezone.make_aware(datetime.combine(self.dia, time(9)))
+        self.assertEqual([r['nombre'] for r in cotizar(otro_tipo, inicio, inicio + timedelta(hours=1))['reglas']],
+                         ['Horario matutino'])
+        inicio += timedelta(days=1)
+        self.assertEqual([r['nombre'] for r in cotizar(self.cancha, inicio, inicio + timedelta(hours=1))['reglas']],
+                         ['Horario matutino'])
+
+    def test_tabla_en_memoria(self):
+        """Test: Cotizar no consulta la base y la tabla se recompila al cambiar una regla"""
+        self.precio(14)
+        with self.assertNumQueries(0):
+            for hora in range(8, 22):
+                self.precio(hora, reservas_pagadas=hora % 7)
+        
+        ReglaPrecio.objects.filter(nombre='Horario pico').get().delete()
+        self.assertEqual(self.precio(19)['total'], Decimal("6000.00"))
+        regla = ReglaPrecio.objects.get(nombre='Horario matutino')
+        regla.activa = False
+        regla.save()
+        self.assertEqual(self.precio(9)['total'], Decimal("6000.00"))
+
+    def test_api_cotizacion(self):
+        """Test: La cotización coincide con el precio de la reserva sin crearla y con pocas consultas"""
+        cliente = Cliente.objects.create(nombre="Ana", apellido="Gómez", dni="30111222",
+                                         email="ana@example.com", telefono="1234567890")
+        EstadisticasCliente.objects.filter(cliente=cliente).update(reservas_pagadas=5)
+        params = {
+            'cancha': self.cancha.id,
+            'inicio': f'{self.dia.isoformat()}T19:00',
+            'fin': f'{self.dia.isoformat()}T20:00',
+            'servicios': self.servicio.id,
+            'cliente': cliente.id,
+        }
+        self.client.get(reverse('reserva_cotizar'), params)
+        # Con el catálogo y las reglas en caché solo se leen las estadísticas del cliente
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('reserva_cotizar'), params)
+        datos = response.json()
+        self.assertEqual(datos['total'], "6600.00")
+        self.assertEqual([regla['nombre'] for regla in datos['reglas']], ['Cliente frecuente', 'Horario pico'])
+        self.assertEqual(datos['total'], str(self.precio(19, reservas_pagadas=5)['total']))
+        self.assertFalse(Reserva.objects.exists())
+
+        # Un cambio de precio invalida el catálogo
+        self.cancha.precio_por_hora = Decimal("6000.00")
+        self.cancha.save()
+        del params['cliente']
+        self.assertEqual(self.client.get(reverse('reserva_cotizar'), params).json()['base'], "7000.00")
+
+        self.assertEqual(self.client.get(reverse('reserva_cotizar'), {**params, 'cancha': 999}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('reserva_cotizar'), {**params, 'fin': params['inicio']}).status_code, 400)
+
+
+    @override_settings(TAREAS_EN_SEGUNDO_PLANO=False)
+    def test_mismo_precio_por_cada_camino(self):
+        """Test: El mismo horario cuesta lo mismo reservado desde el formulario, una serie, la lista de espera o MercadoPago"""
+        cliente = Cliente.objects.create(nombre="Ana", apellido="Gómez", dni="30111222",
+                                         email="ana@example.com", telefono="1234567890")
+        otro = Cliente.objects.create(nombre="Luis", apellido="Díaz", dni="30111333",
+                                      email="luis@example.com", telefono="1234567891")
+        EstadisticasCliente.objects.filter(cliente=cliente).update(reservas_pagadas=5)
+        inicio = timezone.make_aware(datetime.combine(self.dia, time(19)))
+        fin = inicio + timedelta(hours=1)
+        montos = {}
+        
+        def liberar(reserva):
+            Reserva.objects.filter(pk=reserva.pk).update(estado='CANCELADA')
+            return reserva.pago.monto_total
+        
+        self.client.post(reverse('reserva_crear'), {
+            'cliente': cliente.id, 'cancha': self.cancha.id,
+            'fecha_hora_inicio': f'{self.dia.isoformat()}T19:00', 'fecha_hora_fin': f'{self.dia.isoformat()}T20:00',
+        })
+        montos['formulario'] = liberar(Reserva.objects.get(cliente=cliente, estado='PENDIENTE'))
+        
+        # Recién leído, como en la vista: el de arriba tiene en memoria las estadísticas de antes del update()
+        serie = crear_serie(Cliente.objects.get(pk=cliente.pk), self.cancha, self.dia, self.dia, time(19), time(20))
+        montos['serie'] = liberar(serie['reservas'][0])
+        
+        ocupada = Reserva.objects.create(cliente=otro, cancha=self.cancha, fecha_hora_inicio=inicio, fecha_hora_fin=fin)
+        espera = EsperaReserva.objects.create(cliente=cliente, cancha=self.cancha, fecha_hora_inicio=inicio, fecha_hora_fin=fin)
+        with self.captureOnCommitCallbacks(execute=True):
+            ocupada.cancelar()
+        espera.refresh_from_db()
+        montos['lista de espera'] = liberar(espera.reserva)
+        
+        reserva = Reserva.objects.create(cliente=cliente, cancha=self.cancha, fecha_hora_inicio=inicio, fecha_hora_fin=fin)
+        self.client.get(reverse('reserva_pagar_mercadopago', args=[reserva.pk]))
+        montos['mercadopago'] = Pago.objects.get(reserva=reserva).monto_total
+        
+        # Cliente frecuente (-10%) y horario pico (+20%)
+        self.assertEqual(montos, dict.fromkeys(montos, Decimal("5500.00")))
+        self.assertEqual(len(montos), 4)
+
+class CatalogoTests(TestCase):
+    """Tests para el catálogo de canchas y servicios en memoria"""
+
+    def setUp(self):
+        self.tipo = TipoCancha.objects.create(nombre="Tenis")
+        self.cancha = Cancha.objects.create(nombre="Central", tipo_cancha=self.tipo, precio_por_hora=Decimal("3000.00"))
+        self.servicio = Servicio.objects.create(nombre="Raquetas", costo_adicional=Decimal("500.00"))
+
+    def test_carga_una_vez_por_version(self):
+        """Test: El catálogo se carga con tres consultas y después se lee sin consultar la base"""
+        with self.assertNumQueries(3):
+            catalogo.catalogo()
+        with self.assertNumQueries(0):
+            cancha = catalogo.cancha(self.cancha.pk)
+            self.assertEqual(cancha.tipo_cancha.nombre, "Tenis")
+            self.assertEqual(catalogo.servicios([self.servicio.pk, 999]), [catalogo.servicio(self.servicio.pk)])
+            self.assertIsNone(catalogo.cancha(999))
+
+    def test_senales_invalidan(self):
+        """Test: Guardar o borrar una cancha, un tipo o un servicio recarga el catálogo"""
+        self.cancha.precio_por_hora = Decimal("3500.00")
+        self.cancha.save()
+        self.assertEqual(catalogo.cancha(self.cancha.pk).precio_por_hora, Decimal("3500.00"))
+
+        self.tipo.nombre = "Tenis de mesa"
+        self.tipo.save()
+        self.assertEqual(catalogo.cancha(self.cancha.pk).tipo_cancha.nombre, "Tenis de mesa")
+
+        self.servicio.activo = False
+        self.servicio.save()
+        self.assertEqual(catalogo.lista_servicios(activos=True), [])
+        self.servicio.delete()
+        self.assertEqual(catalogo.lista_servicios(), [])
+
+
+class ApiTests(TestCase):
+    """Tests para la API JSON de solo lectura (/api/v1/)"""
+
+    def setUp(self):
+        cache.clear()
+        self.cliente = Cliente.objects.create(
+            nombre="Juan",
+            apellido="Pérez",
+            dni="12345678",
+            email="juan@example.com"
+        )
+        self.tipo_cancha = TipoCancha.objects.create(nombre="Fútbol 5")
+        self.cancha = Cancha.objects.create(nombre="Cancha 1", tipo_cancha=self.tipo_cancha,
+                                            precio_por_hora=Decimal("5000.00"))
+        self.fecha = timezone.localdate() + timedelta(days=1)
+        # Dos reservas por horario en canchas distintas: el cursor desempata por id
+        self.otra_cancha = Cancha.objects.create(nombre="Cancha 2", tipo_cancha=self.tipo_cancha,
+                                                 precio_por_hora=Decimal("5000.00"))
+        self.reservas = []
+        for hora in range(10, 15):
+            inicio = timezone.make_aware(datetime.combine(self.fecha, time(hora)))
+            for cancha in (self.cancha, self.otra_cancha):
+                self.reservas.append(Reserva.objects.create(
+                    cliente=self.cliente, cancha=cancha,
+                    fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1),
+                ))
+
+    def test_paginacion_por_cursor(self):
+        """Test: Las páginas recorren todas las reservas en orden, sin repetir ni saltear"""
+        ids, cursor = [], None
+        while True:
+            parametros = {'limite': 3, 'campos': 'id,inicio'}
+            if cursor:
+                parametros['cursor'] = cursor
+            datos = self.client.get(reverse('api_reservas'), parametros).json()
+            self.assertLessEqual(len(datos['resultados']), 3)
+            ids += [fila['id'] for fila in datos['resultados']]
+            cursor = datos['siguiente']
+            if not cursor:
+                break
+        self.assertEqual(ids, [reserva.id for reserva in self.reservas])
+
+        response = self.client.get(reverse('api_reservas'), {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_seleccion_de_campos(self):
+        """Test: ?campos= limita las claves de cada fila y rechaza campos desconocidos"""
+        datos = self.client.get(reverse('api_reservas'), {'campos': 'id,cancha', 'cancha': self.cancha.id}).json()
+        self.assertEqual(len(datos['resultados']), 5)
+        self.assertEqual(datos['resultados'][0], {'id': self.reservas[0].id, 'cancha': "Cancha 1"})
+
+        response = self.client.get(reverse('api_reservas'), {'campos': 'id,monto_secreto'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('monto_secreto', response.json()['error'])
+
+    def test_etag_y_gzip(self):
+        """Test: Un GET condicional sin cambios responde 304 sin consultar la base; las respuestas van comprimidas"""
+        url = reverse('api_canchas')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 304)
+
+        self.cancha.precio_por_hora = Decimal("6000.00")
+        self.cancha.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['resultados'][0]['precio_por_hora'], "6000.00")
+
+    def test_disponibilidad(self):
+        """Test: La disponibilidad marca ocupadas las franjas reservadas y no expone al cliente"""
+        response = self.client.get(reverse('api_disponibilidad'),
+                                   {'fecha': self.fecha.isoformat(), 'cancha': self.cancha.id})
+        datos = response.json()
+        self.assertEqual(len(datos['canchas']), 1)
+        ocupadas = [franja['inicio'] for franja in datos['canchas'][0]['franjas'] if not franja['libre']]
+        self.assertEqual(ocupadas, ['10:00', '11:00', '12:00', '13:00', '14:00'])
+        self.assertNotIn('Juan', response.content.decode())
+
+        response = self.client.get(reverse('api_disponibilidad'), {'cancha': 999})
+        self.assertEqual(response.status_code, 404)
+
+    def test_fixture(self):
+        """Test: El fixture lista los partidos por ronda y cambia de ETag al cargar un resultado"""
+        torneo = Torneo.objects.create(
+            nombre="Copa API",
+            fecha_inicio=self.fecha,
+            fecha_fin=self.fecha + timedelta(days=7),
+        )
+        for i in range(4):
+            torneo.equipos.add(Equipo.objects.create(nombre=f"Equipo {i}"))
+        torneo.generar_fixture()
+
+        url = reverse('api_fixture', args=[torneo.pk])
+        response = self.client.get(url, {'campos': 'ronda,equipo1,equipo2'})
+        datos = response.json()
+        self.assertEqual(datos['torneo']['nombre'], "Copa API")
+        self.assertEqual([partido['ronda'] for partido in datos['partidos']], [1, 1, 2])
+
+        partido = Partido.objects.get(torneo=torneo, ronda=1, numero_partido=1)
+        partido.resultado_equipo1, partido.resultado_equipo2 = 2, 1
+        partido.save()
+        self.assertNotEqual(self.client.get(url, {'campos': 'ronda,equipo1,equipo2'})['ETag'], response['ETag'])
+
+        self.assertEqual(self.client.get(reverse('api_fixture', args=[999])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api_torneos')).json()['resultados'][0]['id'], torneo.id)
+
+
+@override_settings(TAREAS_EN_SEGUNDO_PLANO=False)
+class EventosTests(TestCase):
+    """Tests para la ocupación en vivo (reservas/eventos/, server-sent events)"""
+
+    def setUp(self):
+        cache.clear()
+        self.cliente = Cliente.objects.create(
+            nombre="Juan",
+            apellido="Pérez",
+            dni="12345678",
+            email="juan@example.com"
+        )
+        self.tipo_cancha = TipoCancha.objects.create(nombre="Fútbol 5")
+        self.cancha = Cancha.objects.create(nombre="Cancha 1", tipo_cancha=self.tipo_cancha,
+                                            precio_por_hora=Decimal("5000.00"))
+        self.fecha = timezone.localdate() + timedelta(days=1)
+        self.inicio = timezone.make_aware(datetime.combine(self.fecha, time(18)))
+
+    def suscribir(self, *fechas):
+        broker = eventos.obtener_broker()
+        suscripcion = broker.suscribir(eventos.canal(self.cancha.id, fecha) for fecha in fechas or [self.fecha])
+        self.addCleanup(broker.desuscribir, suscripcion)
+        return suscripcion
+
+    def crear_reserva(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Reserva.objects.create(
+                cliente=self.cliente, cancha=self.cancha,
+                fecha_hora_inicio=self.inicio, fecha_hora_fin=self.inicio + timedelta(hours=1),
+            )
+
+    def test_alta_y_cancelacion(self):
+        """Test: Crear una reserva publica ocupada, cancelarla liberada y guardarla sin cambios nada"""
+        suscripcion = self.suscribir()
+        reserva = self.crear_reserva()
+        ((evento, datos),) = suscripcion.esperar(0)
+        self.assertEqual(evento, 'ocupada')
+        self.assertEqual((datos['id'], datos['cancha_id']), (reserva.id, self.cancha.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Reserva.objects.get(pk=reserva.pk).save()
+        self.assertEqual(suscripcion.esperar(0), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Reserva.objects.get(pk=reserva.pk).cancelar()
+        self.assertEqual(suscripcion.esperar(0), [('liberada', {'id': reserva.id, 'cancha_id': self.cancha.id})])
+
+    def test_cambio_de_dia(self):
+        """Test: Mover una reserva a otro día la libera en el canal anterior y la ocupa en el nuevo"""
+        reserva = self.crear_reserva()
+        otro_dia = self.fecha + timedelta(days=1)
+        suscripcion = self.suscribir(self.fecha, otro_dia)
+
+        reserva = Reserva.objects.get(pk=reserva.pk)
+        reserva.fecha_hora_inicio += timedelta(days=1)
+        reserva.fecha_hora_fin += timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.save()
+        self.assertEqual([evento for evento, _ in suscripcion.esperar(0)], ['liberada', 'ocupada'])
+
+    def test_flujo_sse(self):
+        """Test: El flujo empieza con el estado del día y valida los parámetros"""
+        reserva = self.crear_reserva()
+        with override_settings(EVENTOS_DURACION_MAXIMA_WSGI_SEGUNDOS=0):
+            response = self.client.get(reverse('reserva_eventos'), {'fecha': self.fecha.isoformat()})
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            contenido = b''.join(response.streaming_content).decode()
+        estado = json.loads(re.search(r'event: estado\ndata: (.*)\n', contenido).group(1))
+        self.assertEqual(estado['canchas'], [self.cancha.id])
+        self.assertEqual([r['id'] for r in estado['reservas']], [reserva.id])
+
+        response = self.client.get(reverse('reserva_eventos'), {'fecha': 'mañana'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_flujo_sync_recibe_eventos_de_otro_hilo(self):
+        """Test: Con WSGI el flujo espera en su hilo, recibe lo publicado desde otro y se corta pronto"""
+        import threading
+        datos = {'id': 1, 'cancha_id': self.cancha.id}
+        with override_settings(EVENTOS_KEEPALIVE_SEGUNDOS=5, EVENTOS_DURACION_MAXIMA_WSGI_SEGUNDOS=10):
+            flujo = eventos.flujo([self.cancha.id], self.fecha)
+            self.assertTrue(next(flujo).startswith('retry:'))
+            self.assertIn('event: estado', next(flujo))
+            threading.Timer(0.05, eventos.obtener_broker().publicar,
+                            [eventos.canal(self.cancha.id, self.fecha), ('liberada', datos)]).start()
+            self.assertEqual(next(flujo), eventos.formatear('liberada', datos))
+            flujo.close()
+        from django.conf import settings
+        self.assertLess(settings.EVENTOS_DURACION_MAXIMA_WSGI_SEGUNDOS, settings.EVENTOS_DURACION_MAXIMA_SEGUNDOS)
+
+    async def test_flujo_async_recibe_eventos_de_otro_hilo(self):
+        """Test: Con ASGI el flujo espera en el event loop y recibe lo publicado desde otro hilo"""
+        import threading
+        datos = {'id': 1, 'cancha_id': self.cancha.id}
+        with override_settings(EVENTOS_KEEPALIVE_SEGUNDOS=5):
+            flujo = eventos.aflujo([self.cancha.id], self.fecha)
+            self.assertTrue((await anext(flujo)).startswith('retry:'))
+            self.assertIn('event: estado', await anext(flujo))
+            threading.Timer(0.05, eventos.obtener_broker().publicar,
+                            [eventos.canal(self.cancha.id, self.fecha), ('liberada', datos)]).start()
+            self.assertEqual(await anext(flujo), eventos.formatear('liberada', datos))
+            await flujo.aclose()
+
+
+class BaseDeDatosTests(TestCase):
+    """Tests para el perfil de base de datos"""
+
+    def test_pragmas_sqlite(self):
+        """Test: Las conexiones SQLite aplican los PRAGMAs y el busy timeout configurados"""
+        from django.db import connection
+        if connection.vendor != 'sqlite':
+            self.skipTest('Solo aplica a SQLite')
+        
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64000)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+
+
+class SettingsPorEntornoTests(TestCase):
+    """Tests para la división de settings (base/dev/prod) según DJANGO_ENV"""
+
+    def cargar_settings(self, **entorno):
+        """Importa los settings en un proceso aparte y retorna (código de salida, salida)"""
+        import os
+        import subprocess
+        import sys
+        from django.conf import settings
+        entorno = {**{clave: valor for clave, valor in os.environ.items() if not clave.startswith('DJANGO_')},
+                   'DJANGO_SETTINGS_MODULE': 'canchas_project.settings', **entorno}
+        codigo = ('from django.conf import settings; '
+                  'print(settings.DEBUG, settings.SECRET_KEY, settings.STORAGES["staticfiles"]["BACKEND"])')
+        proceso = subprocess.run([sys.executable, '-c', codigo], cwd=settings.BASE_DIR, env=entorno,
+                                 capture_output=True, text=True)
+        return proceso.returncode, proceso.stdout + proceso.stderr
+
+    def test_prod_exige_secret_key(self):
+        """Test: Con DJANGO_ENV=prod la clave sale del entorno y sin ella los settings no cargan"""
+        codigo, salida = self.cargar_settings(DJANGO_ENV='prod', DJANGO_SECRET_KEY='clave-de-prueba')
+        self.assertEqual(codigo, 0, salida)
+        self.assertEqual(salida.split(), [
+            'False', 'clave-de-prueba', 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+        ])
+
+        codigo, salida = self.cargar_settings(DJANGO_ENV='prod')
+        self.assertNotEqual(codigo, 0)
+        self.assertIn('DJANGO_SECRET_KEY', salida)
+
+    def test_clave_insegura_solo_en_dev(self):
+        """Test: base.py no trae una clave fija; dev.py usa la de desarrollo si no hay otra"""
+        codigo, salida = self.cargar_settings()
+        self.assertEqual(codigo, 0, salida)
+        self.assertTrue(salida.split()[1].startswith('django-insecure-'))
+
+        import os
+        from canchas_project.settings import base
+        self.assertEqual(base.SECRET_KEY, os.environ.get('DJANGO_SECRET_KEY', ''))
+
+    def test_prod_no_modifica_base(self):
+        """Test: Importar prod no cambia los templates, la base ni los middleware de base y dev"""
+        import os
+        from importlib import import_module
+        from canchas_project.settings import base, dev
+        clave_anterior = os.environ.get('DJANGO_SECRET_KEY')
+        os.environ['DJANGO_SECRET_KEY'] = 'clave-de-prueba'
+        try:
+            prod = import_module('canchas_project.settings.prod')
+        finally:
+            if clave_anterior is None:
+                del os.environ['DJANGO_SECRET_KEY']
+            else:
+                os.environ['DJANGO_SECRET_KEY'] = clave_anterior
+        self.assertIn('whitenoise.middleware.WhiteNoiseMiddleware', prod.MIDDLEWARE)
+        self.assertEqual(prod.DATABASES['default']['CONN_MAX_AGE'], int(os.environ.get('DB_CONN_MAX_AGE', 600)))
+        for perfil in (base, dev):
+            self.assertTrue(perfil.TEMPLATES[0]['APP_DIRS'])
+            self.assertNotIn('loaders', perfil.TEMPLATES[0]['OPTIONS'])
+            self.assertNotIn('whitenoise.middleware.WhiteNoiseMiddleware', perfil.MIDDLEWARE)
+            self.assertEqual(perfil.DATABASES['default']['CONN_MAX_AGE'], int(os.environ.get('DB_CONN_MAX_AGE', 60)))
+
 
 class ReservaViewTests(TestCase):
     """Tests para las vistas de Reserva"""
@@ -365,6 +1055,721 @@ class ReservaViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'reservas/reservas/form.html')
 
+    def test_pagar_mercadopago_sin_configurar(self):
+        """Test: La vista async de MercadoPago crea el pago pendiente y, sin token, vuelve al detalle"""
+        inicio = timezone.now() + timedelta(days=1)
+        reserva = Reserva.objects.create(cliente=self.cliente, cancha=self.cancha,
+                                         fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1))
+
+        response = self.client.get(reverse('reserva_pagar_mercadopago', args=[reserva.pk]))
+        self.assertRedirects(response, reverse('reserva_detalle', args=[reserva.pk]), fetch_redirect_response=False)
+        self.assertEqual(Pago.objects.get(reserva=reserva).monto_total, reserva.cotizar()['total'])
+
+
+    def test_cliente_de_mercadopago(self):
+        """Test: httpx es el cliente por defecto y el SDK solo se usa si se elige el modo degradado"""
+        with self.settings(MERCADOPAGO_CLIENTE='sdk'):
+            self.assertEqual(pasarela.cliente_configurado(), 'sdk')
+        if pasarela.httpx is None:
+            with self.assertRaisesMessage(ImproperlyConfigured, "MERCADOPAGO_CLIENTE = 'sdk'"):
+                pasarela.cliente_configurado()
+        else:
+            self.assertEqual(pasarela.cliente_configurado(), 'httpx')
+        
+        # Mal configurado: el pago vuelve al detalle con el error, sin llamar a MercadoPago
+        inicio = timezone.now() + timedelta(days=1)
+        reserva = Reserva.objects.create(cliente=self.cliente, cancha=self.cancha,
+                                         fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1))
+        with self.settings(MERCADOPAGO_ACCESS_TOKEN='token', MERCADOPAGO_CLIENTE='requests'):
+            response = self.client.get(reverse('reserva_pagar_mercadopago', args=[reserva.pk]), follow=True)
+        self.assertContains(response, 'MERCADOPAGO_CLIENTE debe ser uno de httpx, sdk')
+
+class AgendaTests(TestCase):
+    """Tests para la grilla de ocupación de canchas"""
+
+    def setUp(self):
+        cache.clear()
+        self.cliente = Cliente.objects.create(
+            nombre="Juan",
+            apellido="Pérez",
+            dni="12345678",
+            email="juan@example.com"
+        )
+        self.tipo_cancha = TipoCancha.objects.create(nombre="Fútbol 5")
+        self.canchas = [
+            Cancha.objects.create(nombre=f"Cancha {i}", tipo_cancha=self.tipo_cancha,
+                                  precio_por_hora=Decimal("5000.00"))
+            for i in range(5)
+        ]
+        self.fecha = timezone.localdate() + timedelta(days=1)
+        inicio = timezone.make_aware(datetime.combine(self.fecha, time(10, 30)))
+        self.reserva = Reserva.objects.create(
+            cliente=self.cliente, cancha=self.canchas[0],
+            fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1, minutes=30),
+        )
+
+    def test_reserva_ocupa_franjas_que_toca(self):
+        """Test: Una reserva de 10:30 a 12:00 ocupa las franjas de 10 y 11 hs"""
+        grilla = grilla_ocupacion(self.fecha)
+        
+        horas = [franja.hour for franja in grilla['franjas']]
+        fila = grilla['dias'][0]['filas'][0]
+        ocupadas = [hora for hora, celda in zip(horas, fila['celdas']) if celda]
+        self.assertEqual(ocupadas, [10, 11])
+        self.assertEqual(fila['celdas'][horas.index(10)]['reserva_id'], self.reserva.id)
+        self.assertEqual(fila['libres'], len(horas) - 2)
+
+    def test_consultas_constantes(self):
+        """Test: La grilla semanal usa las mismas consultas con 5 o 50 canchas, y la caché las reduce"""
+        catalogo.catalogo()
+        with self.assertNumQueries(1):
+            grilla_ocupacion(self.fecha, dias=7)
+        
+        for i in range(5, 50):
+            Cancha.objects.create(nombre=f"Cancha {i}", tipo_cancha=self.tipo_cancha,
+                                  precio_por_hora=Decimal("5000.00"))
+        # Los días ya están en caché: solo se recarga el catálogo (tipos, canchas y servicios)
+        with self.assertNumQueries(3):
+            grilla = grilla_ocupacion(self.fecha, dias=7)
+        self.assertEqual(len(grilla['dias'][0]['filas']), 50)
+
+    def test_cancelar_invalida_cache(self):
+        """Test: Al cancelar una reserva la grilla deja de mostrarla"""
+        grilla_ocupacion(self.fecha)
+        self.reserva.cancelar()
+        
+        fila = grilla_ocupacion(self.fecha)['dias'][0]['filas'][0]
+        self.assertTrue(all(celda is None for celda in fila['celdas']))
+
+    def test_vista_agenda(self):
+        """Test: Se puede acceder a la agenda por día y por semana"""
+        for vista in ['dia', 'semana']:
+            response = self.client.get(reverse('agenda'), {'fecha': self.fecha.isoformat(), 'vista': vista})
+            self.assertEqual(response.status_code, 200)
+            self.assertTemplateUsed(response, 'reservas/agenda/grilla.html')
+            self.assertContains(response, f'#{self.reserva.id} Juan Pérez')
+
+
+class HorariosLibresTests(TestCase):
+    """Tests para la búsqueda de horarios libres"""
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(
+            nombre="Juan",
+            apellido="Pérez",
+            dni="12345678",
+            email="juan@example.com"
+        )
+        self.futbol = TipoCancha.objects.create(nombre="Fútbol 5")
+        self.paddle = TipoCancha.objects.create(nombre="Paddle")
+        self.cancha_a = Cancha.objects.create(nombre="Cancha A", tipo_cancha=self.futbol,
+                                              precio_por_hora=Decimal("5000.00"))
+        self.cancha_b = Cancha.objects.create(nombre="Cancha B", tipo_cancha=self.paddle,
+                                              precio_por_hora=Decimal("3000.00"))
+        self.fecha = timezone.localdate() + timedelta(days=1)
+        # Cancha A ocupada de 18 a 20 (dos reservas seguidas), Cancha B de 19 a 21
+        self.reservar(self.cancha_a, 18, 19)
+        self.reservar(self.cancha_a, 19, 20)
+        self.reservar(self.cancha_b, 19, 21)
+
+    def hora(self, hora, minutos=0):
+        return timezone.make_aware(datetime.combine(self.fecha, time(hora, minutos)))
+
+    def reservar(self, cancha, desde, hasta):
+        return Reserva.objects.create(cliente=self.cliente, cancha=cancha,
+                                      fecha_hora_inicio=self.hora(desde), fecha_hora_fin=self.hora(hasta))
+
+    def test_intervalos_libres_une_ocupados(self):
+        """Test: Los intervalos ocupados contiguos o solapados se unen"""
+        ocupados = [(self.hora(10), self.hora(11)), (self.hora(11), self.hora(12)), (self.hora(11, 30), self.hora(13))]
+        self.assertEqual(
+            intervalos_libres(ocupados, self.hora(8), self.hora(23)),
+            [(self.hora(8), self.hora(10)), (self.hora(13), self.hora(23))],
+        )
+
+    def test_horarios_mas_cercanos(self):
+        """Test: Devuelve los horarios libres más cercanos en todas las canchas, sin solaparse con reservas"""
+        catalogo.catalogo()
+        with self.assertNumQueries(1):
+            horarios = buscar_horarios_libres(self.hora(19), timedelta(hours=2), cantidad=3)
+        
+        self.assertEqual(
+            [(h['cancha'], timezone.localtime(h['inicio']).hour, timezone.localtime(h['inicio']).minute)
+             for h in horarios],
+            [(self.cancha_a, 20, 0), (self.cancha_a, 20, 30), (self.cancha_b, 17, 0)],
+        )
+        for h in horarios:
+            self.assertTrue(h['cancha'].esta_disponible(h['inicio'], h['fin']))
+
+    def test_filtros_y_duracion(self):
+        """Test: Se puede filtrar por tipo de cancha y precio, y la duración respeta los límites"""
+        horarios = buscar_horarios_libres(self.hora(19), timedelta(hours=1), tipo_cancha_id=self.paddle.id)
+        self.assertTrue(all(h['cancha'] == self.cancha_b for h in horarios))
+        
+        horarios = buscar_horarios_libres(self.hora(19), timedelta(hours=1), precio_maximo=Decimal("4000"))
+        self.assertTrue(all(h['cancha'] == self.cancha_b for h in horarios))
+        
+        with self.assertRaises(ValidationError):
+            buscar_horarios_libres(self.hora(19), timedelta(hours=5))
+
+    def test_api_horarios_libres(self):
+        """Test: La API devuelve JSON y valida los parámetros"""
+        response = self.client.get(reverse('horarios_libres'), {
+            'inicio': f'{self.fecha.isoformat()}T17:00', 'duracion': 1, 'cantidad': 2,
+        })
+        self.assertEqual(response.status_code, 200)
+        horarios = response.json()['horarios']
+        # Las dos canchas están libres a las 17: primero la más barata
+        self.assertEqual([(h['cancha_id'], h['diferencia_minutos']) for h in horarios],
+                         [(self.cancha_b.id, 0), (self.cancha_a.id, 0)])
+        
+        self.assertEqual(self.client.get(reverse('horarios_libres')).status_code, 400)
+        response = self.client.get(reverse('horarios_libres'), {'inicio': f'{self.fecha.isoformat()}T19:00', 'duracion': 6})
+        self.assertEqual(response.status_code, 400)
+
+
+class ValidacionEnBloqueTests(TestCase):
+    """Tests para la validación en bloque de reservas"""
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(
+            nombre="Juan",
+            apellido="Pérez",
+            dni="12345678",
+            email="juan@example.com"
+        )
+        self.inactivo = Cliente.objects.create(
+            nombre="Ana",
+            apellido="García",
+            dni="87654321",
+            email="ana@example.com",
+            activo=False
+        )
+        tipo = TipoCancha.objects.create(nombre="Fútbol 5")
+        self.cancha = Cancha.objects.create(nombre="Cancha 1", tipo_cancha=tipo, precio_por_hora=Decimal("5000.00"))
+        self.cerrada = Cancha.objects.create(nombre="Cancha 2", tipo_cancha=tipo, precio_por_hora=Decimal("5000.00"),
+                                             activa=False)
+        self.fecha = timezone.localdate() + timedelta(days=1)
+        self.existente = Reserva.objects.create(cliente=self.cliente, cancha=self.cancha,
+                                                fecha_hora_inicio=self.hora(18), fecha_hora_fin=self.hora(20))
+
+    def hora(self, hora, dias=0):
+        return timezone.make_aware(datetime.combine(self.fecha + timedelta(days=dias), time(hora)))
+
+    def candidata(self, desde, hasta, cancha=None, cliente=None, dias=0):
+        return Reserva(cliente_id=(cliente or self.cliente).id, cancha_id=(cancha or self.cancha).id,
+                       fecha_hora_inicio=self.hora(desde, dias), fecha_hora_fin=self.hora(hasta, dias))
+
+    def test_mismos_errores_que_clean(self):
+        """Test: Cada candidata recibe el mismo error que levantaría clean()"""
+        candidatas = [
+            self.candidata(10, 11),
+            self.candidata(11, 10),
+            self.candidata(10, 11, dias=-2),
+            self.candidata(7, 9),
+            self.candidata(10, 15),
+            self.candidata(19, 21),
+            self.candidata(10, 11, cancha=self.cerrada),
+            self.candidata(10, 11, cancha=self.cerrada, cliente=self.inactivo),
+            self.candidata(12, 13, cliente=self.inactivo),
+        ]
+        
+        errores = validar_reservas(candidatas)
+        
+        for candidata, error in zip(candidatas, errores):
+            try:
+                Reserva(cliente_id=candidata.cliente_id, cancha_id=candidata.cancha_id,
+                        fecha_hora_inicio=candidata.fecha_hora_inicio, fecha_hora_fin=candidata.fecha_hora_fin).clean()
+                esperado = None
+            except ValidationError as e:
+                esperado = e.message_dict
+            self.assertEqual(error.message_dict if error else None, esperado)
+        self.assertIsNone(errores[0])
+
+    def test_choques_entre_candidatas(self):
+        """Test: Las candidatas válidas ocupan su horario y cuentan para el límite diario"""
+        errores = validar_reservas([
+            self.candidata(10, 12),
+            self.candidata(11, 13),
+            self.candidata(14, 15),
+            self.candidata(15, 16),
+        ])
+        
+        self.assertIsNone(errores[0])
+        self.assertEqual(errores[1].message_dict, {'cancha': ['La cancha no está disponible en el horario seleccionado.']})
+        self.assertIsNone(errores[2])
+        # La existente y las dos válidas llegan al límite de 3 por día
+        self.assertEqual(errores[3].message_dict,
+                         {'cliente': ['El cliente ya alcanzó el límite de 3 reservas para este día.']})
+
+    def test_editar_no_choca_consigo_misma(self):
+        """Test: Una reserva existente no choca con su propio horario"""
+        self.existente.fecha_hora_fin = self.hora(21)
+        self.assertEqual(validar_reservas([self.existente]), [None])
+
+    def test_editar_en_el_limite_diario(self):
+        """Test: clean() y validar_reservas() coinciden al editar una reserva de un cliente en el límite diario"""
+        otras = [Reserva.objects.create(cliente=self.cliente, cancha=self.cancha,
+                                        fecha_hora_inicio=self.hora(desde), fecha_hora_fin=self.hora(desde + 1))
+                 for desde in (10, 12)]
+        editada = Reserva.objects.get(pk=otras[0].pk)
+        editada.fecha_hora_fin = self.hora(12)
+        nueva = self.candidata(14, 15)
+        
+        for reserva in (editada, nueva):
+            try:
+                reserva.clean()
+                esperado = None
+            except ValidationError as e:
+                esperado = e.message_dict
+            error = validar_reservas([reserva])[0]
+            self.assertEqual(error.message_dict if error else None, esperado)
+        self.assertEqual(validar_reservas([editada, nueva])[0], None)
+        self.assertEqual(validar_reservas([nueva])[0].message_dict,
+                         {'cliente': ['El cliente ya alcanzó el límite de 3 reservas para este día.']})
+
+    def test_consultas_constantes(self):
+        """Test: Dos consultas sin importar la cantidad de candidatas (las canchas salen del catálogo)"""
+        candidatas = [self.candidata(10, 11, dias=dias) for dias in range(30)]
+        catalogo.catalogo()
+        with self.assertNumQueries(2):
+            validar_reservas(candidatas)
+        with self.assertNumQueries(0):
+            self.assertTrue(all(candidata.cancha.nombre for candidata in candidatas))
+
+
+@override_settings(TAREAS_EN_SEGUNDO_PLANO=False)
+class ListaEsperaTests(TestCase):
+    """Tests para la lista de espera y la promoción al cancelar"""
+
+    def setUp(self):
+        self.titular = Cliente.objects.create(nombre="Juan", apellido="Pérez", dni="12345678", email="juan@example.com")
+        self.primero = Cliente.objects.create(nombre="Ana", apellido="García", dni="87654321", email="ana@example.com")
+        self.segundo = Cliente.objects.create(nombre="Luis", apellido="Gómez", dni="11223344", email="luis@example.com")
+        tipo = TipoCancha.objects.create(nombre="Fútbol 5")
+        self.cancha = Cancha.objects.create(nombre="Cancha 1", tipo_cancha=tipo, precio_por_hora=Decimal("5000.00"))
+        self.fecha = timezone.localdate() + timedelta(days=1)
+        self.reserva = Reserva.objects.create(cliente=self.titular, cancha=self.cancha,
+                                              fecha_hora_inicio=self.hora(19), fecha_hora_fin=self.hora(21))
+
+    def hora(self, hora):
+        return timezone.make_aware(datetime.combine(self.fecha, time(hora)))
+
+    def esperar(self, cliente, desde, hasta):
+        return EsperaReserva.objects.create(cliente=cliente, cancha=self.cancha,
+                                            fecha_hora_inicio=self.hora(desde), fecha_hora_fin=self.hora(hasta))
+
+    def test_cancelar_promueve_primera_espera(self):
+        """Test: Al cancelar se promueve la primera espera que entra en el horario, con su pago"""
+        primera = self.esperar(self.primero, 19, 21)
+        segunda = self.esperar(self.segundo, 20, 21)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reserva.cancelar()
+        
+        primera.refresh_from_db()
+        segunda.refresh_from_db()
+        self.assertEqual(primera.estado, 'PROMOVIDA')
+        self.assertEqual(primera.reserva.cliente, self.primero)
+        # Con el recargo de horario pico, como una reserva hecha desde el formulario
+        self.assertEqual(primera.reserva.pago.monto_total, Decimal("12000.00"))
+        # Se solapa con la primera: sigue esperando
+        self.assertEqual(segunda.estado, 'ESPERANDO')
+
+    def test_horario_cancelado_se_puede_volver_a_reservar(self):
+        """Test: Dos pedidos simultáneos por el mismo horario: el segundo recibe el error de clean()"""
+        Reserva.objects.filter(pk=self.reserva.pk).update(estado='CANCELADA')
+        Reserva.objects.create(cliente=self.primero, cancha=self.cancha,
+                               fecha_hora_inicio=self.hora(19), fecha_hora_fin=self.hora(20))
+        
+        with self.assertRaises(ValidationError) as contexto:
+            Reserva.objects.create(cliente=self.segundo, cancha=self.cancha,
+                                   fecha_hora_inicio=self.hora(19), fecha_hora_fin=self.hora(21))
+        self.assertEqual(contexto.exception.message_dict,
+                         {'cancha': ['La cancha no está disponible en el horario seleccionado.']})
+
+    def test_reactivar_reserva_con_horario_tomado(self):
+        """Test: Volver a PENDIENTE una cancelada cuyo horario ya se reservó muestra el error en el formulario"""
+        Reserva.objects.filter(pk=self.reserva.pk).update(estado='CANCELADA')
+        Reserva.objects.create(cliente=self.primero, cancha=self.cancha,
+                               fecha_hora_inicio=self.hora(19), fecha_hora_fin=self.hora(21))
+        
+        response = self.client.post(reverse('reserva_editar', args=[self.reserva.id]), {'estado': 'PENDIENTE'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'La cancha no está disponible en el horario seleccionado.')
+        self.assertNotContains(response, 'UNIQUE')
+        self.reserva.refresh_from_db()
+        self.assertEqual(self.reserva.estado, 'CANCELADA')
+
+    def test_promueve_varias_esperas_que_no_se_solapan(self):
+        """Test: Un horario liberado puede repartirse entre varias esperas"""
+        self.esperar(self.primero, 19, 20)
+        self.esperar(self.segundo, 20, 21)
+        # No entra en el horario liberado
+        self.esperar(self.titular, 18, 20)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('reserva_eliminar', args=[self.reserva.id]))
+        
+        self.assertEqual(
+            list(EsperaReserva.objects.order_by('id').values_list('estado', flat=True)),
+            ['PROMOVIDA', 'PROMOVIDA', 'ESPERANDO'],
+        )
+
+    def test_no_promueve_si_el_cliente_llego_al_limite(self):
+        """Test: La promoción aplica las mismas validaciones que una reserva nueva"""
+        otra = Cancha.objects.create(nombre="Cancha 2", tipo_cancha=self.cancha.tipo_cancha,
+                                     precio_por_hora=Decimal("5000.00"))
+        for hora in range(8, 11):
+            Reserva.objects.create(cliente=self.primero, cancha=otra,
+                                   fecha_hora_inicio=self.hora(hora), fecha_hora_fin=self.hora(hora + 1))
+        self.esperar(self.primero, 19, 21)
+        segunda = self.esperar(self.segundo, 19, 20)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reserva.delete()
+        
+        segunda.refresh_from_db()
+        self.assertEqual(segunda.estado, 'PROMOVIDA')
+        self.assertEqual(EsperaReserva.objects.filter(estado='ESPERANDO').count(), 1)
+
+    def test_busqueda_usa_indice(self):
+        """Test: Las esperas compatibles se buscan por el índice (cancha, horario)"""
+        plan = esperas_compatibles(self.cancha.id, self.hora(19), self.hora(21)).explain()
+        self.assertIn('espera_cancha_horario_idx', plan)
+
+    def test_vista_lista_espera(self):
+        """Test: Se puede anotar a un cliente y no se aceptan horarios pasados"""
+        response = self.client.post(reverse('lista_espera'), {
+            'cliente': self.primero.id, 'cancha': self.cancha.id,
+            'fecha': self.fecha.isoformat(), 'hora_inicio': '19:00', 'hora_fin': '20:00',
+        })
+        self.assertRedirects(response, reverse('lista_espera'))
+        self.assertEqual(EsperaReserva.objects.filter(cliente=self.primero).count(), 1)
+        
+        self.client.post(reverse('lista_espera'), {
+            'cliente': self.segundo.id, 'cancha': self.cancha.id,
+            'fecha': (timezone.localdate() - timedelta(days=1)).isoformat(), 'hora_inicio': '19:00', 'hora_fin': '20:00',
+        })
+        self.assertFalse(EsperaReserva.objects.filter(cliente=self.segundo).exists())
+        self.assertContains(self.client.get(reverse('lista_espera')), 'García')
+
+
+@override_settings(TAREAS_EN_SEGUNDO_PLANO=False, RESERVA_PENDIENTE_TTL_MINUTOS=60)
+class VencimientoReservasTests(TestCase):
+    """Tests para el vencimiento de reservas pendientes"""
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Juan", apellido="Pérez", dni="12345678", email="juan@example.com")
+        tipo = TipoCancha.objects.create(nombre="Fútbol 5")
+        self.cancha = Cancha.objects.create(nombre="Cancha 1", tipo_cancha=tipo, precio_por_hora=Decimal("5000.00"))
+        self.fecha = timezone.localdate() + timedelta(days=1)
+
+    def reservar(self, hora, estado='PENDIENTE', creada_hace=timedelta(hours=2)):
+        inicio = timezone.make_aware(datetime.combine(self.fecha, time(hora)))
+        reserva = Reserva.objects.create(cliente=self.cliente, cancha=self.cancha, estado=estado,
+                                         fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1))
+        Pago.objects.create(reserva=reserva, monto_total=Decimal("5000.00"),
+                            estado='PAGADO' if estado == 'PAGADA' else 'PENDIENTE')
+        Reserva.objects.filter(pk=reserva.pk).update(fecha_creacion=timezone.now() - creada_hace)
+        return reserva
+
+    def test_cancela_pendientes_vencidas_en_bloque(self):
+        """Test: Cancela solo las pendientes vencidas, anula sus pagos y deja el resto"""
+        vencida = self.reservar(10)
+        reciente = self.reservar(12, creada_hace=timedelta(minutes=10))
+        pagada = self.reservar(14, estado='PAGADA')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            resumen = vencer_reservas_pendientes()
+        
+        self.assertEqual(resumen['reservas'], 1)
+        self.assertEqual(resumen['pagos'], 1)
+        self.assertEqual(resumen['monto_sin_cobrar'], Decimal("5000.00"))
+        self.assertEqual(resumen['por_cancha'], {'Cancha 1': 1})
+        vencida.refresh_from_db()
+        self.assertEqual(vencida.estado, 'CANCELADA')
+        self.assertIn('vencida sin pago', vencida.observaciones)
+        self.assertEqual(vencida.pago.estado, 'ANULADO')
+        self.assertEqual(Reserva.objects.get(pk=reciente.pk).estado, 'PENDIENTE')
+        self.assertEqual(Reserva.objects.get(pk=pagada.pk).estado, 'PAGADA')
+
+    def test_libera_horario_para_lista_de_espera(self):
+        """Test: El horario de una reserva vencida se ofrece a la lista de espera"""
+        vencida = self.reservar(10)
+        otro = Cliente.objects.create(nombre="Ana", apellido="García", dni="87654321", email="ana@example.com")
+        espera = EsperaReserva.objects.create(cliente=otro, cancha=self.cancha,
+                                              fecha_hora_inicio=vencida.fecha_hora_inicio,
+                                              fecha_hora_fin=vencida.fecha_hora_fin)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            vencer_reservas_pendientes()
+        
+        espera.refresh_from_db()
+        self.assertEqual(espera.estado, 'PROMOVIDA')
+
+    def test_comando_vencer_reservas(self):
+        """Test: El comando muestra el resumen y --simular no modifica nada"""
+        self.reservar(10)
+        salida = StringIO()
+        call_command('vencer_reservas', '--simular', stdout=salida)
+        self.assertIn('Se cancelarían: 1 reservas', salida.getvalue())
+        self.assertEqual(Reserva.objects.filter(estado='PENDIENTE').count(), 1)
+        
+        salida = StringIO()
+        call_command('vencer_reservas', '--ttl-minutos', '180', stdout=salida)
+        self.assertIn('Canceladas: 0 reservas', salida.getvalue())
+        
+        with self.assertRaises(CommandError):
+            call_command('vencer_reservas', '--ttl-minutos', '0')
+
+
+class EstadisticasClienteTests(TestCase):
+    """Tests para las estadísticas desnormalizadas de clientes"""
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Juan", apellido="Pérez", dni="12345678", email="juan@example.com")
+        tipo = TipoCancha.objects.create(nombre="Fútbol 5")
+        self.cancha = Cancha.objects.create(nombre="Cancha 1", tipo_cancha=tipo, precio_por_hora=Decimal("5000.00"))
+        self.fecha = timezone.localdate() + timedelta(days=1)
+
+    def reservar(self, hora, monto="5000.00"):
+        inicio = timezone.make_aware(datetime.combine(self.fecha, time(hora)))
+        reserva = Reserva.objects.create(cliente=self.cliente, cancha=self.cancha,
+                                         fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1))
+        Pago.objects.create(reserva=reserva, monto_total=Decimal(monto))
+        return reserva
+
+    def estadisticas(self):
+        return EstadisticasCliente.objects.get(cliente=self.cliente)
+
+    def assertIgualAlRecalculo(self):
+        actual = EstadisticasCliente.objects.values().get(cliente=self.cliente)
+        recalcular_estadisticas([self.cliente.pk])
+        recalculada = EstadisticasCliente.objects.values().get(cliente=self.cliente)
+        actual.pop('fecha_actualizacion')
+        recalculada.pop('fecha_actualizacion')
+        self.assertEqual(actual, recalculada)
+
+    def test_transiciones_de_estado(self):
+        """Test: pagar, cancelar y marcar_como_pagado mantienen los totales"""
+        primera = self.reservar(10)
+        segunda = self.reservar(12, monto="7000.00")
+        self.reservar(14)
+        
+        primera.pagar()
+        segunda.pago.marcar_como_pagado('EFECTIVO')
+        estadisticas = self.estadisticas()
+        self.assertEqual((estadisticas.total_reservas, estadisticas.reservas_pagadas), (3, 2))
+        self.assertEqual(estadisticas.total_gastado, Decimal("12000.00"))
+        self.assertEqual(estadisticas.ultima_visita, segunda.fecha_hora_inicio)
+        
+        # Cancelar una pagada la descuenta y reembolsa su pago
+        segunda.cancelar('No viene')
+        estadisticas = self.estadisticas()
+        self.assertEqual((estadisticas.reservas_pagadas, estadisticas.reservas_canceladas), (1, 1))
+        self.assertEqual(estadisticas.total_gastado, Decimal("5000.00"))
+        self.assertEqual(estadisticas.ultima_visita, primera.fecha_hora_inicio)
+        self.assertIgualAlRecalculo()
+
+    def test_vistas_y_borrado(self):
+        """Test: Las vistas que cambian el estado y el borrado también actualizan los totales"""
+        reserva = self.reservar(10)
+        self.client.post(reverse('reserva_marcar_pagada', args=[reserva.id]), {'metodo_pago': 'EFECTIVO'})
+        self.assertEqual(self.estadisticas().reservas_pagadas, 1)
+        
+        otra = self.reservar(12)
+        self.client.post(reverse('reserva_eliminar', args=[otra.id]))
+        self.assertEqual(self.estadisticas().reservas_canceladas, 1)
+        self.assertIgualAlRecalculo()
+        
+        reserva.refresh_from_db()
+        reserva.delete()
+        estadisticas = self.estadisticas()
+        self.assertEqual((estadisticas.total_reservas, estadisticas.reservas_pagadas), (1, 0))
+        self.assertEqual(estadisticas.total_gastado, Decimal("0"))
+
+    def test_cambio_de_estado_desde_el_admin(self):
+        """Test: Un cambio de estado guardado desde el admin (o con save()) también actualiza los totales"""
+        User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        self.client.login(username='admin', password='clave')
+        reserva = self.reservar(10)
+        inicio = timezone.localtime(reserva.fecha_hora_inicio)
+        fin = timezone.localtime(reserva.fecha_hora_fin)
+        
+        response = self.client.post(reverse('admin:reservas_reserva_change', args=[reserva.id]), {
+            'cliente': self.cliente.id, 'cancha': self.cancha.id, 'estado': 'PAGADA',
+            'fecha_hora_inicio_0': inicio.strftime('%Y-%m-%d'), 'fecha_hora_inicio_1': inicio.strftime('%H:%M:%S'),
+            'fecha_hora_fin_0': fin.strftime('%Y-%m-%d'), 'fecha_hora_fin_1': fin.strftime('%H:%M:%S'),
+            'torneo': '', 'observaciones': '',
+            'pago-TOTAL_FORMS': '1', 'pago-INITIAL_FORMS': '1', 'pago-MIN_NUM_FORMS': '0', 'pago-MAX_NUM_FORMS': '1',
+            'pago-0-reserva': reserva.id, 'pago-0-monto_total': '6000.00',
+            'pago-0-estado': 'PAGADO', 'pago-0-metodo_pago': 'EFECTIVO',
+            'pago-0-fecha_pago_0': inicio.strftime('%Y-%m-%d'), 'pago-0-fecha_pago_1': '09:00:00',
+            'pago-0-comprobante': '', 'pago-0-observaciones': '',
+        })
+        self.assertRedirects(response, reverse('admin:reservas_reserva_changelist'))
+        estadisticas = self.estadisticas()
+        self.assertEqual(estadisticas.reservas_pagadas, 1)
+        self.assertEqual(estadisticas.total_gastado, Decimal("6000.00"))
+        self.assertEqual(estadisticas.ultima_visita, reserva.fecha_hora_inicio)
+        self.assertIgualAlRecalculo()
+        
+        # Un save() directo, sin pasar por cancelar()
+        reserva = Reserva.objects.get(pk=reserva.pk)
+        reserva.estado = 'CANCELADA'
+        reserva.save()
+        estadisticas = self.estadisticas()
+        self.assertEqual((estadisticas.reservas_pagadas, estadisticas.reservas_canceladas), (0, 1))
+        self.assertIgualAlRecalculo()
+
+    def test_descuento_cliente_frecuente_sin_contar(self):
+        """Test: El descuento por cliente frecuente lee las estadísticas en lugar de contar reservas"""
+        EstadisticasCliente.objects.filter(cliente=self.cliente).update(reservas_pagadas=5)
+        reserva = Reserva.objects.select_related('cliente__estadisticas', 'cancha').get(pk=self.reservar(14).pk)
+        tabla_de_reglas()
+        catalogo.catalogo()
+        with self.assertNumQueries(1):
+            # Solo la consulta de servicios del costo base
+            costo = reserva.calcular_costo_total(usar_mejor_precio=True)
+        self.assertEqual(costo, 4500.0)
+
+    def test_detalle_paginado(self):
+        """Test: El detalle del cliente muestra las estadísticas y pagina el historial"""
+        for dias in range(12):
+            inicio = timezone.make_aware(datetime.combine(self.fecha + timedelta(days=dias), time(10)))
+            Reserva.objects.create(cliente=self.cliente, cancha=self.cancha,
+                                   fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1))
+        
+        response = self.client.get(reverse('cliente_detalle', args=[self.cliente.id]))
+        self.assertEqual(len(response.context['reservas']), 10)
+        self.assertEqual(response.context['estadisticas'].total_reservas, 12)
+        response = self.client.get(reverse('cliente_detalle', args=[self.cliente.id]), {'page': 2})
+        self.assertEqual(len(response.context['reservas']), 2)
+
+
+class SerieReservaTests(TestCase):
+    """Tests para las series de reservas recurrentes"""
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(
+            nombre="Juan",
+            apellido="Pérez",
+            dni="12345678",
+            email="juan@example.com"
+        )
+        self.otro = Cliente.objects.create(
+            nombre="Ana",
+            apellido="García",
+            dni="87654321",
+            email="ana@example.com"
+        )
+        tipo = TipoCancha.objects.create(nombre="Fútbol 5")
+        self.cancha = Cancha.objects.create(nombre="Cancha 1", tipo_cancha=tipo, precio_por_hora=Decimal("5000.00"))
+        self.otra_cancha = Cancha.objects.create(nombre="Cancha 2", tipo_cancha=tipo, precio_por_hora=Decimal("5000.00"))
+        self.servicio = Servicio.objects.create(nombre="Pelota", costo_adicional=Decimal("500.00"))
+        self.desde = timezone.localdate() + timedelta(days=1)
+
+    def crear(self, semanas=4, **kwargs):
+        datos = {
+            'cliente': self.cliente, 'cancha': self.cancha,
+            'fecha_desde': self.desde, 'fecha_hasta': self.desde + timedelta(weeks=semanas - 1),
+            'hora_inicio': time(18, 0), 'hora_fin': time(20, 0),
+        }
+        datos.update(kwargs)
+        return crear_serie(**datos)
+
+    def reservar(self, fecha, cancha, cliente, desde=18, hasta=19):
+        return Reserva.objects.create(
+            cliente=cliente, cancha=cancha,
+            fecha_hora_inicio=timezone.make_aware(datetime.combine(fecha, time(desde))),
+            fecha_hora_fin=timezone.make_aware(datetime.combine(fecha, time(hasta))),
+        )
+
+    def test_crea_ocurrencias_con_pagos(self):
+        """Test: Una serie semanal crea una reserva pendiente con su pago por semana"""
+        resultado = self.crear(servicios=[self.servicio])
+        
+        self.assertEqual(resultado['conflictos'], {})
+        reservas = Reserva.objects.filter(serie=resultado['serie']).order_by('fecha_hora_inicio')
+        self.assertEqual(reservas.count(), 4)
+        self.assertEqual(timezone.localtime(reservas[1].fecha_hora_inicio).date(), self.desde + timedelta(weeks=1))
+        self.assertEqual(list(reservas[0].servicios.all()), [self.servicio])
+        # 18 a 20 hs: recargo de horario pico sobre cancha y servicio
+        self.assertEqual(Pago.objects.filter(reserva__serie=resultado['serie'], monto_total=Decimal("12600.00")).count(), 4)
+        
+        quincenal = self.crear(cancha=self.otra_cancha, frecuencia='QUINCENAL')
+        self.assertEqual(len(quincenal['reservas']), 2)
+
+    def test_monto_por_ocurrencia(self):
+        """Test: Cada pago de la serie es la cotización de su propia reserva, al centavo"""
+        self.servicio.costo_adicional = Decimal("333.33")
+        self.servicio.save()
+        resultado = self.crear(semanas=20, servicios=[self.servicio], hora_inicio=time(17, 30), hora_fin=time(19, 0))
+        
+        reservas = Reserva.objects.filter(serie=resultado['serie']).select_related('pago', 'cancha')
+        self.assertEqual(len(reservas), 20)
+        for reserva in reservas:
+            self.assertEqual(reserva.pago.monto_total, reserva.cotizar()['total'])
+        self.assertEqual(sum(reserva.pago.monto_total for reserva in reservas),
+                         sum(reserva.cotizar()['total'] for reserva in reservas))
+
+    def test_informa_y_saltea_conflictos(self):
+        """Test: Las fechas con la cancha ocupada o con el límite diario del cliente se informan y no se crean"""
+        ocupada = self.desde + timedelta(weeks=1)
+        self.reservar(ocupada, self.cancha, self.otro, 19, 21)
+        limite = self.desde + timedelta(weeks=2)
+        for hora in range(8, 11):
+            self.reservar(limite, self.otra_cancha, self.cliente, hora, hora + 1)
+        
+        resultado = self.crear()
+        
+        self.assertEqual(resultado['conflictos'], {
+            ocupada: 'La cancha no está disponible en el horario seleccionado.',
+            limite: 'El cliente ya alcanzó el límite de 3 reservas para este día.',
+        })
+        self.assertEqual(len(resultado['reservas']), 2)
+
+    def test_todo_o_nada(self):
+        """Test: Con todo_o_nada no se crea ninguna reserva si alguna fecha tiene conflicto"""
+        self.reservar(self.desde + timedelta(weeks=3), self.cancha, self.otro)
+        
+        resultado = self.crear(todo_o_nada=True)
+        
+        self.assertIsNone(resultado['serie'])
+        self.assertEqual(len(resultado['conflictos']), 1)
+        self.assertFalse(SerieReserva.objects.exists())
+        self.assertEqual(Reserva.objects.count(), 1)
+
+    def test_validaciones_de_toda_la_serie(self):
+        """Test: Los errores de horario usan los mismos mensajes que Reserva.clean()"""
+        with self.assertRaisesMessage(ValidationError, 'El complejo cierra a las 23:00.'):
+            self.crear(hora_inicio=time(22, 0), hora_fin=time(23, 30))
+        with self.assertRaisesMessage(ValidationError, 'La duración máxima de una reserva es de 4 horas.'):
+            self.crear(hora_inicio=time(10, 0), hora_fin=time(15, 0))
+
+    def test_consultas_constantes(self):
+        """Test: La cantidad de consultas no depende de la cantidad de ocurrencias"""
+        # Savepoint, la validación en bloque, cuatro inserts en bloque, las
+        # estadísticas del cliente y el release
+        with self.assertNumQueries(8):
+            self.crear(semanas=2, servicios=[self.servicio])
+        with self.assertNumQueries(8):
+            self.crear(semanas=20, cancha=self.otra_cancha, servicios=[self.servicio])
+
+    def test_vista_crear_serie(self):
+        """Test: La vista crea la serie y lista las fechas con conflicto"""
+        self.reservar(self.desde, self.cancha, self.otro)
+        response = self.client.post(reverse('reserva_serie_crear'), {
+            'cliente': self.cliente.id, 'cancha': self.cancha.id, 'frecuencia': 'SEMANAL',
+            'fecha_desde': self.desde.isoformat(), 'fecha_hasta': (self.desde + timedelta(weeks=2)).isoformat(),
+            'hora_inicio': '18:00', 'hora_fin': '19:00',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['resultado']['reservas']), 2)
+        self.assertContains(response, 'La cancha no está disponible en el horario seleccionado.')
+
 
 class ClienteViewTests(TestCase):
     """Tests para las vistas de Cliente"""
@@ -439,3 +1844,354 @@ class ReportesViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/pdf')
 
+    def cargar_mes(self):
+        """Reservas de marzo de 2025 con montos con centavos; una de cada diez sin pago"""
+        tipo = TipoCancha.objects.create(nombre="Fútbol 5")
+        canchas = [Cancha.objects.create(nombre=f"Cancha {n}", tipo_cancha=tipo, precio_por_hora=Decimal("4333.33"))
+                   for n in range(3)]
+        clientes = [Cliente.objects.create(nombre=f"Cliente{n}", apellido="Test", dni=f"4000000{n}",
+                                           email=f"c{n}@example.com", telefono="1234567890") for n in range(7)]
+        reservas = []
+        for dia in range(1, 29):
+            for hora in range(10, 15):
+                for cancha in canchas:
+                    inicio = timezone.make_aware(datetime(2025, 3, dia, hora))
+                    reservas.append(Reserva(cliente=clientes[len(reservas) % 7], cancha=cancha,
+                                            fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(minutes=90)))
+        reservas = Reserva.objects.bulk_create(reservas)
+        esperado = {'clientes': {}, 'canchas': {}}
+        pagos = []
+        for n, reserva in enumerate(reservas):
+            if n % 10:
+                monto = Decimal("1000.01") + Decimal(n) * Decimal("0.37")
+                pagos.append(Pago(reserva=reserva, monto_total=monto))
+            else:
+                # Costo base: 4333.33 * 1.5 = 6499.995 -> 6500.00
+                monto = Decimal("6500.00")
+            for clave, pk in (('clientes', reserva.cliente_id), ('canchas', reserva.cancha_id)):
+                esperado[clave][pk] = esperado[clave].get(pk, Decimal("0")) + monto
+        Pago.objects.bulk_create(pagos)
+        return esperado
+
+    def test_totales_al_centavo(self):
+        """Test: Los totales agregados en la base coinciden al centavo con la suma exacta de los montos"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        esperado = self.cargar_mes()
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/reportes/', {'mes': 3, 'anio': 2025})
+        # Sin consultas por cliente, cancha ni reserva (son 420 reservas)
+        self.assertLess(len(consultas), 15)
+
+        gastos = {item['cliente'].pk: item['total_gasto'] for item in response.context['clientes_con_reservas']}
+        ingresos = {item['cancha'].pk: item['total_ingresos'] for item in response.context['canchas_con_reservas']}
+        self.assertEqual(gastos, esperado['clientes'])
+        self.assertEqual(ingresos, esperado['canchas'])
+        for item in response.context['canchas_con_reservas']:
+            self.assertEqual(item['total_horas'], Decimal("210"))
+            self.assertEqual(sum(reserva.importe for reserva in item['reservas']), item['total_ingresos'])
+        self.assertEqual(response.context['meses_data'][-1]['total_reservas'], 420)
+
+        response = self.client.get('/reportes/pdf/', {'mes': 3, 'anio': 2025})
+        self.assertEqual(response.status_code, 200)
+
+    async def test_reportes_con_asgi(self):
+        """Test: Los reportes son vistas async y responden con el handler ASGI"""
+        from asgiref.sync import iscoroutinefunction, sync_to_async
+        from django.test import AsyncClient
+        from reservas import views
+        self.assertTrue(iscoroutinefunction(views.reportes))
+        self.assertTrue(iscoroutinefunction(views.reportes_pdf))
+        esperado = await sync_to_async(self.cargar_mes)()
+
+        response = await AsyncClient().get('/reportes/', {'mes': 3, 'anio': 2025})
+        self.assertEqual(response.status_code, 200)
+        ingresos = {item['cancha'].pk: item['total_ingresos'] for item in response.context['canchas_con_reservas']}
+        self.assertEqual(ingresos, esperado['canchas'])
+
+        response = await AsyncClient().get('/reportes/pdf/', {'mes': 3, 'anio': 2025})
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        # Con ASGI el archivo se envía con un iterador async
+        self.assertTrue(response.is_async)
+        contenido = b''.join([bloque async for bloque in response.streaming_content])
+        self.assertTrue(contenido.startswith(b'%PDF'))
+        self.assertEqual(len(contenido), int(response['Content-Length']))
+
+    def test_reportes_pdf_con_detalle(self):
+        """Test: El detalle por cliente y por cancha se arma sin consultas por reserva y se envía desde un archivo"""
+        from django.db import connection
+        from django.http import FileResponse
+        from django.test.utils import CaptureQueriesContext
+        self.cargar_mes()
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/reportes/pdf/', {'mes': 3, 'anio': 2025, 'detalle': 'clientes,canchas'})
+            contenido = b''.join(response.streaming_content)
+        self.assertLess(len(consultas), 20)
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="reporte_canchas_3_2025.pdf"')
+        self.assertTrue(contenido.startswith(b'%PDF'))
+        self.assertEqual(len(contenido), int(response['Content-Length']))
+
+        # 420 reservas, dos veces, en tramos de 40 filas: muchas más páginas que el resumen
+        sin_detalle = b''.join(self.client.get('/reportes/pdf/', {'mes': 3, 'anio': 2025}).streaming_content)
+        paginas = lambda pdf: len(re.findall(rb'/Type /Page\b', pdf))
+        self.assertEqual(paginas(sin_detalle), 2)
+        self.assertGreater(paginas(contenido), paginas(sin_detalle) + 20)
+
+    def test_tablas_largas_en_tramos(self):
+        """Test: Las tablas largas se parten en tablas de FILAS_POR_TABLA filas con el encabezado repetido"""
+        from reservas.reporte_pdf import FILAS_POR_TABLA, TABLA_DETALLE, ReportePDF
+        pdf = ReportePDF()
+        pdf.tabla(['N'], ([str(n)] for n in range(FILAS_POR_TABLA * 2 + 1)), None, TABLA_DETALLE)
+        self.assertEqual([len(tabla._cellvalues) for tabla in pdf.elementos],
+                         [FILAS_POR_TABLA + 1, FILAS_POR_TABLA + 1, 2])
+        self.assertTrue(all(tabla._cellvalues[0] == ['N'] and tabla.repeatRows == 1 for tabla in pdf.elementos))
+
+        with pdf.construir() as archivo:
+            self.assertTrue(archivo.read().startswith(b'%PDF'))
+
+    def test_montos_sin_float(self):
+        """Test: Los montos se redondean al centavo y no aceptan float"""
+        from reservas.dinero import costo_por_tiempo, dinero, formatear
+        self.assertEqual(dinero("10.005"), Decimal("10.01"))
+        self.assertEqual(formatear(Decimal("1234567.8")), "$1,234,567.80")
+        inicio = timezone.now()
+        self.assertEqual(costo_por_tiempo(Decimal("4333.33"), inicio, inicio + timedelta(minutes=90)), Decimal("6500.00"))
+        with self.assertRaises(TypeError):
+            dinero(0.1)
+
+
+class GenerarDatosCommandTests(TestCase):
+    """Tests para el comando generar_datos y el benchmark de vistas"""
+
+    def generar(self, **opciones):
+        parametros = dict(clientes=30, canchas=3, anios=0.05, torneos=3, equipos_por_torneo=4, seed=1)
+        parametros.update(opciones)
+        call_command('generar_datos', stdout=StringIO(), **parametros)
+
+    def test_genera_reservas_sin_superposicion_y_con_pago(self):
+        """Test: Cada reserva generada tiene su pago y no se superpone en la misma cancha"""
+        self.generar()
+        
+        self.assertEqual(Cliente.objects.count(), 30)
+        self.assertEqual(Cancha.objects.count(), 3)
+        self.assertGreater(Reserva.objects.count(), 0)
+        self.assertEqual(Pago.objects.count(), Reserva.objects.count())
+        
+        ultima_fin = {}
+        for reserva in Reserva.objects.order_by('cancha_id', 'fecha_hora_inicio'):
+            if reserva.cancha_id in ultima_fin:
+                self.assertLessEqual(ultima_fin[reserva.cancha_id], reserva.fecha_hora_inicio)
+            ultima_fin[reserva.cancha_id] = reserva.fecha_hora_fin
+
+    def test_genera_fixtures_completos(self):
+        """Test: Los torneos iniciados tienen el fixture completo (n-1 partidos)"""
+        self.generar()
+        
+        for torneo in Torneo.objects.exclude(estado='INSCRIPCION'):
+            self.assertEqual(torneo.partidos.count(), 3)
+            self.assertEqual(torneo.total_rondas, 2)
+            self.assertEqual(torneo.partidos.filter(ronda=1, siguiente__ronda=2).count(), 2)
+        for partido in Partido.objects.filter(estado='FINALIZADO'):
+            self.assertIn(partido.ganador_id, [partido.equipo1_id, partido.equipo2_id])
+
+    def test_equipos_por_torneo_potencia_de_2(self):
+        """Test: Se rechaza una cantidad de equipos que no es potencia de 2"""
+        with self.assertRaises(CommandError):
+            self.generar(equipos_por_torneo=6)
+
+    def test_benchmark_vistas_guarda_json(self):
+        """Test: El benchmark de vistas registra latencias y consultas en JSON"""
+        self.generar()
+        
+        with tempfile.NamedTemporaryFile(suffix='.json') as salida:
+            call_command('benchmark_vistas', repeticiones=2, salida=salida.name,
+                         vista=['home', 'reserva_lista'], stdout=StringIO())
+            salida.seek(0)
+            informe = json.load(salida)
+        
+        self.assertEqual(set(informe['vistas']), {'home', 'reserva_lista'})
+        for datos in informe['vistas'].values():
+            self.assertGreater(datos['consultas'], 0)
+            self.assertLessEqual(datos['p50_ms'], datos['p95_ms'])
+
+
+class MetricasMiddlewareTests(TestCase):
+    """Tests para el middleware de métricas y el endpoint /metrics/"""
+    
+    def setUp(self):
+        registro_metricas.reiniciar()
+        self.client = Client()
+    
+    def test_registra_request_por_vista(self):
+        """Test: Cada request queda registrado con su nombre de URL"""
+        response = self.client.get(reverse('home'))
+        
+        # Los tiempos y las consultas no se exponen a usuarios anónimos
+        self.assertNotIn('Server-Timing', response)
+        texto = registro_metricas.exportar_prometheus()
+        self.assertIn('reservas_request_duracion_segundos_count{vista="home"} 1', texto)
+        self.assertIn('reservas_db_consultas_count{vista="home"} 1', texto)
+        self.assertIn('reservas_template_duracion_segundos_sum{vista="home"}', texto)
+    
+    def test_server_timing_para_staff(self):
+        """Test: El header Server-Timing solo se agrega para staff o con DEBUG"""
+        User.objects.create_user('admin', password='clave', is_staff=True)
+        self.client.login(username='admin', password='clave')
+        response = self.client.get(reverse('home'))
+        self.assertRegex(response['Server-Timing'], r'db;desc="\d+ consultas"')
+        
+        self.client.logout()
+        self.assertNotIn('Server-Timing', self.client.get(reverse('home')))
+        with self.settings(DEBUG=True):
+            self.assertIn('Server-Timing', self.client.get(reverse('home')))
+    
+    def test_detecta_consultas_repetidas(self):
+        """Test: Se marca como posible N+1 una consulta repetida con distintos parámetros"""
+        from django.test import RequestFactory
+        from reservas.middleware import MetricasMiddleware
+        
+        def vista_con_n_mas_uno(request):
+            for pk in range(12):
+                list(Reserva.objects.filter(pk=pk))
+            return HttpResponse('ok')
+        
+        with self.assertLogs('reservas.metricas', level='WARNING'):
+            MetricasMiddleware(vista_con_n_mas_uno)(RequestFactory().get('/'))
+        
+        self.assertIn('reservas_n_mas_uno_total{vista="sin_ruta"} 1', registro_metricas.exportar_prometheus())
+    
+    def test_listado_de_reservas_sin_n_mas_uno(self):
+        """Test: El listado de reservas hace las mismas consultas con 1 o 15 reservas por página"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        cliente = Cliente.objects.create(nombre='Cliente', apellido='Test', dni='00000001',
+                                         email='c@test.com', telefono='123')
+        cancha = Cancha.objects.create(nombre='Cancha 1', tipo_cancha=TipoCancha.objects.create(nombre='Tenis'),
+                                       precio_por_hora=Decimal('1000.00'))
+        servicio = Servicio.objects.create(nombre='Pelota', costo_adicional=Decimal('500.00'))
+        inicio = timezone.now() + timedelta(days=1)
+        
+        def consultas_del_listado():
+            with CaptureQueriesContext(connection) as consultas:
+                self.assertEqual(self.client.get(reverse('reserva_lista')).status_code, 200)
+            return len(consultas)
+        
+        def crear(desde, hasta):
+            for reserva in Reserva.objects.bulk_create([
+                Reserva(cliente=cliente, cancha=cancha, fecha_hora_inicio=inicio + timedelta(hours=i),
+                        fecha_hora_fin=inicio + timedelta(hours=i + 1))
+                for i in range(desde, hasta)
+            ]):
+                reserva.servicios.add(servicio)
+        
+        crear(0, 1)
+        consultas_del_listado()  # el primer request carga el catálogo
+        una = consultas_del_listado()
+        crear(1, 15)
+        self.assertEqual(consultas_del_listado(), una)
+        self.assertNotIn('reservas_n_mas_uno_total{vista="reserva_lista"}', registro_metricas.exportar_prometheus())
+    
+    async def test_vista_async_con_asgi(self):
+        """Test: Con el handler ASGI se miden también las consultas de las vistas async"""
+        from django.test import AsyncClient
+        with self.settings(DEBUG=True):
+            response = await AsyncClient().get(reverse('reportes'))
+        
+        self.assertIn('Server-Timing', response)
+        consultas = int(re.search(r'db;desc="(\d+) consultas"', response['Server-Timing']).group(1))
+        self.assertGreater(consultas, 0)
+        self.assertIn('reservas_request_duracion_segundos_count{vista="reportes"} 1', registro_metricas.exportar_prometheus())
+    
+    def test_normalizar_sql(self):
+        """Test: La forma de la consulta ignora literales y el largo de las listas IN"""
+        self.assertEqual(
+            normalizar_sql('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            normalizar_sql('SELECT * FROM t WHERE id IN (%s) LIMIT 5'),
+        )
+    
+    def test_metrics_protegido(self):
+        """Test: /metrics/ requiere staff o token"""
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 403)
+        
+        with self.settings(METRICAS_TOKEN='secreto'):
+            response = self.client.get(reverse('metricas'), HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE reservas_request_duracion_segundos histogram', response.content.decode())
+        
+        User.objects.create_user('admin', password='clave', is_staff=True)
+        self.client.login(username='admin', password='clave')
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 200)
+
+
+class AdminListadosTests(TestCase):
+    """Tests para los listados del admin"""
+
+    def setUp(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        self.client.login(username='admin', password='clave')
+        tipo = TipoCancha.objects.create(nombre="Fútbol 5")
+        self.cancha = Cancha.objects.create(nombre="Cancha 1", tipo_cancha=tipo, precio_por_hora=Decimal("5000.00"))
+        self.inicio = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=1), time(8)))
+        self.creados = 0
+
+    def agregar_filas(self, cantidad):
+        hoy = timezone.localdate()
+        for _ in range(cantidad):
+            i = self.creados
+            self.creados += 1
+            cliente = Cliente.objects.create(nombre=f"Cliente{i}", apellido="Test", dni=f"{i:08d}", email=f"c{i}@test.com")
+            inicio = self.inicio + timedelta(days=i)
+            reserva = Reserva.objects.create(cliente=cliente, cancha=self.cancha,
+                                             fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1))
+            Pago.objects.create(reserva=reserva, monto_total=Decimal("5000.00"))
+            torneo = Torneo.objects.create(nombre=f"Torneo {i}", fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=7),
+                                           total_rondas=1)
+            equipos = [Equipo.objects.create(nombre=f"Equipo {i}-{j}") for j in range(2)]
+            torneo.equipos.set(equipos)
+            Partido.objects.create(torneo=torneo, ronda=1, numero_partido=1, equipo1=equipos[0], equipo2=equipos[1])
+
+    def consultas(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(contexto.captured_queries)
+
+    def test_listados_con_consultas_constantes(self):
+        """Test: La cantidad de consultas de cada listado no depende de la cantidad de filas"""
+        modelos = ['reserva', 'pago', 'torneo', 'partido', 'cancha', 'cliente']
+        self.agregar_filas(2)
+        antes = {modelo: self.consultas(reverse(f'admin:reservas_{modelo}_changelist')) for modelo in modelos}
+        self.agregar_filas(5)
+        despues = {modelo: self.consultas(reverse(f'admin:reservas_{modelo}_changelist')) for modelo in modelos}
+        self.assertEqual(antes, despues)
+
+    def test_columnas_calculadas(self):
+        """Test: Las columnas calculadas salen de anotaciones"""
+        self.agregar_filas(1)
+        response = self.client.get(reverse('admin:reservas_partido_changelist'))
+        self.assertContains(response, 'Final')
+        response = self.client.get(reverse('admin:reservas_reserva_changelist'))
+        self.assertContains(response, '$5,000.00')
+
+    def test_filtros_por_rango(self):
+        """Test: Los filtros de fecha, cancha y torneo de reservas filtran por rango y por id"""
+        self.agregar_filas(3)
+        url = reverse('admin:reservas_reserva_changelist')
+        response = self.client.get(url, {'rango': 'manana'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get(url, {'rango': '7_dias', 'cancha': self.cancha.pk, 'torneo': 'ninguno'})
+        self.assertEqual(response.context['cl'].result_count, 3)
+        response = self.client.get(url, {'rango': '30_dias_atras'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_formulario_con_autocompletado(self):
+        """Test: El alta de reservas no lista todos los clientes en un <select>"""
+        self.agregar_filas(3)
+        response = self.client.get(reverse('admin:reservas_reserva_add'))
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'Cliente2 Test')
@@ -0,0 +1,100 @@
+"""
+Resumen de un torneo y carga de resultados por ronda.
+
+Los ingresos y la cantidad de reservas pagadas salen de una consulta agregada
+sobre las reservas del torneo, y los conteos de partidos de otra con
+agregados condicionales. El resultado se cachea con las versiones de
+'reservas' y 'torneos' en la clave: cualquier cambio de reservas, pagos o
+partidos lo deja sin uso.
+
+registrar_resultados_ronda() carga todos los resultados de una ronda en una
+transacción, con las mismas validaciones que Partido.registrar_resultado().
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from decimal import Decimal
+from .models import Partido, Reserva
+from .versiones import incrementar_version, obtener_version
+
+
+def resumen_torneo(torneo):
+    """Retorna ingresos_reservas, reservas_count, total_partidos, partidos_completados y partidos_pendientes"""
+    clave = f'torneo_resumen:{torneo.pk}:{obtener_version("reservas")}:{obtener_version("torneos")}'
+    resumen = cache.get(clave)
+    if resumen is None:
+        resumen = calcular_resumen_torneo(torneo)
+        cache.set(clave, resumen, getattr(settings, 'TORNEO_RESUMEN_CACHE_SEGUNDOS', 300))
+    return resumen
+
+
+def calcular_resumen_torneo(torneo):
+    reservas = Reserva.objects.filter(torneo=torneo, estado='PAGADA').aggregate(
+        reservas_count=Count('pk'),
+        ingresos_reservas=Sum('pago__monto_total'),
+    )
+    partidos = torneo.partidos.aggregate(
+        total_partidos=Count('pk'),
+        partidos_completados=Count('pk', filter=Q(estado='FINALIZADO')),
+        partidos_pendientes=Count('pk', filter=Q(estado='PENDIENTE')),
+    )
+    return {
+        'reservas_count': reservas['reservas_count'],
+        'ingresos_reservas': reservas['ingresos_reservas'] or Decimal('0.00'),
+        **partidos,
+    }
+
+
+def registrar_resultados_ronda(torneo, ronda, resultados):
+    """
+    Registra juntos los resultados de una ronda y avanza a los ganadores.
+
+    resultados es {partido_id: (resultado_equipo1, resultado_equipo2)} o
+    {partido_id: 'equipo1' | 'equipo2'} para un walkover. Se validan todos
+    antes de guardar: si alguno falla no se guarda ninguno y se retorna
+    {partido_id: mensaje}. Si no, se guardan con dos bulk_update (los partidos
+    y los de la ronda siguiente) en una transacción y se retorna {}.
+    """
+    with transaction.atomic():
+        partidos = {
+            partido.pk: partido
+            for partido in torneo.partidos.filter(ronda=ronda, pk__in=resultados)
+            .select_related('equipo1', 'equipo2').select_for_update()
+        }
+        errores = {}
+        for partido_id, resultado in resultados.items():
+            partido = partidos.get(partido_id)
+            if partido is None:
+                errores[partido_id] = 'El partido no pertenece a esta ronda del torneo.'
+                continue
+            try:
+                if isinstance(resultado, str):
+                    partido.aplicar_resultado(walkover=resultado)
+                else:
+                    partido.aplicar_resultado(*resultado)
+            except ValidationError as e:
+                errores[partido_id] = e.messages[0]
+        if errores or not partidos:
+            return errores
+
+        siguientes = Partido.objects.in_bulk([p.siguiente_id for p in partidos.values() if p.siguiente_id])
+        for partido in partidos.values():
+            siguiente = siguientes.get(partido.siguiente_id)
+            if siguiente is not None:
+                setattr(siguiente, f'{partido.lado_en_siguiente}_id', partido.ganador_id)
+                setattr(siguiente, f'partido_anterior_{partido.lado_en_siguiente}_id', partido.pk)
+
+        Partido.objects.bulk_update(
+            partidos.values(), ['resultado_equipo1', 'resultado_equipo2', 'ganador', 'estado']
+        )
+        if siguientes:
+            Partido.objects.bulk_update(
+                siguientes.values(),
+                ['equipo1', 'equipo2', 'partido_anterior_equipo1', 'partido_anterior_equipo2'],
+            )
+
+    # bulk_update no dispara señales
+    incrementar_version('torneos')
+    return {}
@@ -1,10 +1,11 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('reportes/', views.reportes, name='reportes'),
     path('reportes/pdf/', views.reportes_pdf, name='reportes_pdf'),
+    path('metrics/', views.metricas, name='metricas'),
     
     path('clientes/', views.cliente_lista, name='cliente_lista'),
     path('clientes/crear/', views.cliente_crear, name='cliente_crear'),
@@ -19,7 +20,14 @@ urlpatterns = [
     path('canchas/<int:pk>/eliminar/', views.cancha_eliminar, name='cancha_eliminar'),
     
     path('reservas/', views.reserva_lista, name='reserva_lista'),
+    path('agenda/', views.agenda, name='agenda'),
+    path('reservas/horarios-libres/', views.horarios_libres, name='horarios_libres'),
+    path('reservas/cotizar/', views.reserva_cotizar, name='reserva_cotizar'),
+    path('reservas/eventos/', views.reserva_eventos, name='reserva_eventos'),
     path('reservas/crear/', views.reserva_crear, name='reserva_crear'),
+    path('reservas/serie/crear/', views.reserva_serie_crear, name='reserva_serie_crear'),
+    path('reservas/lista-espera/', views.lista_espera, name='lista_espera'),
+    path('reservas/lista-espera/<int:pk>/cancelar/', views.espera_cancelar, name='espera_cancelar'),
     path('reservas/<int:pk>/', views.reserva_detalle, name='reserva_detalle'),
     path('reservas/<int:pk>/editar/', views.reserva_editar, name='reserva_editar'),
     path('reservas/<int:pk>/eliminar/', views.reserva_eliminar, name='reserva_eliminar'),
@@ -36,6 +44,7 @@ urlpatterns = [
     path('torneos/<int:pk>/desinscribir/<int:equipo_pk>/', views.torneo_desinscribir_equipo, name='torneo_desinscribir_equipo'),
     path('torneos/<int:pk>/generar-fixture/', views.torneo_generar_fixture, name='torneo_generar_fixture'),
     path('torneos/<int:pk>/fixture/', views.torneo_fixture, name='torneo_fixture'),
+    path('torneos/<int:pk>/ronda/<int:ronda>/resultados/', views.torneo_registrar_ronda, name='torneo_registrar_ronda'),
     
     path('equipos/', views.equipo_lista, name='equipo_lista'),
     path('equipos/crear/', views.equipo_crear, name='equipo_crear'),
@@ -44,4 +53,10 @@ urlpatterns = [
     path('equipos/<int:pk>/eliminar/', views.equipo_eliminar, name='equipo_eliminar'),
     
     path('partidos/<int:pk>/registrar-resultado/', views.partido_registrar_resultado, name='partido_registrar_resultado'),
+    
+    path('api/v1/reservas/', api.reservas, name='api_reservas'),
+    path('api/v1/canchas/', api.canchas, name='api_canchas'),
+    path('api/v1/disponibilidad/', api.disponibilidad, name='api_disponibilidad'),
+    path('api/v1/torneos/', api.torneos, name='api_torneos'),
+    path('api/v1/torneos/<int:pk>/fixture/', api.fixture, name='api_fixture'),
 ]
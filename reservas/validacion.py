@@ -0,0 +1,182 @@
+"""
+Validación en bloque de reservas.
+
+Reserva.clean() hace hasta tres consultas por instancia (choques en la cancha,
+límite diario del cliente y la carga de cancha/cliente para ver si están
+activos). validar_reservas() aplica las mismas reglas, con los mismos mensajes
+y en el mismo orden, a una lista de reservas candidatas usando a lo sumo dos
+consultas en total: clientes y las reservas existentes de los días
+involucrados (las canchas salen del catálogo en memoria). También detecta
+choques entre las propias candidatas.
+"""
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from collections import defaultdict
+from datetime import datetime, timedelta
+from . import catalogo
+from .models import (
+    Cliente, Reserva,
+    HORA_APERTURA, HORA_CIERRE, DURACION_MINIMA_RESERVA, DURACION_MAXIMA_RESERVA, MAX_RESERVAS_POR_CLIENTE_DIA,
+)
+
+ESTADOS_ACTIVOS = ['PENDIENTE', 'PAGADA']
+
+
+def _precargar(candidatas, campo, cargar):
+    """
+    Asigna en bloque la cancha o el cliente a las candidatas que no lo tienen
+    cargado; cargar(ids) retorna {id: objeto}.
+    """
+    descriptor = getattr(Reserva, campo)
+    faltantes = {
+        getattr(reserva, f'{campo}_id') for reserva in candidatas
+        if getattr(reserva, f'{campo}_id') and not descriptor.is_cached(reserva)
+    }
+    if not faltantes:
+        return
+    objetos = cargar(faltantes)
+    for reserva in candidatas:
+        objeto = objetos.get(getattr(reserva, f'{campo}_id'))
+        if objeto is not None and not descriptor.is_cached(reserva):
+            setattr(reserva, campo, objeto)
+
+
+def _reservas_existentes(candidatas):
+    """
+    Reservas activas de las canchas o clientes de las candidatas en los días
+    que cubren, en una sola consulta.
+    """
+    dias = set()
+    for reserva in candidatas:
+        if reserva.fecha_hora_inicio:
+            dias.add(reserva.fecha_hora_inicio.date())
+            dias.add(timezone.localtime(reserva.fecha_hora_inicio).date())
+    canchas = {reserva.cancha_id for reserva in candidatas if reserva.cancha_id}
+    clientes = {reserva.cliente_id for reserva in candidatas if reserva.cliente_id}
+    if not dias or not (canchas or clientes):
+        return []
+
+    # El rango usa el índice por fecha; el filtro por día descarta los días intermedios
+    return list(
+        Reserva.objects.filter(
+            Q(cancha_id__in=canchas) | Q(cliente_id__in=clientes),
+            estado__in=ESTADOS_ACTIVOS,
+            fecha_hora_inicio__gte=timezone.make_aware(datetime.combine(min(dias), datetime.min.time())),
+            fecha_hora_inicio__lt=timezone.make_aware(datetime.combine(max(dias) + timedelta(days=1), datetime.min.time())),
+            fecha_hora_inicio__date__in=dias,
+        ).order_by().values_list('pk', 'cancha_id', 'cliente_id', 'fecha_hora_inicio', 'fecha_hora_fin')
+    )
+
+
+def _validar_campos(reserva, ahora):
+    """Reglas 1 a 5 de Reserva.clean(), que no necesitan consultas"""
+    if reserva.fecha_hora_fin <= reserva.fecha_hora_inicio:
+        raise ValidationError({
+            'fecha_hora_fin': 'La fecha de fin debe ser posterior a la fecha de inicio.'
+        })
+
+    if reserva.fecha_hora_inicio < ahora:
+        raise ValidationError({
+            'fecha_hora_inicio': 'No se pueden hacer reservas en el pasado.'
+        })
+
+    if reserva.fecha_hora_inicio.time() < HORA_APERTURA:
+        raise ValidationError({
+            'fecha_hora_inicio': f'El complejo abre a las {HORA_APERTURA.strftime("%H:%M")}.'
+        })
+
+    if reserva.fecha_hora_fin.time() > HORA_CIERRE:
+        raise ValidationError({
+            'fecha_hora_fin': f'El complejo cierra a las {HORA_CIERRE.strftime("%H:%M")}.'
+        })
+
+    duracion = (reserva.fecha_hora_fin - reserva.fecha_hora_inicio).total_seconds() / 3600
+
+    if duracion < DURACION_MINIMA_RESERVA:
+        raise ValidationError({
+            'fecha_hora_fin': f'La duración mínima de una reserva es de {DURACION_MINIMA_RESERVA} hora(s).'
+        })
+
+    if duracion > DURACION_MAXIMA_RESERVA:
+        raise ValidationError({
+            'fecha_hora_fin': f'La duración máxima de una reserva es de {DURACION_MAXIMA_RESERVA} horas.'
+        })
+
+    if reserva.fecha_hora_inicio.date() != reserva.fecha_hora_fin.date():
+        raise ValidationError({
+            'fecha_hora_fin': 'Una reserva no puede abarcar más de un día.'
+        })
+
+
+def validar_reservas(candidatas):
+    """
+    Valida una lista de reservas sin guardar como lo haría Reserva.clean() en
+    cada una.
+
+    Retorna una lista del mismo largo con None para las reservas válidas o el
+    ValidationError que levantaría clean(). Las candidatas se evalúan en orden
+    y las válidas cuentan como ocupadas para las siguientes: dos candidatas que
+    se solapan en la misma cancha o que superan juntas el límite diario del
+    cliente no pueden ser válidas las dos. Una candidata que ya existe (con pk)
+    no choca consigo misma ni cuenta dos veces para el límite.
+    """
+    candidatas = list(candidatas)
+    _precargar(candidatas, 'cancha', lambda pks: {pk: catalogo.cancha(pk) for pk in pks})
+    _precargar(candidatas, 'cliente', Cliente.objects.in_bulk)
+
+    propias = {reserva.pk for reserva in candidatas if reserva.pk}
+    ocupados_por_cancha = defaultdict(list)
+    reservas_por_cliente_dia = defaultdict(int)
+    for pk, cancha_id, cliente_id, inicio, fin in _reservas_existentes(candidatas):
+        ocupados_por_cancha[cancha_id].append((pk, inicio, fin))
+        if pk not in propias:
+            reservas_por_cliente_dia[cliente_id, timezone.localtime(inicio).date()] += 1
+
+    ahora = timezone.now()
+    errores = []
+    for reserva in candidatas:
+        if not reserva.fecha_hora_inicio or not reserva.fecha_hora_fin:
+            errores.append(None)
+            continue
+        try:
+            _validar_campos(reserva, ahora)
+
+            activa = reserva.estado in ESTADOS_ACTIVOS
+            if activa and reserva.cancha_id:
+                choca = any(
+                    inicio < reserva.fecha_hora_fin and fin > reserva.fecha_hora_inicio
+                    for pk, inicio, fin in ocupados_por_cancha[reserva.cancha_id]
+                    if reserva.pk is None or pk != reserva.pk
+                )
+                if choca:
+                    raise ValidationError({
+                        'cancha': 'La cancha no está disponible en el horario seleccionado.'
+                    })
+
+            clave_dia = (reserva.cliente_id, reserva.fecha_hora_inicio.date())
+            if reserva.cliente_id and reservas_por_cliente_dia[clave_dia] >= MAX_RESERVAS_POR_CLIENTE_DIA:
+                raise ValidationError({
+                    'cliente': f'El cliente ya alcanzó el límite de {MAX_RESERVAS_POR_CLIENTE_DIA} reservas para este día.'
+                })
+
+            if reserva.cancha_id and not reserva.cancha.activa:
+                raise ValidationError({
+                    'cancha': 'Esta cancha no está disponible para reservas.'
+                })
+
+            if reserva.cliente_id and not reserva.cliente.activo:
+                raise ValidationError({
+                    'cliente': 'Este cliente no está activo en el sistema.'
+                })
+        except ValidationError as error:
+            errores.append(error)
+            continue
+
+        errores.append(None)
+        if activa:
+            # Ocupa su horario para las candidatas siguientes
+            ocupados_por_cancha[reserva.cancha_id].append((reserva.pk, reserva.fecha_hora_inicio, reserva.fecha_hora_fin))
+            reservas_por_cliente_dia[clave_dia] += 1
+
+    return errores
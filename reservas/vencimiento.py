@@ -0,0 +1,105 @@
+"""
+Vencimiento de reservas pendientes.
+
+Las reservas que siguen PENDIENTE más de RESERVA_PENDIENTE_TTL_MINUTOS después
+de creadas se cancelan en bloque: un update() para las reservas y otro para
+sus pagos, que pasan a ANULADO. Los horarios futuros que quedan libres se
+ofrecen a la lista de espera. Se corre con el comando vencer_reservas (cron)
+o con el temporizador en proceso (VENCIMIENTO_INTERVALO_SEGUNDOS).
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, Sum, TextField, Value, When
+from django.db.models.functions import Concat
+from django.utils import timezone
+from datetime import timedelta
+from .estadisticas import registrar_cancelaciones
+from .eventos import publicar_liberadas
+from .lista_espera import promover_esperas
+from .models import Pago, Reserva
+from .tareas import cada, en_segundo_plano
+from .versiones import incrementar_version
+import logging
+
+logger = logging.getLogger(__name__)
+
+MOTIVO_VENCIMIENTO = 'Cancelación: reserva vencida sin pago'
+
+
+def pendientes_vencidas(ttl=None, ahora=None):
+    """Reservas pendientes creadas antes de ahora - ttl (timedelta)"""
+    if ttl is None:
+        ttl = timedelta(minutes=getattr(settings, 'RESERVA_PENDIENTE_TTL_MINUTOS', 24 * 60))
+    limite = (ahora or timezone.now()) - ttl
+    return Reserva.objects.filter(estado='PENDIENTE', fecha_creacion__lt=limite)
+
+
+def vencer_reservas_pendientes(ttl=None, ahora=None, simular=False):
+    """
+    Cancela las reservas pendientes vencidas y anula sus pagos.
+
+    Retorna un resumen con la cantidad de reservas y pagos afectados, el monto
+    que quedó sin cobrar, las reservas por cancha y los horarios futuros
+    liberados. Con simular=True solo calcula el resumen.
+    """
+    ahora = ahora or timezone.now()
+    with transaction.atomic():
+        vencidas = pendientes_vencidas(ttl, ahora)
+        por_cancha = dict(
+            vencidas.order_by().values_list('cancha__nombre').annotate(total=Count('id'))
+        )
+        pagos = Pago.objects.filter(reserva__in=vencidas, estado='PENDIENTE')
+        totales_pagos = pagos.aggregate(cantidad=Count('pk'), monto=Sum('monto_total'))
+        monto = totales_pagos['monto'] or 0
+        liberados = list(
+            vencidas.filter(fecha_hora_inicio__gt=ahora)
+            .order_by().values_list('id', 'cancha_id', 'fecha_hora_inicio', 'fecha_hora_fin')
+        )
+
+        resumen = {
+            'reservas': sum(por_cancha.values()),
+            'pagos': totales_pagos['cantidad'],
+            'monto_sin_cobrar': monto,
+            'por_cancha': por_cancha,
+            'horarios_liberados': len(liberados),
+        }
+        if simular or not resumen['reservas']:
+            return resumen
+
+        # Los pagos primero: después de cancelar, las reservas ya no son pendientes
+        resumen['pagos'] = pagos.update(
+            estado='ANULADO',
+            observaciones=_agregar_observacion('observaciones'),
+        )
+        por_cliente = dict(vencidas.order_by().values_list('cliente_id').annotate(total=Count('id')))
+        resumen['reservas'] = vencidas.update(
+            estado='CANCELADA',
+            observaciones=_agregar_observacion('observaciones'),
+        )
+        registrar_cancelaciones(por_cliente)
+
+    # update() no dispara señales
+    incrementar_version('reservas')
+    publicar_liberadas(liberados)
+    for _, cancha_id, inicio, fin in liberados:
+        en_segundo_plano(promover_esperas, cancha_id, inicio, fin)
+
+    logger.info('Reservas pendientes vencidas: %s (monto sin cobrar $%s)', resumen['reservas'], monto)
+    return resumen
+
+
+def _agregar_observacion(campo):
+    """Agrega el motivo del vencimiento al final de las observaciones, como Reserva.cancelar()"""
+    return Case(
+        When(**{f'{campo}__isnull': True}, then=Value(MOTIVO_VENCIMIENTO)),
+        When(**{campo: ''}, then=Value(MOTIVO_VENCIMIENTO)),
+        default=Concat(F(campo), Value('\n' + MOTIVO_VENCIMIENTO), output_field=TextField()),
+        output_field=TextField(),
+    )
+
+
+def iniciar_vencimiento_periodico():
+    """Arranca el temporizador en proceso si VENCIMIENTO_INTERVALO_SEGUNDOS > 0"""
+    intervalo = getattr(settings, 'VENCIMIENTO_INTERVALO_SEGUNDOS', 0)
+    if intervalo > 0:
+        cada(intervalo, vencer_reservas_pendientes, nombre='vencimiento')
@@ -0,0 +1,30 @@
+"""
+Versiones de datos en la caché compartida.
+
+Las entradas cacheadas que dependen de un conjunto de datos (por ejemplo, las
+reservas) incluyen la versión en su clave. Al modificarse los datos se
+incrementa la versión y las entradas anteriores quedan sin uso hasta expirar.
+"""
+from django.core.cache import cache
+import time
+
+
+def _clave(nombre):
+    return f'version:{nombre}'
+
+
+def obtener_version(nombre):
+    version = cache.get(_clave(nombre))
+    if version is None:
+        # Arranca en un valor distinto en cada reinicio de la caché, para no
+        # reutilizar claves de una versión anterior que sigan guardadas
+        cache.add(_clave(nombre), time.time_ns())
+        version = cache.get(_clave(nombre))
+    return version
+
+
+def incrementar_version(nombre):
+    try:
+        return cache.incr(_clave(nombre))
+    except ValueError:
+        return obtener_version(nombre)
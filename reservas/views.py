@@ -1,17 +1,34 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q, Count, Sum, Avg, F
 from django.db.models.functions import Extract
 from django.utils import timezone
-from django.http import HttpResponse, JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.exceptions import ValidationError
 from django.views.decorators.csrf import csrf_exempt
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from decimal import Decimal
 import json
-from .models import Cliente, Cancha, TipoCancha, Reserva, Servicio, Torneo, Pago, Equipo, Partido
+import logging
+from . import catalogo, eventos
+from .dinero import formatear
+from .disponibilidad import buscar_horarios_libres, grilla_ocupacion
+from .lista_espera import programar_promocion
+from .metricas import registro as registro_metricas
+from .pasarela import crear_preferencia
+from .precios import cotizar
+from .reporte_pdf import construir_reporte, respuesta_pdf, secciones_por_cancha, secciones_por_cliente
+from .reportes import areservas_con_importe, atotales_por, atotales_por_mes, total_importes
+from .series import crear_serie
+from .torneos import registrar_resultados_ronda, resumen_torneo
+from .models import Cliente, Cancha, TipoCancha, Reserva, Servicio, Torneo, Pago, Equipo, Partido, SerieReserva, EsperaReserva, EstadisticasCliente, nombre_de_ronda
+
+logger = logging.getLogger(__name__)
 
 
 #  VISTA PRINCIPAL 
@@ -168,10 +185,23 @@ def cliente_eliminar(request, pk):
 
 def cliente_detalle(request, pk):
     """Ver detalle de un cliente y sus reservas"""
-    cliente = get_object_or_404(Cliente, pk=pk)
-    reservas = cliente.reservas.all().order_by('-fecha_hora_inicio')
+    cliente = get_object_or_404(Cliente.objects.select_related('estadisticas'), pk=pk)
+    reservas_list = cliente.reservas.select_related('cancha').order_by('-fecha_hora_inicio')
+    
+    # Paginación: 10 reservas por página
+    paginator = Paginator(reservas_list, 10)
+    page = request.GET.get('page', 1)
+    
+    try:
+        reservas = paginator.page(page)
+    except PageNotAnInteger:
+        reservas = paginator.page(1)
+    except EmptyPage:
+        reservas = paginator.page(paginator.num_pages)
+    
     return render(request, 'reservas/clientes/detalle.html', {
         'cliente': cliente,
+        'estadisticas': getattr(cliente, 'estadisticas', None),
         'reservas': reservas
     })
 
@@ -271,9 +301,138 @@ def cancha_detalle(request, pk):
         'reservas': reservas
     })
 
+def agenda(request):
+    """Grilla de ocupación de canchas activas por franja horaria, para un día o una semana"""
+    try:
+        fecha = datetime.strptime(request.GET.get('fecha', ''), '%Y-%m-%d').date()
+    except ValueError:
+        fecha = timezone.localdate()
+    
+    vista = 'semana' if request.GET.get('vista') == 'semana' else 'dia'
+    if vista == 'semana':
+        # La semana arranca el lunes
+        fecha_inicio = fecha - timedelta(days=fecha.weekday())
+        dias = 7
+    else:
+        fecha_inicio = fecha
+        dias = 1
+    
+    context = {
+        'grilla': grilla_ocupacion(fecha_inicio, dias),
+        'fecha': fecha,
+        'vista': vista,
+        'anterior': fecha - timedelta(days=dias),
+        'siguiente': fecha + timedelta(days=dias),
+        'hoy': timezone.localdate(),
+    }
+    return render(request, 'reservas/agenda/grilla.html', context)
+
+def horarios_libres(request):
+    """API JSON: los horarios libres más cercanos al pedido, en todas las canchas.
+    
+    Parámetros GET: inicio (AAAA-MM-DDTHH:MM), duracion (horas, default 1),
+    cantidad (default 5), tipo_cancha (id) y precio_max.
+    """
+    try:
+        inicio = timezone.make_aware(datetime.fromisoformat(request.GET['inicio']))
+        duracion = timedelta(hours=float(request.GET.get('duracion', 1)))
+        cantidad = min(int(request.GET.get('cantidad', 5)), 50)
+        precio_maximo = Decimal(request.GET['precio_max']) if request.GET.get('precio_max') else None
+        horarios = buscar_horarios_libres(
+            inicio, duracion, cantidad=cantidad,
+            tipo_cancha_id=request.GET.get('tipo_cancha') or None,
+            precio_maximo=precio_maximo,
+        )
+    except KeyError:
+        return JsonResponse({'error': 'Falta el parámetro inicio.'}, status=400)
+    except (ValueError, ArithmeticError):
+        return JsonResponse({'error': 'Parámetros inválidos.'}, status=400)
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages[0]}, status=400)
+    
+    return JsonResponse({
+        'horarios': [{
+            'cancha_id': h['cancha'].id,
+            'cancha': h['cancha'].nombre,
+            'tipo_cancha': h['cancha'].tipo_cancha.nombre,
+            'precio_por_hora': str(h['cancha'].precio_por_hora),
+            'inicio': timezone.localtime(h['inicio']).isoformat(),
+            'fin': timezone.localtime(h['fin']).isoformat(),
+            'diferencia_minutos': int(h['diferencia'].total_seconds() // 60),
+        } for h in horarios]
+    })
+
+def reserva_cotizar(request):
+    """API JSON: desglose del precio de una reserva sin crearla.
+    
+    Parámetros GET: cancha, inicio y fin (AAAA-MM-DDTHH:MM), servicios (ids,
+    repetido o separados por coma), torneo y cliente (opcionales). Canchas y
+    servicios salen del catálogo en memoria y las reglas de su tabla; solo se
+    consulta la base por las estadísticas del cliente.
+    """
+    try:
+        cancha = catalogo.cancha(request.GET['cancha'])
+        inicio = timezone.make_aware(datetime.fromisoformat(request.GET['inicio']))
+        fin = timezone.make_aware(datetime.fromisoformat(request.GET['fin']))
+        servicios_ids = [pk for valor in request.GET.getlist('servicios') for pk in valor.split(',') if pk]
+        servicios = [catalogo.servicio(pk) for pk in servicios_ids]
+        if cancha is None or not cancha.activa or not all(s is not None and s.activo for s in servicios):
+            raise KeyError('cancha')
+        cliente_id = int(request.GET['cliente']) if request.GET.get('cliente') else None
+    except KeyError:
+        return JsonResponse({'error': 'Faltan parámetros o la cancha o algún servicio no existe.'}, status=400)
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros inválidos.'}, status=400)
+    if fin <= inicio:
+        return JsonResponse({'error': 'La fecha de fin debe ser posterior a la fecha de inicio.'}, status=400)
+    
+    reservas_pagadas = 0
+    if cliente_id is not None:
+        reservas_pagadas = EstadisticasCliente.objects.filter(cliente_id=cliente_id).values_list(
+            'reservas_pagadas', flat=True).first() or 0
+    cotizacion = cotizar(
+        cancha, inicio, fin, servicios,
+        reservas_pagadas=reservas_pagadas, con_torneo=bool(request.GET.get('torneo')),
+    )
+    return JsonResponse({
+        'cancha': str(cotizacion['cancha']),
+        'servicios': str(cotizacion['servicios']),
+        'base': str(cotizacion['base']),
+        'reglas': [{
+            'nombre': regla['nombre'],
+            'porcentaje': str(regla['porcentaje']),
+            'monto': str(regla['monto']),
+        } for regla in cotizacion['reglas']],
+        'total': str(cotizacion['total']),
+    })
+
+def reserva_eventos(request):
+    """Server-sent events: ocupación en vivo de las canchas en un día.
+    
+    Parámetros GET: fecha (AAAA-MM-DD, hoy por defecto) y cancha (ids, repetido
+    o separados por coma; todas las activas por defecto). Envía primero el
+    evento estado con las reservas activas del día y después ocupada y
+    liberada por cada horario que se ocupa o se libera.
+    """
+    try:
+        fecha = date.fromisoformat(request.GET['fecha']) if request.GET.get('fecha') else timezone.localdate()
+        canchas_ids = [int(pk) for valor in request.GET.getlist('cancha') for pk in valor.split(',') if pk]
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros inválidos.'}, status=400)
+    if not canchas_ids:
+        canchas_ids = [cancha.id for cancha in catalogo.canchas(activas=True)]
+    
+    # Con ASGI el flujo espera en el event loop; con WSGI ocupa un hilo, así que se corta pronto
+    flujo = eventos.aflujo if isinstance(request, ASGIRequest) else eventos.flujo
+    response = StreamingHttpResponse(flujo(canchas_ids, fecha), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx no debe acumular el flujo
+    return response
+
 def reserva_lista(request):
     """Listar todas las reservas con filtros opcionales y paginación"""
-    reservas_list = Reserva.objects.all().select_related('cliente', 'cancha', 'torneo').order_by('-id')
+    # El costo de cada fila suma los servicios: se cargan en una consulta por página
+    reservas_list = Reserva.objects.all().select_related('cliente', 'cancha', 'torneo').prefetch_related('servicios').order_by('-id')
     
     # Filtros
     estado = request.GET.get('estado')
@@ -300,7 +459,7 @@ def reserva_lista(request):
         reservas = paginator.page(paginator.num_pages)
     
     clientes = Cliente.objects.all().order_by('id')
-    canchas = Cancha.objects.all().order_by('id')
+    canchas = sorted(catalogo.canchas(), key=lambda cancha: cancha.id)
     
     response = render(request, 'reservas/reservas/lista.html', {
         'reservas': reservas,
@@ -320,10 +479,10 @@ def reserva_crear(request):
         # Función auxiliar para preparar el contexto del formulario
         def preparar_contexto_formulario(mantener_datos=False, limpiar_fechas=False):
             clientes = Cliente.objects.all().order_by('apellido', 'nombre')
-            canchas = Cancha.objects.all().order_by('nombre')
-            servicios = Servicio.objects.all()
+            canchas = catalogo.canchas()
+            servicios = catalogo.lista_servicios()
             torneos = Torneo.objects.all()
-            reservas_activas = Reserva.objects.filter(estado__in=['PENDIENTE', 'PAGADA']).values('id', 'cancha_id', 'fecha_hora_inicio', 'fecha_hora_fin', 'estado')
+            reservas_activas = Reserva.objects.filter(estado__in=['PENDIENTE', 'PAGADA'], fecha_hora_fin__gt=timezone.now()).values('id', 'cancha_id', 'fecha_hora_inicio', 'fecha_hora_fin', 'estado')
             import json
             reservas_json = json.dumps([{
                 'id': r['id'],
@@ -406,44 +565,56 @@ def reserva_crear(request):
             
             if reservas_conflicto.exists():
                 messages.error(request, 'La cancha no está disponible en el horario seleccionado.')
+                try:
+                    sugerencias = buscar_horarios_libres(fecha_inicio, fecha_fin - fecha_inicio, cantidad=3)
+                except ValidationError:
+                    sugerencias = []
+                if sugerencias:
+                    messages.info(request, 'Horarios libres más cercanos: ' + ', '.join(
+                        f"{s['cancha'].nombre} {timezone.localtime(s['inicio']):%H:%M}-{timezone.localtime(s['fin']):%H:%M}"
+                        for s in sugerencias
+                    ))
                 return render(request, 'reservas/reservas/form.html', preparar_contexto_formulario(mantener_datos=True))
             
-            # Crear la reserva
-            reserva = Reserva.objects.create(
-                cliente=cliente,
-                cancha=cancha,
-                fecha_hora_inicio=fecha_inicio,
-                fecha_hora_fin=fecha_fin,
-                estado=request.POST.get('estado', 'PENDIENTE')
-            )
+            # Reserva, servicios y pago juntos: si otro pedido tomó el horario no queda nada a medias
+            with transaction.atomic():
+                # Crear la reserva
+                reserva = Reserva.objects.create(
+                    cliente=cliente,
+                    cancha=cancha,
+                    fecha_hora_inicio=fecha_inicio,
+                    fecha_hora_fin=fecha_fin,
+                    estado=request.POST.get('estado', 'PENDIENTE')
+                )
             
-            # Agregar servicios si se seleccionaron
-            servicios_ids = request.POST.getlist('servicios')
-            if servicios_ids:
-                reserva.servicios.set(servicios_ids)
+                # Agregar servicios si se seleccionaron
+                servicios_ids = request.POST.getlist('servicios')
+                if servicios_ids:
+                    reserva.servicios.set(servicios_ids)
             
-            # Agregar torneo si se seleccionó
-            torneo_id = request.POST.get('torneo')
-            if torneo_id:
-                reserva.torneo_id = torneo_id
-                reserva.save()
+                # Agregar torneo si se seleccionó
+                torneo_id = request.POST.get('torneo')
+                if torneo_id:
+                    reserva.torneo_id = torneo_id
+                    reserva.save()
             
-            # Calcular monto total
-            horas = (fecha_fin - fecha_inicio).total_seconds() / 3600
-            monto_cancha = float(cancha.precio_por_hora) * horas
-            monto_servicios = sum(float(s.costo_adicional) for s in reserva.servicios.all())
-            monto_total = monto_cancha + monto_servicios
+                # Calcular monto total con las reglas de precio (el mismo de la cotización)
+                monto_total = reserva.cotizar()['total']
             
-            # Crear el pago asociado
-            Pago.objects.create(
-                reserva=reserva,
-                monto_total=monto_total,
-                estado='PENDIENTE'
-            )
+                # Crear el pago asociado
+                Pago.objects.create(
+                    reserva=reserva,
+                    monto_total=monto_total,
+                    estado='PENDIENTE'
+                )
             
-            messages.success(request, f'Reserva creada exitosamente. Monto total: ${monto_total:.2f}')
+            messages.success(request, f'Reserva creada exitosamente. Monto total: {formatear(monto_total)}')
             return redirect('reserva_lista')
             
+        except ValidationError as e:
+            # Otro pedido reservó el mismo horario entre la verificación y el guardado
+            messages.error(request, ' '.join(e.messages))
+            return render(request, 'reservas/reservas/form.html', preparar_contexto_formulario(mantener_datos=True))
         except Exception as e:
             messages.error(request, f'Error al crear reserva: {str(e)}')
             return render(request, 'reservas/reservas/form.html', preparar_contexto_formulario())
@@ -452,8 +623,11 @@ def reserva_crear(request):
     import json
     from django.utils.dateformat import format as date_format
     
+    # Solo las que no terminaron: el formulario no permite reservar en el pasado
+    # y los cambios posteriores llegan por reservas/eventos/
     reservas_activas = Reserva.objects.filter(
-        estado__in=['PENDIENTE', 'PAGADA']
+        estado__in=['PENDIENTE', 'PAGADA'],
+        fecha_hora_fin__gt=timezone.now(),
     ).values('id', 'cancha_id', 'fecha_hora_inicio', 'fecha_hora_fin', 'estado')
     
     # Convertir a formato JSON para JavaScript
@@ -466,8 +640,8 @@ def reserva_crear(request):
     } for r in reservas_activas])
     
     clientes = Cliente.objects.all().order_by('apellido', 'nombre')
-    canchas = Cancha.objects.all().order_by('nombre')
-    servicios = Servicio.objects.all()
+    canchas = catalogo.canchas()
+    servicios = catalogo.lista_servicios()
     torneos = Torneo.objects.all()
     
     return render(request, 'reservas/reservas/form.html', {
@@ -479,6 +653,51 @@ def reserva_crear(request):
         'reservas_json': reservas_json
     })
 
+def reserva_serie_crear(request):
+    """Crear una serie de reservas recurrentes (semanal o quincenal) hasta una fecha de fin"""
+    contexto = {
+        'clientes': Cliente.objects.filter(activo=True),
+        'canchas': catalogo.canchas(activas=True),
+        'servicios': catalogo.lista_servicios(activos=True),
+        'frecuencias': SerieReserva.FRECUENCIA_CHOICES,
+    }
+    
+    if request.method == 'POST':
+        contexto['datos_form'] = request.POST
+        try:
+            cliente = get_object_or_404(Cliente, pk=request.POST.get('cliente'))
+            cancha = get_object_or_404(Cancha, pk=request.POST.get('cancha'))
+            resultado = crear_serie(
+                cliente=cliente,
+                cancha=cancha,
+                fecha_desde=datetime.strptime(request.POST['fecha_desde'], '%Y-%m-%d').date(),
+                fecha_hasta=datetime.strptime(request.POST['fecha_hasta'], '%Y-%m-%d').date(),
+                hora_inicio=datetime.strptime(request.POST['hora_inicio'], '%H:%M').time(),
+                hora_fin=datetime.strptime(request.POST['hora_fin'], '%H:%M').time(),
+                frecuencia=request.POST.get('frecuencia', 'SEMANAL'),
+                servicios=catalogo.servicios(request.POST.getlist('servicios')),
+                todo_o_nada=request.POST.get('todo_o_nada') == 'on',
+            )
+        except (KeyError, ValueError):
+            messages.error(request, 'Completá las fechas y horarios de la serie.')
+            return render(request, 'reservas/reservas/serie_form.html', contexto)
+        except ValidationError as e:
+            for mensaje in e.messages:
+                messages.error(request, mensaje)
+            return render(request, 'reservas/reservas/serie_form.html', contexto)
+        
+        if resultado['serie']:
+            messages.success(request, f"Serie creada: {len(resultado['reservas'])} reservas.")
+        else:
+            messages.error(request, 'No se creó la serie.')
+        if resultado['conflictos']:
+            messages.warning(request, f"{len(resultado['conflictos'])} fecha(s) con conflicto.")
+        
+        contexto['resultado'] = resultado
+        contexto['conflictos'] = sorted(resultado['conflictos'].items())
+    
+    return render(request, 'reservas/reservas/serie_form.html', contexto)
+
 def reserva_editar(request, pk):
     """Editar una reserva existente"""
     reserva = get_object_or_404(Reserva, pk=pk)
@@ -486,58 +705,60 @@ def reserva_editar(request, pk):
     if request.method == 'POST':
         try:
             estado_anterior = reserva.estado
-            estado_nuevo = request.POST['estado']
-            reserva.estado = estado_nuevo
+            with transaction.atomic():
+                estado_nuevo = request.POST['estado']
+                reserva.estado = estado_nuevo
             
-            # Actualizar servicios
-            servicios_ids = request.POST.getlist('servicios')
-            reserva.servicios.set(servicios_ids)
+                # Actualizar servicios
+                servicios_ids = request.POST.getlist('servicios')
+                reserva.servicios.set(servicios_ids)
             
-            # Actualizar torneo
-            torneo_id = request.POST.get('torneo')
-            if torneo_id:
-                reserva.torneo_id = torneo_id
-            else:
-                reserva.torneo = None
+                # Actualizar torneo
+                torneo_id = request.POST.get('torneo')
+                if torneo_id:
+                    reserva.torneo_id = torneo_id
+                else:
+                    reserva.torneo = None
             
-            reserva.save()
+                reserva.save()
             
-            # Recalcular monto del pago y sincronizar estado
-            if hasattr(reserva, 'pago'):
-                horas = (reserva.fecha_hora_fin - reserva.fecha_hora_inicio).total_seconds() / 3600
-                monto_cancha = float(reserva.cancha.precio_por_hora) * horas
-                monto_servicios = sum(float(s.costo_adicional) for s in reserva.servicios.all())
-                reserva.pago.monto_total = monto_cancha + monto_servicios
+                # Recalcular monto del pago y sincronizar estado
+                if hasattr(reserva, 'pago'):
+                    reserva.pago.monto_total = reserva.cotizar()['total']
                 
-                # Sincronizar estado del pago con estado de la reserva
-                if estado_nuevo == 'PAGADA' and estado_anterior != 'PAGADA':
-                    # Se cambió a PAGADA: establecer fecha de pago
-                    reserva.pago.estado = 'PAGADO'
-                    if not reserva.pago.fecha_pago:
-                        reserva.pago.fecha_pago = timezone.now()
-                    if not reserva.pago.metodo_pago:
-                        reserva.pago.metodo_pago = 'EFECTIVO'
-                elif estado_nuevo == 'PENDIENTE':
-                    # Se cambió a PENDIENTE: marcar pago como pendiente
-                    reserva.pago.estado = 'PENDIENTE'
-                    reserva.pago.fecha_pago = None
-                    reserva.pago.metodo_pago = None
-                elif estado_nuevo == 'CANCELADA':
-                    # Se canceló: marcar pago como reembolsado si estaba pagado
-                    if reserva.pago.estado == 'PAGADO':
-                        reserva.pago.estado = 'REEMBOLSADO'
-                    else:
+                    # Sincronizar estado del pago con estado de la reserva
+                    if estado_nuevo == 'PAGADA' and estado_anterior != 'PAGADA':
+                        # Se cambió a PAGADA: establecer fecha de pago
+                        reserva.pago.estado = 'PAGADO'
+                        if not reserva.pago.fecha_pago:
+                            reserva.pago.fecha_pago = timezone.now()
+                        if not reserva.pago.metodo_pago:
+                            reserva.pago.metodo_pago = 'EFECTIVO'
+                    elif estado_nuevo == 'PENDIENTE':
+                        # Se cambió a PENDIENTE: marcar pago como pendiente
                         reserva.pago.estado = 'PENDIENTE'
+                        reserva.pago.fecha_pago = None
+                        reserva.pago.metodo_pago = None
+                    elif estado_nuevo == 'CANCELADA':
+                        # Se canceló: marcar pago como reembolsado si estaba pagado
+                        if reserva.pago.estado == 'PAGADO':
+                            reserva.pago.estado = 'REEMBOLSADO'
+                        else:
+                            reserva.pago.estado = 'PENDIENTE'
                 
-                reserva.pago.save()
+                    reserva.pago.save()
             
             messages.success(request, 'Reserva actualizada exitosamente.')
             return redirect('reserva_detalle', pk=pk)
             
+        except ValidationError as e:
+            # El horario se volvió a reservar mientras esta estaba cancelada
+            reserva.estado = estado_anterior
+            messages.error(request, ' '.join(e.messages))
         except Exception as e:
             messages.error(request, f'Error al actualizar reserva: {str(e)}')
     
-    servicios = Servicio.objects.all()
+    servicios = catalogo.lista_servicios()
     torneos = Torneo.objects.all()
     
     return render(request, 'reservas/reservas/form.html', {
@@ -552,13 +773,64 @@ def reserva_eliminar(request, pk):
     reserva = get_object_or_404(Reserva, pk=pk)
     
     if request.method == 'POST':
+        estado_anterior = reserva.estado
+        estaba_activa = estado_anterior in ['PENDIENTE', 'PAGADA']
         reserva.estado = 'CANCELADA'
         reserva.save()
+        if estaba_activa:
+            programar_promocion(reserva)
         messages.success(request, 'Reserva cancelada exitosamente.')
         return redirect('reserva_lista')
     
     return render(request, 'reservas/reservas/confirmar_eliminar.html', {'reserva': reserva})
 
+def lista_espera(request):
+    """Esperas activas y alta de un cliente en la lista de espera de un horario"""
+    if request.method == 'POST':
+        try:
+            fecha = datetime.strptime(request.POST['fecha'], '%Y-%m-%d').date()
+            inicio = timezone.make_aware(datetime.combine(fecha, datetime.strptime(request.POST['hora_inicio'], '%H:%M').time()))
+            fin = timezone.make_aware(datetime.combine(fecha, datetime.strptime(request.POST['hora_fin'], '%H:%M').time()))
+        except (KeyError, ValueError):
+            messages.error(request, 'Completá la fecha y los horarios de la espera.')
+            return redirect('lista_espera')
+        
+        espera = EsperaReserva(
+            cliente=get_object_or_404(Cliente, pk=request.POST.get('cliente'), activo=True),
+            cancha=get_object_or_404(Cancha, pk=request.POST.get('cancha'), activa=True),
+            fecha_hora_inicio=inicio,
+            fecha_hora_fin=fin,
+        )
+        try:
+            espera.full_clean()
+        except ValidationError as e:
+            for mensaje in e.messages:
+                messages.error(request, mensaje)
+            return redirect('lista_espera')
+        espera.save()
+        messages.success(request, f'{espera.cliente} quedó en la lista de espera.')
+        return redirect('lista_espera')
+    
+    esperas = EsperaReserva.objects.filter(
+        estado='ESPERANDO', fecha_hora_inicio__gte=timezone.now()
+    ).select_related('cliente', 'cancha').order_by('fecha_hora_inicio', 'fecha_creacion')
+    
+    context = {
+        'esperas': esperas,
+        'clientes': Cliente.objects.filter(activo=True),
+        'canchas': catalogo.canchas(activas=True),
+    }
+    return render(request, 'reservas/reservas/lista_espera.html', context)
+
+def espera_cancelar(request, pk):
+    """Sacar a un cliente de la lista de espera"""
+    espera = get_object_or_404(EsperaReserva, pk=pk, estado='ESPERANDO')
+    if request.method == 'POST':
+        espera.estado = 'CANCELADA'
+        espera.save(update_fields=['estado'])
+        messages.success(request, 'Espera cancelada.')
+    return redirect('lista_espera')
+
 def reserva_detalle(request, pk):
     """Ver detalle completo de una reserva"""
     reserva = get_object_or_404(Reserva, pk=pk)
@@ -621,12 +893,15 @@ def reserva_marcar_como_pagado(request, pk):
     
     return redirect('reserva_detalle', pk=pk)
 
-def reportes(request):
+async def reportes(request):
     """Página de reportes según consigna: 
     1. Listado de reservas por cliente
     2. Reservas por cancha en un período
     3. Canchas más utilizadas
     4. Gráfico estadístico: utilización mensual de canchas
+    
+    Vista async: las consultas usan el ORM async y el template se renderiza en
+    el hilo de la base del request.
     """
     
     # Obtener parámetros de filtro
@@ -643,28 +918,29 @@ def reportes(request):
     else:
         fin_mes = timezone.make_aware(datetime(anio_seleccionado, mes_seleccionado + 1, 1))
     
-    # Reporte 1: Listado de reservas por cliente
+    # Reservas del mes con su importe (un solo recorrido para los listados)
+    reservas_periodo = Reserva.objects.filter(
+        fecha_hora_inicio__gte=inicio_mes,
+        fecha_hora_inicio__lt=fin_mes
+    )
+    reservas_por_cliente = {}
+    reservas_por_cancha = {}
+    for reserva in await areservas_con_importe(
+        reservas_periodo.select_related('cliente', 'cancha__tipo_cancha').order_by('-fecha_hora_inicio')
+    ):
+        reservas_por_cliente.setdefault(reserva.cliente_id, []).append(reserva)
+        reservas_por_cancha.setdefault(reserva.cancha_id, []).append(reserva)
+    
+    # Reporte 1: Listado de reservas por cliente (totales agregados en la base)
     clientes_con_reservas = []
-    clientes = Cliente.objects.all()
-    
-    for cliente in clientes:
-        reservas_cliente = Reserva.objects.filter(
-            cliente=cliente,
-            fecha_hora_inicio__gte=inicio_mes,
-            fecha_hora_inicio__lt=fin_mes
-        ).order_by('-fecha_hora_inicio')
-        
-        if reservas_cliente.exists():
-            total_gasto = Decimal('0.00')
-            for reserva in reservas_cliente:
-                total_gasto += Decimal(str(reserva.calcular_costo_total()))
-            
-            clientes_con_reservas.append({
-                'cliente': cliente,
-                'reservas': list(reservas_cliente),
-                'num_reservas': reservas_cliente.count(),
-                'total_gasto': total_gasto
-            })
+    for cliente_id_val, totales in (await atotales_por(reservas_periodo, 'cliente_id')).items():
+        reservas_cliente = reservas_por_cliente[cliente_id_val]
+        clientes_con_reservas.append({
+            'cliente': reservas_cliente[0].cliente,
+            'reservas': reservas_cliente,
+            'num_reservas': totales['num_reservas'],
+            'total_gasto': totales['total_importe']
+        })
     
     # Si hay un cliente seleccionado, filtrar
     if cliente_id:
@@ -673,35 +949,20 @@ def reportes(request):
     # Ordenar por total gasto (importe) y luego por número de reservas (de mayor a menor)
     clientes_con_reservas = sorted(
         clientes_con_reservas,
-        key=lambda x: (-float(x['total_gasto']), -x['num_reservas'])
+        key=lambda x: (-x['total_gasto'], -x['num_reservas'])
     )
     
     # Reporte 2: Reservas por cancha en el período
     canchas_con_reservas = []
-    canchas = Cancha.objects.all()
-    
-    for cancha in canchas:
-        reservas_cancha = Reserva.objects.filter(
-            cancha=cancha,
-            fecha_hora_inicio__gte=inicio_mes,
-            fecha_hora_inicio__lt=fin_mes
-        ).order_by('-fecha_hora_inicio')
-        
-        if reservas_cancha.exists():
-            total_horas = Decimal('0.00')
-            total_ingresos = Decimal('0.00')
-            
-            for reserva in reservas_cancha:
-                total_horas += Decimal(str(reserva.duracion_horas()))
-                total_ingresos += Decimal(str(reserva.calcular_costo_total()))
-            
-            canchas_con_reservas.append({
-                'cancha': cancha,
-                'reservas': list(reservas_cancha),
-                'num_reservas': reservas_cancha.count(),
-                'total_horas': total_horas,
-                'total_ingresos': total_ingresos
-            })
+    for cancha_id_val, totales in (await atotales_por(reservas_periodo, 'cancha_id')).items():
+        reservas_cancha = reservas_por_cancha[cancha_id_val]
+        canchas_con_reservas.append({
+            'cancha': reservas_cancha[0].cancha,
+            'reservas': reservas_cancha,
+            'num_reservas': totales['num_reservas'],
+            'total_horas': totales['total_horas'],
+            'total_ingresos': totales['total_importe']
+        })
     
     # Si hay una cancha seleccionada, filtrar
     if cancha_id:
@@ -710,7 +971,7 @@ def reportes(request):
     # Ordenar por total ingresos (importe), luego por horas y reservas (de mayor a menor)
     canchas_con_reservas = sorted(
         canchas_con_reservas,
-        key=lambda x: (-float(x['total_ingresos']), -float(x['total_horas']), -x['num_reservas'])
+        key=lambda x: (-x['total_ingresos'], -x['total_horas'], -x['num_reservas'])
     )
     
     # ===== REPORTE 3: Canchas más utilizadas =====
@@ -718,41 +979,23 @@ def reportes(request):
     canchas_ranking = canchas_con_reservas
     
     # ===== REPORTE 4: Gráfico estadístico - Utilización mensual de canchas =====
-    # Obtener datos de los últimos 6 meses para comparativa
+    # Datos de los últimos 6 meses para comparativa, agrupados por mes en una consulta
+    inicio_grafico = inicio_mes - relativedelta(months=5)
+    por_mes = await atotales_por_mes(Reserva.objects.filter(
+        fecha_hora_inicio__gte=inicio_grafico,
+        fecha_hora_inicio__lt=fin_mes
+    ))
+    meses_nombres = ['', 'Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 
+                    'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
     meses_data = []
-    for i in range(5, -1, -1):  # 6 meses hacia atrás
-        mes_calc = mes_seleccionado - i
-        anio_calc = anio_seleccionado
-        
-        while mes_calc <= 0:
-            mes_calc += 12
-            anio_calc -= 1
-        
-        inicio = timezone.make_aware(datetime(anio_calc, mes_calc, 1))
-        if mes_calc == 12:
-            fin = timezone.make_aware(datetime(anio_calc + 1, 1, 1))
-        else:
-            fin = timezone.make_aware(datetime(anio_calc, mes_calc + 1, 1))
-        
-        reservas_mes = Reserva.objects.filter(
-            fecha_hora_inicio__gte=inicio,
-            fecha_hora_inicio__lt=fin
-        )
-        
-        total_reservas = reservas_mes.count()
-        total_horas = Decimal('0.00')
-        
-        for reserva in reservas_mes:
-            total_horas += Decimal(str(reserva.duracion_horas()))
-        
-        meses_nombres = ['', 'Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 
-                        'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
-        
+    for i in range(6):
+        mes = timezone.localtime(inicio_grafico) + relativedelta(months=i)
+        totales = por_mes.get((mes.year, mes.month), {})
         meses_data.append({
-            'mes': meses_nombres[mes_calc],
-            'anio': anio_calc,
-            'total_reservas': total_reservas,
-            'total_horas': float(total_horas)
+            'mes': meses_nombres[mes.month],
+            'anio': mes.year,
+            'total_reservas': totales.get('total_reservas', 0),
+            'total_horas': float(totales.get('total_horas', 0))
         })
     
     # Calcular porcentajes para el gráfico
@@ -786,8 +1029,8 @@ def reportes(request):
         'meses_data_json': json.dumps(meses_data),  # Para JavaScript
         
         # Para los filtros
-        'clientes': Cliente.objects.all(),
-        'canchas': Cancha.objects.all(),
+        'clientes': [cliente async for cliente in Cliente.objects.all()],
+        'canchas': await sync_to_async(catalogo.canchas)(),
         'meses': [
             (1, 'Enero'), (2, 'Febrero'), (3, 'Marzo'), (4, 'Abril'),
             (5, 'Mayo'), (6, 'Junio'), (7, 'Julio'), (8, 'Agosto'),
@@ -796,78 +1039,24 @@ def reportes(request):
         'anios': range(2024, hoy.year + 2),
     }
     
-    return render(request, 'reservas/reportes.html', context)
+    return await sync_to_async(render)(request, 'reservas/reportes.html', context)
 
 
 
-def reportes_pdf(request):
-    """Genera un PDF profesional con los reportes del período seleccionado"""
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-    from io import BytesIO
-    import datetime
+async def reportes_pdf(request):
+    """Genera un PDF profesional con los reportes del período seleccionado
     
+    Vista async: los totales se leen con el ORM async y el PDF se arma en un
+    hilo del pool (reportlab es sincrónico) sin bloquear al servidor. Con
+    ?detalle=clientes y/o ?detalle=canchas agrega una sección por cliente o por
+    cancha con cada reserva (ver reservas/reporte_pdf.py).
+    """
     # Obtener parámetros de filtro (igual que en reportes())
     mes_seleccionado = int(request.GET.get('mes', timezone.now().month))
     anio_seleccionado = int(request.GET.get('anio', timezone.now().year))
     cliente_id = request.GET.get('cliente')
     cancha_id = request.GET.get('cancha')
     
-    # Crear el buffer para el PDF
-    buffer = BytesIO()
-    
-    # Crear el documento PDF
-    doc = SimpleDocTemplate(buffer, pagesize=A4,
-                          rightMargin=50, leftMargin=50,
-                          topMargin=50, bottomMargin=50)
-    
-    # Contenedor para elementos del PDF
-    elements = []
-    
-    # Estilos
-    styles = getSampleStyleSheet()
-    
-    # Estilo personalizado para título
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1e3a8a'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    # Estilo para subtítulos
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#1e3a8a'),
-        spaceAfter=12,
-        spaceBefore=20,
-        fontName='Helvetica-Bold'
-    )
-    
-    # Estilo para texto normal
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.black,
-        spaceAfter=6
-    )
-    
-    # ===== ENCABEZADO =====
-    elements.append(Paragraph("Sistema de Reservas de Canchas", title_style))
-    elements.append(Paragraph(f"Reporte del Período: {mes_seleccionado}/{anio_seleccionado}", normal_style))
-    elements.append(Paragraph(f"Fecha de generación: {timezone.now().strftime('%d/%m/%Y %H:%M')}", normal_style))
-    elements.append(Spacer(1, 0.3*inch))
-    
     # ===== OBTENER DATOS (reutilizar lógica de reportes()) =====
     # Filtrar reservas base
     reservas = Reserva.objects.filter(
@@ -881,295 +1070,88 @@ def reportes_pdf(request):
         reservas = reservas.filter(cancha_id=cancha_id)
     
     # REPORTE 1: Clientes con más reservas
-    # Calcular gastos usando el modelo Pago
-    clientes_data = []
-    clientes_dict = {}
-    
-    for reserva in reservas:
-        cliente_id_val = reserva.cliente.id
-        if cliente_id_val not in clientes_dict:
-            clientes_dict[cliente_id_val] = {
-                'nombre': reserva.cliente.nombre,
-                'apellido': reserva.cliente.apellido,
-                'dni': reserva.cliente.dni,
-                'num_reservas': 0,
-                'total_gasto': 0
-            }
-        
-        clientes_dict[cliente_id_val]['num_reservas'] += 1
-        
-        # Buscar el pago asociado o calcular el costo
-        try:
-            pago = Pago.objects.filter(reserva=reserva).first()
-            if pago:
-                clientes_dict[cliente_id_val]['total_gasto'] += float(pago.monto_total)
-            else:
-                clientes_dict[cliente_id_val]['total_gasto'] += float(reserva.calcular_costo_total())
-        except Exception:
-            # Si hay error con Pago, usar el cálculo directo
-            clientes_dict[cliente_id_val]['total_gasto'] += float(reserva.calcular_costo_total())
-    
-    # Convertir a lista y ordenar
-    clientes_stats = sorted(clientes_dict.values(), 
-                           key=lambda x: (-x['total_gasto'], -x['num_reservas']))[:10]
-    
-    if clientes_stats:
-        elements.append(Paragraph("1. Top 10 Clientes por Gasto Total", subtitle_style))
-        
-        # Crear tabla
-        data = [['#', 'Cliente', 'DNI', 'Reservas', 'Gasto Total']]
-        for idx, item in enumerate(clientes_stats, 1):
-            data.append([
-                str(idx),
-                f"{item['nombre']} {item['apellido']}",
-                str(item['dni']),
-                str(item['num_reservas']),
-                f"${item['total_gasto']:,.2f}"
-            ])
-        
-        table = Table(data, colWidths=[0.5*inch, 2*inch, 1.2*inch, 1*inch, 1.3*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')]),
-        ]))
-        
-        elements.append(table)
-        elements.append(Spacer(1, 0.3*inch))
+    # Gastos agregados en la base (monto del pago o costo base si no tiene)
+    totales_clientes = await atotales_por(reservas, 'cliente_id')
+    clientes = await Cliente.objects.ain_bulk(totales_clientes)
+    clientes_stats = sorted((
+        {
+            'nombre': clientes[cliente_id_val].nombre,
+            'apellido': clientes[cliente_id_val].apellido,
+            'dni': clientes[cliente_id_val].dni,
+            'num_reservas': totales['num_reservas'],
+            'total_gasto': totales['total_importe'],
+        }
+        for cliente_id_val, totales in totales_clientes.items()
+    ), key=lambda x: (-x['total_gasto'], -x['num_reservas']))[:10]
     
     # REPORTE 2: Distribución por Cancha
-    canchas_dict = {}
-    
-    for reserva in reservas:
-        cancha_id_val = reserva.cancha.id
-        if cancha_id_val not in canchas_dict:
-            canchas_dict[cancha_id_val] = {
-                'nombre': reserva.cancha.nombre,
-                'tipo_deporte': reserva.cancha.tipo_cancha.nombre,
-                'num_reservas': 0,
-                'total_ingresos': 0,
-                'total_horas': 0
-            }
-        
-        canchas_dict[cancha_id_val]['num_reservas'] += 1
-        
-        # Calcular horas
-        duracion = (reserva.fecha_hora_fin - reserva.fecha_hora_inicio).total_seconds() / 3600
-        canchas_dict[cancha_id_val]['total_horas'] += duracion
-        
-        # Calcular ingresos
-        try:
-            pago = Pago.objects.filter(reserva=reserva).first()
-            if pago:
-                canchas_dict[cancha_id_val]['total_ingresos'] += float(pago.monto_total)
-            else:
-                canchas_dict[cancha_id_val]['total_ingresos'] += float(reserva.calcular_costo_total())
-        except Exception:
-            canchas_dict[cancha_id_val]['total_ingresos'] += float(reserva.calcular_costo_total())
-    
-    canchas_stats = sorted(canchas_dict.values(), key=lambda x: -x['total_ingresos'])
-    
-    if canchas_stats:
-        elements.append(Paragraph("2. Distribución de Ingresos por Cancha", subtitle_style))
-        
-        data = [['#', 'Cancha', 'Deporte', 'Reservas', 'Horas', 'Ingresos']]
-        for idx, item in enumerate(canchas_stats, 1):
-            data.append([
-                str(idx),
-                item['nombre'],
-                item['tipo_deporte'],
-                str(item['num_reservas']),
-                f"{item['total_horas']:.1f}h",
-                f"${item['total_ingresos']:,.2f}"
-            ])
-        
-        table = Table(data, colWidths=[0.5*inch, 1.8*inch, 1*inch, 0.8*inch, 0.8*inch, 1.2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#84cc16')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')]),
-        ]))
-        
-        elements.append(table)
-        elements.append(Spacer(1, 0.3*inch))
-    
-    # REPORTE 3: Ranking de Canchas por Número de Reservas
-    if canchas_stats:
-        elements.append(Paragraph("3. Ranking de Canchas Más Utilizadas", subtitle_style))
-        
-        canchas_ranking = sorted(canchas_stats, key=lambda x: -x['num_reservas'])[:10]
-        
-        data = [['Posición', 'Cancha', 'Tipo Deporte', 'Reservas', 'Ingresos']]
-        for idx, item in enumerate(canchas_ranking, 1):
-            data.append([
-                f"{idx}°",
-                item['nombre'],
-                item['tipo_deporte'],
-                str(item['num_reservas']),
-                f"${item['total_ingresos']:,.2f}"
-            ])
-        
-        table = Table(data, colWidths=[0.8*inch, 2*inch, 1.2*inch, 1*inch, 1.2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')]),
-        ]))
-        
-        elements.append(table)
-        elements.append(Spacer(1, 0.3*inch))
+    totales_canchas = await atotales_por(reservas, 'cancha_id')
+    canchas = (await sync_to_async(catalogo.catalogo)())['canchas']
+    canchas_stats = sorted((
+        {
+            'nombre': canchas[cancha_id_val].nombre,
+            'tipo_deporte': canchas[cancha_id_val].tipo_cancha.nombre,
+            'num_reservas': totales['num_reservas'],
+            'total_ingresos': totales['total_importe'],
+            'total_horas': totales['total_horas'],
+        }
+        for cancha_id_val, totales in totales_canchas.items()
+    ), key=lambda x: -x['total_ingresos'])
     
     # REPORTE 4: Estadísticas Mensuales (últimos 6 meses)
-    elements.append(PageBreak())
-    elements.append(Paragraph("4. Estadísticas de los Últimos 6 Meses", subtitle_style))
-    
-    hoy = timezone.now()
+    hoy = timezone.localtime()
+    primer_mes = (hoy - relativedelta(months=5)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    por_mes = await atotales_por_mes(Reserva.objects.filter(fecha_hora_inicio__gte=primer_mes))
     meses_data = []
     
     for i in range(5, -1, -1):
         mes_actual = hoy - relativedelta(months=i)
-        mes_num = mes_actual.month
-        anio_num = mes_actual.year
-        
-        reservas_mes = Reserva.objects.filter(
-            fecha_hora_inicio__month=mes_num,
-            fecha_hora_inicio__year=anio_num
-        )
-        
-        total_reservas = reservas_mes.count()
-        total_horas = 0
-        
-        for reserva in reservas_mes:
-            duracion = (reserva.fecha_hora_fin - reserva.fecha_hora_inicio).total_seconds() / 3600
-            total_horas += duracion
-        
+        totales = por_mes.get((mes_actual.year, mes_actual.month), {})
         meses_data.append({
             'mes': mes_actual.strftime('%B'),
-            'anio': anio_num,
-            'reservas': total_reservas,
-            'horas': total_horas
+            'anio': mes_actual.year,
+            'reservas': totales.get('total_reservas', 0),
+            'horas': totales.get('total_horas', 0)
         })
     
-    if meses_data:
-        data = [['Mes', 'Año', 'Reservas', 'Horas Totales']]
-        for item in meses_data:
-            data.append([
-                item['mes'],
-                str(item['anio']),
-                str(item['reservas']),
-                f"{item['horas']:.1f}h"
-            ])
-        
-        table = Table(data, colWidths=[1.5*inch, 1*inch, 1.5*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#84cc16')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')]),
-        ]))
-        
-        elements.append(table)
-    
-    # RESUMEN FINAL
-    elements.append(Spacer(1, 0.5*inch))
-    total_reservas_periodo = reservas.count()
-    
-    # Calcular ingresos totales
-    total_ingresos_periodo = 0
-    for reserva in reservas:
-        try:
-            pago = Pago.objects.filter(reserva=reserva).first()
-            if pago:
-                total_ingresos_periodo += float(pago.monto_total)
-            else:
-                total_ingresos_periodo += float(reserva.calcular_costo_total())
-        except Exception:
-            total_ingresos_periodo += float(reserva.calcular_costo_total())
-    
-    resumen_text = f"""
-    <b>Resumen del Período {mes_seleccionado}/{anio_seleccionado}:</b><br/>
-    • Total de reservas: {total_reservas_periodo}<br/>
-    • Ingresos totales: ${total_ingresos_periodo:,.2f}<br/>
-    • Clientes únicos: {reservas.values('cliente').distinct().count()}<br/>
-    • Canchas utilizadas: {reservas.values('cancha').distinct().count()}
-    """
-    
-    elements.append(Paragraph(resumen_text, normal_style))
+    # RESUMEN FINAL: cada reserva está en una sola cancha
+    resumen = {
+        'total_reservas': sum(totales['num_reservas'] for totales in totales_canchas.values()),
+        'total_ingresos': total_importes(totales_canchas),
+        'clientes': len(totales_clientes),
+        'canchas': len(totales_canchas),
+    }
     
-    # Footer
-    elements.append(Spacer(1, 0.5*inch))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.grey,
-        alignment=TA_CENTER
+    # DETALLE (opcional, ?detalle=clientes,canchas): cada reserva del período
+    detalle = {valor for parametro in request.GET.getlist('detalle') for valor in parametro.split(',')}
+    detalle_clientes = detalle_canchas = None
+    if detalle & {'clientes', 'canchas'}:
+        reservas_detalle = await areservas_con_importe(
+            reservas.select_related('cliente').order_by('fecha_hora_inicio', 'id')
+        )
+        if 'clientes' in detalle:
+            detalle_clientes = secciones_por_cliente(reservas_detalle, canchas)
+        if 'canchas' in detalle:
+            detalle_canchas = secciones_por_cancha(reservas_detalle, canchas)
+    
+    archivo = await sync_to_async(construir_reporte, thread_sensitive=False)(
+        mes_seleccionado, anio_seleccionado, clientes_stats, canchas_stats, meses_data, resumen,
+        detalle_clientes=detalle_clientes, detalle_canchas=detalle_canchas,
     )
-    elements.append(Paragraph(
-        f"Documento generado automáticamente - {timezone.now().strftime('%d/%m/%Y %H:%M:%S')}",
-        footer_style
-    ))
-    
-    # Construir PDF
-    doc.build(elements)
     
-    # Preparar respuesta
-    buffer.seek(0)
-    response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
+    # Preparar respuesta: el PDF se envía desde el archivo temporal, en bloques
     filename = f"reporte_canchas_{mes_seleccionado}_{anio_seleccionado}.pdf"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
-
+    return respuesta_pdf(archivo, filename, asincronica=isinstance(request, ASGIRequest))
 
 
 def torneo_lista(request):
     """Listar todos los torneos con paginación"""
-    # Obtener torneos y ordenarlos
-    torneos_list = Torneo.objects.all().order_by('-fecha_inicio')
-    
     # Actualizar estados de torneos según fechas
     hoy = timezone.now().date()
-    for torneo in torneos_list:
-        estado_anterior = torneo.estado
-        
-        # Si ya pasó la fecha de inicio y está en inscripción, cambiar a EN_CURSO
-        if torneo.fecha_inicio <= hoy and torneo.estado == 'INSCRIPCION':
-            torneo.estado = 'EN_CURSO'
-            torneo.save()
-        
-        # Si pasó la fecha fin, cambiar a FINALIZADO
-        if hoy > torneo.fecha_fin and torneo.estado != 'FINALIZADO':
-            torneo.estado = 'FINALIZADO'
-            torneo.save()
+    Torneo.actualizar_estados_por_fecha(hoy)
+    
+    # Obtener torneos y ordenarlos
+    torneos_list = Torneo.objects.all().order_by('-fecha_inicio')
     
     # Paginación: 10 torneos por página
     paginator = Paginator(torneos_list, 10)
@@ -1249,52 +1231,31 @@ def torneo_crear(request):
 
 def torneo_detalle(request, pk):
     """Ver detalles de un torneo"""
-    torneo = get_object_or_404(Torneo, pk=pk)
-    
     # Actualizar estado del torneo según las fechas
     hoy = timezone.now().date()
-    estado_anterior = torneo.estado
+    Torneo.actualizar_estados_por_fecha(hoy, pk=pk)
     
-    # Si ya pasó la fecha de inicio y está en inscripción, cambiar a EN_CURSO
-    if torneo.fecha_inicio <= hoy and torneo.estado == 'INSCRIPCION':
-        torneo.estado = 'EN_CURSO'
-        torneo.save()
-    
-    # Si pasó la fecha fin, cambiar a FINALIZADO
-    if hoy > torneo.fecha_fin and torneo.estado != 'FINALIZADO':
-        torneo.estado = 'FINALIZADO'
-        torneo.save()
+    torneo = get_object_or_404(Torneo, pk=pk)
     
     # Obtener equipos inscritos
-    equipos = torneo.equipos.all().order_by('nombre')
-    equipos_inscritos = equipos.count()
+    equipos = list(torneo.equipos.all().order_by('nombre'))
+    equipos_inscritos = len(equipos)
     
     # Calcular ingresos por inscripciones (solo costo de inscripción * equipos)
-    from decimal import Decimal
     costo = torneo.costo_inscripcion if torneo.costo_inscripcion else Decimal('0.00')
     ingresos_inscripciones = costo * equipos_inscritos
     
-    # Debug
-    print(f"DEBUG Torneo {torneo.id}: costo={costo}, equipos={equipos_inscritos}, ingresos_inscripciones={ingresos_inscripciones}")
+    logger.debug('Torneo %s: costo=%s, equipos=%s, ingresos_inscripciones=%s',
+                 torneo.id, costo, equipos_inscritos, ingresos_inscripciones)
     
-    # Calcular ingresos por reservas pagadas relacionadas al torneo
-    reservas_torneo = Reserva.objects.filter(torneo=torneo, estado='PAGADA')
-    ingresos_reservas = Decimal('0.00')
-    for r in reservas_torneo:
-        if hasattr(r, 'pago'):
-            ingresos_reservas += r.pago.monto_total
+    # Ingresos por reservas pagadas y conteos de partidos (agregados, cacheados)
+    resumen = resumen_torneo(torneo)
     
     # Total de ingresos del torneo
-    ingresos_totales = ingresos_inscripciones + ingresos_reservas
-    
-    # Obtener estadísticas de partidos si existen
-    partidos = torneo.partidos.all().order_by('-fecha_hora')
-    total_partidos = partidos.count()
-    partidos_completados = partidos.filter(estado='FINALIZADO').count()
-    partidos_pendientes = partidos.filter(estado='PENDIENTE').count()
+    ingresos_totales = ingresos_inscripciones + resumen['ingresos_reservas']
     
     # Obtener últimos 5 partidos para mostrar en detalle
-    ultimos_partidos = partidos[:5]
+    ultimos_partidos = torneo.partidos.select_related('equipo1', 'equipo2').order_by('-fecha_hora')[:5]
     
     # Calcular días de duración y días restantes
     dias_duracion = (torneo.fecha_fin - torneo.fecha_inicio).days + 1
@@ -1311,13 +1272,9 @@ def torneo_detalle(request, pk):
         'equipos': equipos,
         'equipos_inscritos': equipos_inscritos,
         'ingresos_inscripciones': ingresos_inscripciones,
-        'ingresos_reservas': ingresos_reservas,
         'ingresos_totales': ingresos_totales,
-        'reservas_count': reservas_torneo.count(),
         'partidos': ultimos_partidos,
-        'total_partidos': total_partidos,
-        'partidos_completados': partidos_completados,
-        'partidos_pendientes': partidos_pendientes,
+        **resumen,
         'dias_duracion': dias_duracion,
         'dias_restantes': dias_restantes,
         'today_date': hoy,
@@ -1476,7 +1433,6 @@ def torneo_generar_fixture(request, pk):
             messages.error(request, f'Error al generar fixture: {str(e)}')
             return redirect('torneo_detalle', pk=pk)
     
-    import math
     num_equipos = torneo.equipos.count()
     es_potencia_de_2 = num_equipos > 0 and (num_equipos & (num_equipos - 1) == 0)
     
@@ -1484,15 +1440,16 @@ def torneo_generar_fixture(request, pk):
     estructura = []
     error = None
     num_rondas = 0
+    partidos_libres = 0
     
     if num_equipos < 2:
         error = "Se necesitan al menos 2 equipos para generar el fixture."
-    elif not es_potencia_de_2:
-        error = f"La cantidad de equipos ({num_equipos}) debe ser una potencia de 2."
     else:
-        num_rondas = int(math.log2(num_equipos))
+        # Igual que generar_fixture: el cuadro se completa con partidos libres
+        num_rondas = (num_equipos - 1).bit_length()
+        partidos_libres = 2 ** num_rondas - num_equipos
         for ronda_num in range(1, num_rondas + 1):
-            partidos_en_ronda = num_equipos // (2 ** ronda_num)
+            partidos_en_ronda = 2 ** (num_rondas - ronda_num)
             
             # Nombre de la ronda
             if ronda_num == num_rondas:
@@ -1514,6 +1471,7 @@ def torneo_generar_fixture(request, pk):
         'torneo': torneo,
         'num_equipos': num_equipos,
         'es_potencia_de_2': es_potencia_de_2,
+        'partidos_libres': partidos_libres,
         'error': error,
         'num_rondas': num_rondas,
         'estructura': estructura,
@@ -1530,30 +1488,29 @@ def torneo_fixture(request, pk):
         messages.warning(request, 'El fixture aún no ha sido generado.')
         return redirect('torneo_detalle', pk=pk)
     
-    # Organizar partidos por ronda
-    import math
-    num_equipos = torneo.equipos.count()
-    total_rondas = int(math.log2(num_equipos)) if num_equipos > 0 else 0
+    # Organizar partidos por ronda, leídos en una sola consulta
+    partidos_por_ronda = {}
+    partidos = (
+        torneo.partidos
+        .select_related('equipo1', 'equipo2', 'ganador', 'siguiente__torneo')
+        .order_by('ronda', 'numero_partido')
+    )
+    for partido in partidos:
+        partidos_por_ronda.setdefault(partido.ronda, []).append(partido)
     
-    rondas = []
-    for ronda_num in range(1, total_rondas + 1):
-        partidos = torneo.partidos.filter(ronda=ronda_num).order_by('numero_partido')
-        
-        # Determinar nombre de la ronda
-        if ronda_num == total_rondas:
-            nombre_ronda = "Final"
-        elif ronda_num == total_rondas - 1:
-            nombre_ronda = "Semifinal"
-        elif ronda_num == total_rondas - 2:
-            nombre_ronda = "Cuartos de Final"
-        else:
-            nombre_ronda = f"Ronda {ronda_num}"
-        
-        rondas.append({
+    rondas = [
+        {
             'numero': ronda_num,
-            'nombre': nombre_ronda,
-            'partidos': partidos
-        })
+            'nombre': nombre_de_ronda(ronda_num, torneo.total_rondas),
+            'partidos': partidos_por_ronda.get(ronda_num, []),
+            # Partidos listos para cargar su resultado
+            'pendientes': sum(
+                1 for p in partidos_por_ronda.get(ronda_num, [])
+                if p.estado == 'PENDIENTE' and p.equipo1_id and p.equipo2_id
+            ),
+        }
+        for ronda_num in range(1, torneo.total_rondas + 1)
+    ]
     
     context = {
         'torneo': torneo,
@@ -1563,52 +1520,116 @@ def torneo_fixture(request, pk):
 
 
 def partido_registrar_resultado(request, pk):
-    """Registrar el resultado de un partido"""
-    partido = get_object_or_404(Partido, pk=pk)
+    """Registrar el resultado de un partido (o un walkover)"""
+    partido = get_object_or_404(
+        Partido.objects.select_related('torneo', 'equipo1', 'equipo2', 'siguiente'), pk=pk
+    )
     
-    if partido.estado == 'FINALIZADO':
+    if partido.estado != 'PENDIENTE':
         messages.warning(request, 'Este partido ya tiene un resultado registrado.')
         return redirect('torneo_fixture', pk=partido.torneo.pk)
     
+    es_final = partido.ronda == partido.torneo.total_rondas
+    context = {
+        'partido': partido,
+        'torneo': partido.torneo,
+        'es_final': es_final,
+    }
+    
     if request.method == 'POST':
         try:
-            resultado_equipo1 = int(request.POST['resultado_equipo1'])
-            resultado_equipo2 = int(request.POST['resultado_equipo2'])
-            
-            if resultado_equipo1 < 0 or resultado_equipo2 < 0:
-                messages.error(request, 'Los resultados no pueden ser negativos.')
-                return render(request, 'reservas/torneos/registrar_resultado.html', {'partido': partido})
-            
-            if resultado_equipo1 == resultado_equipo2:
-                messages.error(request, 'No puede haber empate en eliminación directa.')
-                return render(request, 'reservas/torneos/registrar_resultado.html', {'partido': partido})
-            
-            partido.resultado_equipo1 = resultado_equipo1
-            partido.resultado_equipo2 = resultado_equipo2
-            
-            # El clean() del modelo determinará el ganador
-            partido.clean()
-            partido.save()
-            
-            # Avanzar al ganador a la siguiente ronda
-            partido.avanzar_ganador()
-            
-            messages.success(request, f'Resultado registrado. Ganador: {partido.ganador.nombre}')
-            return redirect('torneo_fixture', pk=partido.torneo.pk)
-            
-        except Exception as e:
+            if request.POST.get('walkover'):
+                partido.registrar_resultado(walkover=request.POST['walkover'])
+            else:
+                partido.registrar_resultado(
+                    int(request.POST['resultado_equipo1']),
+                    int(request.POST['resultado_equipo2']),
+                )
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+            return render(request, 'reservas/torneos/registrar_resultado.html', context)
+        except (KeyError, ValueError) as e:
             messages.error(request, f'Error al registrar resultado: {str(e)}')
+            return render(request, 'reservas/torneos/registrar_resultado.html', context)
+        
+        if partido.estado == 'WALKOVER':
+            messages.success(request, f'Walkover registrado. Ganador: {partido.ganador.nombre}')
+        else:
+            messages.success(request, f'Resultado registrado. Ganador: {partido.ganador.nombre}')
+        return redirect('torneo_fixture', pk=partido.torneo.pk)
     
-    # Calcular el total de rondas del torneo
-    total_rondas = partido.torneo.partidos.values_list('ronda', flat=True).distinct().count()
-    es_final = partido.ronda == total_rondas
+    return render(request, 'reservas/torneos/registrar_resultado.html', context)
+
+
+def torneo_registrar_ronda(request, pk, ronda):
+    """
+    Cargar todos los resultados de una ronda de una vez.
     
+    Acepta el formulario (resultado_equipo1_<id>, resultado_equipo2_<id> y
+    walkover_<id> por partido; los partidos sin datos se saltean) o un JSON
+    {"resultados": [{"partido": id, "resultado_equipo1": n, "resultado_equipo2": m}
+    o {"partido": id, "walkover": "equipo1"}]}. Si un resultado es inválido no
+    se guarda ninguno.
+    """
+    torneo = get_object_or_404(Torneo, pk=pk)
+    if not 1 <= ronda <= torneo.total_rondas:
+        messages.error(request, 'La ronda no existe en el fixture de este torneo.')
+        return redirect('torneo_fixture', pk=pk)
+    
+    partidos = list(
+        torneo.partidos.filter(ronda=ronda, estado='PENDIENTE', equipo1__isnull=False, equipo2__isnull=False)
+        .select_related('equipo1', 'equipo2').order_by('numero_partido')
+    )
     context = {
-        'partido': partido,
-        'torneo': partido.torneo,
-        'es_final': es_final,
+        'torneo': torneo,
+        'ronda': ronda,
+        'nombre_ronda': nombre_de_ronda(ronda, torneo.total_rondas),
+        'partidos': partidos,
     }
-    return render(request, 'reservas/torneos/registrar_resultado.html', context)
+    if request.method != 'POST':
+        return render(request, 'reservas/torneos/registrar_ronda.html', context)
+    
+    es_json = request.content_type == 'application/json'
+    resultados = {}
+    try:
+        if es_json:
+            for fila in json.loads(request.body)['resultados']:
+                if fila.get('walkover'):
+                    resultados[int(fila['partido'])] = fila['walkover']
+                else:
+                    resultados[int(fila['partido'])] = (int(fila['resultado_equipo1']), int(fila['resultado_equipo2']))
+        else:
+            for partido in partidos:
+                # Lo ingresado vuelve al formulario si hay errores
+                partido.walkover = request.POST.get(f'walkover_{partido.pk}', '')
+                partido.valor1 = request.POST.get(f'resultado_equipo1_{partido.pk}', '').strip()
+                partido.valor2 = request.POST.get(f'resultado_equipo2_{partido.pk}', '').strip()
+                if partido.walkover:
+                    resultados[partido.pk] = partido.walkover
+                elif partido.valor1 or partido.valor2:
+                    resultados[partido.pk] = (
+                        int(partido.valor1) if partido.valor1 else None,
+                        int(partido.valor2) if partido.valor2 else None,
+                    )
+    except (KeyError, TypeError, ValueError):
+        if es_json:
+            return JsonResponse({'error': 'Formato de resultados inválido.'}, status=400)
+        messages.error(request, 'Los resultados deben ser números enteros.')
+        return render(request, 'reservas/torneos/registrar_ronda.html', context)
+    
+    errores = registrar_resultados_ronda(torneo, ronda, resultados)
+    if es_json:
+        if errores:
+            return JsonResponse({'errores': {str(pk): mensaje for pk, mensaje in errores.items()}}, status=400)
+        return JsonResponse({'registrados': len(resultados)})
+    
+    if errores:
+        for partido in partidos:
+            partido.error = errores.get(partido.pk)
+        messages.error(request, 'No se guardó ningún resultado: corregí los partidos marcados.')
+        return render(request, 'reservas/torneos/registrar_ronda.html', context)
+    messages.success(request, f'Se registraron {len(resultados)} resultados de la ronda.')
+    return redirect('torneo_fixture', pk=pk)
 
 
 def equipo_lista(request):
@@ -1722,16 +1743,21 @@ def equipo_eliminar(request, pk):
     }
     return render(request, 'reservas/equipos/confirmar_eliminar.html', context)
 
-def reserva_crear_pago_mercadopago(request, pk):
+async def reserva_crear_pago_mercadopago(request, pk):
+    """Crea la preferencia de pago y redirige a MercadoPago.
+    
+    Vista async: la espera a MercadoPago no ocupa un hilo del servidor
+    (ver reservas/pasarela.py) y la base se consulta con el ORM async.
+    """
     from django.conf import settings
-    import mercadopago
     
-    reserva = get_object_or_404(Reserva, pk=pk)
+    reserva = await aget_object_or_404(Reserva.objects.select_related('cliente', 'cancha', 'pago'), pk=pk)
     
     if not hasattr(reserva, 'pago'):
         try:
-            costo_total = reserva.calcular_costo_total()
-            Pago.objects.create(
+            # Con las reglas de precio, el mismo monto que al crear la reserva
+            costo_total = await sync_to_async(reserva.calcular_costo_total)(usar_mejor_precio=True)
+            reserva.pago = await Pago.objects.acreate(
                 reserva=reserva,
                 monto_total=costo_total,
                 estado='PENDIENTE'
@@ -1752,8 +1778,6 @@ def reserva_crear_pago_mercadopago(request, pk):
         return redirect('reserva_detalle', pk=pk)
     
     try:
-        sdk = mercadopago.SDK(access_token)
-        
         preference_data = {
             "items": [
                 {
@@ -1773,13 +1797,13 @@ def reserva_crear_pago_mercadopago(request, pk):
             "statement_descriptor": "RESERVA CANCHA"
         }
         
-        preference_response = sdk.preference().create(preference_data)
+        preference_response = await crear_preferencia(access_token, preference_data)
         
         if preference_response["status"] == 201:
             preference = preference_response["response"]
             
             pago.mp_preference_id = preference["id"]
-            pago.save()
+            await pago.asave()
             
             init_point = preference.get("init_point")
             if init_point:
@@ -1797,3 +1821,18 @@ def reserva_crear_pago_mercadopago(request, pk):
         return redirect('reserva_detalle', pk=pk)
 
 
+def metricas(request):
+    """Métricas de rendimiento por vista en formato de texto de Prometheus.
+
+    Accesible para usuarios staff o con el header Authorization: Bearer <METRICAS_TOKEN>.
+    """
+    from django.conf import settings
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    autorizado_por_token = token and request.headers.get('Authorization') == f'Bearer {token}'
+    if not (autorizado_por_token or request.user.is_staff):
+        return HttpResponseForbidden('No autorizado')
+
+    return HttpResponse(
+        registro_metricas.exportar_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )